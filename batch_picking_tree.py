@@ -0,0 +1,144 @@
+import sys
+import csv
+import json
+import time
+import datetime
+from reverse_index import load_or_build, ClosureCache
+import reachability_index
+from forest_scc import Condensation
+from forest_render import open_forest
+from node_key import make_key, key_version
+
+
+def read_cve_targets(csv_path):
+    """
+    - Description: 취약점 CSV에서 (CVE, 패키지 이름, 버전) 행을 읽음
+                   VDB_npm.csv (CVE, Vulnerable Package Name, Vulnerable Package Version)와
+                   matched_cves(both_GAD_and_VDB).csv (CVE IDs, Package Name(VDB), Vulnerable Version Range) 형식을 지원
+    - Input: CSV 경로
+    - Output: (행 번호, CVE, 패키지 이름, 버전)을 하나씩 돌려주는 generator
+    """
+    with open(csv_path, mode='r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        for line_number, row in enumerate(reader, start=2):
+            cve = row.get('CVE') or row.get('CVE IDs') or ''
+            name = row.get('Vulnerable Package Name') or row.get('Package Name(VDB)') or row.get('Package Name') or ''
+            version = row.get('Vulnerable Package Version') or row.get('Vulnerable Version Range') or ''
+            yield line_number, cve.strip(), name.strip(), version.strip()
+
+
+def extract_all(reverse_index, csv_path, output_path, count_only=False, closure_cache=None, reachability=None):
+    """
+    - Description: 포레스트를 한 번만 읽어두고 CSV의 모든 대상의 reverse dependency closure를 구함
+                   버전 칸이 range이면 포레스트에서 range에 드는 버전들을 골라 합집합을 한 번에 구함
+                   앞에서 구한 대상의 closure를 memo에 남겨서, 겹치는 closure는 다시 탐색하지 않고 합침
+                   closure_cache가 있으면 이전 실행에서 구한 정확한 버전의 결과를 다시 쓰고, 새로 구한 결과는 저장
+                   (forest_update.py가 포레스트를 바꿀 때 영향받는 결과만 지움, 다른 포레스트에서 구한 결과는 ClosureCache가 버림)
+                   reachability가 있으면 탐색하지 않고 미리 계산한 조상 집합에서 읽고 (memo, closure_cache는 쓰지 않음),
+                   Condensation이면 사이클을 한 덩어리로 본 DAG에서 컴포넌트 단위로 탐색함
+    - Input: ReverseIndex, 취약점 CSV 경로, 결과 JSONL 경로, count_only - dependents 목록 없이 개수만 저장,
+             closure_cache - ClosureCache (None이면 사용하지 않음), reachability - ReachabilityIndex 또는 forest_scc.Condensation (None이면 사용하지 않음)
+    - Output: (처리한 행 수, 포레스트에 있던 대상 수)
+    """
+    memo = {}
+    rows = 0
+    found = 0
+    batch_start = time.perf_counter()
+    with open(output_path, 'w') as out_f:
+        for line_number, cve, name, version in read_cve_targets(csv_path):
+            start_time = time.perf_counter()
+            target = make_key(name, version)
+            result = {'line': line_number, 'cve': cve, 'package': name, 'version': version, 'target': target}
+
+            target_id = reverse_index.ids.get(target)
+            keys = reverse_index.keys
+            if reachability is not None:
+                # 정확한 버전 노드가 없으면 range로 보고, 같은 포레스트에서 만든 인덱스로 한 번에 구함
+                node_ids = [target_id] if target_id is not None else reverse_index.range_node_ids(name, version)
+                reach_ids = [reachability.ids[keys[node_id]] for node_id in node_ids]
+                keys = reachability.keys
+                if target_id is not None and count_only:
+                    closure = range(reachability.count_dependents_id(reach_ids[0]))
+                else:
+                    closure = reachability.closure_ids(reach_ids)
+                    if target_id is not None:
+                        closure.discard(reach_ids[0])
+                memo_hits = 0
+                result['matched_versions'] = [key_version(reverse_index.keys[node_id]) for node_id in node_ids]
+            elif target_id is not None:
+                cached = closure_cache.get(target) if closure_cache is not None and target_id not in memo else None
+                if cached is not None:
+                    memo[target_id] = frozenset(reverse_index.ids[key] for key in cached if key in reverse_index.ids)
+                closure, memo_hits = reverse_index.closure_ids(target_id, memo)
+                if closure_cache is not None and cached is None:
+                    closure_cache.put(target, (reverse_index.keys[node_id] for node_id in closure))
+                result['matched_versions'] = [version]
+            else:
+                # 정확한 버전 노드가 없으면 Vulnerable Version Range로 보고 range에 드는 버전들을 한 번에 탐색
+                node_ids = reverse_index.range_node_ids(name, version)
+                closure, memo_hits = reverse_index.closure_of(node_ids, memo)
+                result['matched_versions'] = [key_version(reverse_index.keys[node_id]) for node_id in node_ids]
+
+            if not result['matched_versions']:
+                result['found'] = False
+                result['dependents_count'] = 0
+                if not count_only:
+                    result['dependents'] = []
+            else:
+                found += 1
+                result['found'] = True
+                result['dependents_count'] = len(closure)
+                if not count_only:
+                    result['dependents'] = sorted(keys[node_id] for node_id in closure)
+
+            result['memo_hits'] = memo_hits
+            result['seconds'] = round(time.perf_counter() - start_time, 6)
+            out_f.write(json.dumps(result) + '\n')
+            rows += 1
+            print(f"[+] {cve} {target}: {result['dependents_count']} dependents, "
+                  f"{memo_hits} memo hits, {result['seconds']:.3f}s")
+
+    print(f"[+] {rows} rows, {found} targets in forest, {len(memo)} closures memoized, "
+          f"{time.perf_counter() - batch_start:.3f}s total")
+    return rows, found
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if len(args) < 2:
+        print("Usage: python3 batch_picking_tree.py forest.json cve.csv [output.jsonl] [--count] [--closure-cache=path] [--reachability] [--condensed]\n"
+              " This code writes the reverse dependencies of every (package, version) in cve.csv, one JSON line per row")
+    else:
+        forest_path = args[0]
+        csv_path = args[1]
+        output_path = args[2] if len(args) > 2 else 'reverse_dependencies.jsonl'
+
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        reverse_index = load_or_build(forest_path)
+        print(f"[+] {reverse_index}")
+        closure_cache = None
+        reachability = None
+        for option in options:
+            if option.startswith('--closure-cache='):
+                closure_cache = ClosureCache(option.split('=', 1)[1], reverse_index.fingerprint)
+        # --reachability: 전이 폐쇄 인덱스를 읽거나 만들어서 질의마다 탐색하지 않음 (크기가 너무 크면 reverse index로 진행)
+        if '--reachability' in options:
+            try:
+                reachability = reachability_index.load_or_build(forest_path)
+                print(f"[+] {reachability}: {reachability.stats()}")
+            except ValueError as e:
+                print(f"[ERROR] {e}")
+        # --condensed: 사이클을 줄인 DAG에서 컴포넌트 단위로 탐색 (사이클이 큰 포레스트에서 reverse index 탐색보다 빠름)
+        if reachability is None and '--condensed' in options:
+            g = open_forest(forest_path)
+            reachability = Condensation.from_graph(g)
+            print(f"[+] {reachability}: {reachability.stats()}")
+        extract_all(reverse_index, csv_path, output_path, count_only='--count' in options, closure_cache=closure_cache,
+                    reachability=reachability)
+        if closure_cache is not None:
+            closure_cache.close()
+            if closure_cache.dropped:
+                print(f"[!] {closure_cache.dropped} cached results were from another forest and were dropped")
+        print(f"현재 시간:", datetime.datetime.now())
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+from dep_graph import DepGraph
+from forest_snapshot import write_snapshot, ForestSnapshot
+
+
+STATE_FILE = 'state.json'
+SNAPSHOT_FILE = 'forest.snapshot'
+
+
+def _write_json_atomic(path, data):
+    # 임시 파일에 쓰고 fsync 한 뒤 교체해서, 중간에 죽어도 이전 파일이나 새 파일 둘 중 하나만 남게 함
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class BuildJournal:
+    """
+    - Description: 포레스트 빌드의 체크포인트 (재시작하면 끝난 루트는 다시 돌지 않고 멈춘 곳부터 이어감)
+                   journal_<번호>.ndjson에 BFS 한 단계마다 새 노드/엣지와 다음 frontier를,
+                   루트가 끝나면 완료 기록을 한 줄씩 fsync 해서 남기고,
+                   주기적으로 포레스트 전체를 스냅샷으로 저장한 뒤 새 journal 파일로 넘어감 (state.json으로 원자적으로 교체)
+    - Input: directory - 체크포인트 폴더, snapshot_every - 루트 몇 개마다 스냅샷을 찍을지,
+             snapshot_seconds - 마지막 스냅샷 이후 몇 초가 지나면 스냅샷을 찍을지
+    """
+
+    def __init__(self, directory='./checkpoint', snapshot_every=100, snapshot_seconds=600):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.snapshot_seconds = snapshot_seconds
+        self.completed = set()        # 끝난 루트 'name@version'
+        self.pending_root = None      # 하다가 멈춘 루트
+        self.pending_frontier = []    # 멈춘 루트의 다음 frontier
+        self.pending_depth = 0
+        self.segment = 0
+        self.journal = None
+        self.current_root = None
+        self.level_marks = (0, 0)
+        self.roots_since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def _journal_path(self, segment):
+        return self._path(f"journal_{segment:06d}.ndjson")
+
+    def _open_journal(self):
+        self.journal = open(self._journal_path(self.segment), 'a')
+
+    def _append(self, record):
+        self.journal.write(json.dumps(record) + '\n')
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    # ---------- 시작 / 재시작 ----------
+
+    def start(self):
+        """ 이전 체크포인트를 지우고 새로 시작 (빈 그래프를 돌려줌) """
+        for filename in os.listdir(self.directory):
+            if filename.startswith('journal_') or filename in (STATE_FILE, SNAPSHOT_FILE):
+                os.remove(self._path(filename))
+        self.segment = 0
+        self._open_journal()
+        _write_json_atomic(self._path(STATE_FILE), {'segment': 0, 'snapshot': None, 'completed': []})
+        return DepGraph()
+
+    def resume(self):
+        """
+        - Description: 마지막 스냅샷을 읽고 그 뒤의 journal을 다시 적용해서 멈춘 시점의 포레스트를 복원
+        - Output: 복원한 DepGraph (completed, pending_root, pending_frontier도 채워짐)
+        """
+        state_path = self._path(STATE_FILE)
+        if not os.path.exists(state_path):
+            print(f"[+] no checkpoint in {self.directory}, starting from scratch")
+            return self.start()
+
+        with open(state_path, 'r') as file:
+            state = json.load(file)
+        self.segment = state['segment']
+        self.completed = set(state['completed'])
+        if state.get('snapshot'):
+            with ForestSnapshot(self._path(state['snapshot'])) as snapshot:
+                g = snapshot.to_depgraph()
+        else:
+            g = DepGraph()
+
+        replayed = 0
+        segment = self.segment
+        while os.path.exists(self._journal_path(segment)):
+            replayed += self._replay_journal(g, self._journal_path(segment))
+            segment += 1
+        self.segment = segment - 1 if segment > self.segment else self.segment
+        self._open_journal()
+        print(f"[+] resumed {g}: {len(self.completed)} roots done, {replayed} journal records replayed"
+              + (f", {self.pending_root} pending at depth {self.pending_depth}" if self.pending_root else ""))
+        return g
+
+    def _replay_journal(self, g, journal_path):
+        # 한 줄씩 다시 적용하고, fsync 되기 전에 죽어서 잘린 마지막 줄이 있으면 그 앞에서 파일을 잘라냄
+        replayed = 0
+        offset = 0
+        with open(journal_path, 'rb') as file:
+            for line in file:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('missing newline')
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"[!] dropping torn journal record at {journal_path}:{offset}")
+                    break
+                self._replay(g, record)
+                replayed += 1
+                offset += len(line)
+        if offset < os.path.getsize(journal_path):
+            os.truncate(journal_path, offset)
+        return replayed
+
+    def _replay(self, g, record):
+        if record['type'] == 'level':
+            for key in record['nodes']:
+                g.add_node(key)
+            for source, target in record['edges']:
+                g.add_edge(source, target)
+            self.pending_root = record['root']
+            self.pending_frontier = record['frontier']
+            self.pending_depth = record['depth']
+        elif record['type'] == 'root_done':
+            self.completed.add(record['root'])
+            if self.pending_root == record['root']:
+                self.pending_root = None
+                self.pending_frontier = []
+                self.pending_depth = 0
+
+    # ---------- 기록 ----------
+
+    def begin_root(self, root):
+        """ 루트 하나의 BFS를 시작 (g.begin_delta() 다음에 부름) """
+        self.current_root = root
+        self.level_marks = (0, 0)
+
+    def record_level(self, g, depth, frontier_ids):
+        """
+        - Description: BFS 한 단계가 끝날 때 이번 단계에서 생긴 노드/엣지와 다음 frontier를 journal에 남김
+        - Input: 그래프 g (delta 기록 중), 끝난 단계 다음의 depth, 다음 frontier 노드 ID들
+        """
+        if self.current_root is None:
+            return
+        delta = g.current_delta()
+        node_mark, edge_mark = self.level_marks
+        keys = g.keys
+        self._append({
+            'type': 'level',
+            'root': self.current_root,
+            'depth': depth,
+            'nodes': [keys[node_id] for node_id in delta.nodes[node_mark:]],
+            'edges': [(keys[source_id], keys[target_id]) for source_id, target_id in delta.edges[edge_mark:]],
+            'frontier': [keys[node_id] for node_id in frontier_ids],
+        })
+        self.level_marks = (len(delta.nodes), len(delta.edges))
+
+    def finish_root(self, g):
+        """ 루트 하나가 끝났음을 기록하고, 때가 되면 스냅샷을 찍음 """
+        root = self.current_root
+        self.current_root = None
+        self.completed.add(root)
+        if self.pending_root == root:
+            self.pending_root = None
+            self.pending_frontier = []
+            self.pending_depth = 0
+        self._append({'type': 'root_done', 'root': root})
+        self.roots_since_snapshot += 1
+        if (self.roots_since_snapshot >= self.snapshot_every
+                or time.monotonic() - self.last_snapshot >= self.snapshot_seconds):
+            self.snapshot(g)
+
+    def snapshot(self, g):
+        """
+        - Description: 포레스트 전체를 스냅샷으로 저장하고 새 journal 파일로 넘어감
+                       state.json이 바뀌기 전에 죽으면 새 스냅샷 위에 이전 journal을 다시 적용함
+                       (노드/엣지 추가는 중복이 걸러지므로 같은 기록을 두 번 적용해도 결과가 같음)
+        """
+        write_snapshot(g, self._path(SNAPSHOT_FILE))
+        self.journal.close()
+        old_segment = self.segment
+        self.segment += 1
+        self._open_journal()
+        _write_json_atomic(self._path(STATE_FILE), {
+            'segment': self.segment,
+            'snapshot': SNAPSHOT_FILE,
+            'completed': sorted(self.completed),
+            'nodes': g.number_of_nodes(),
+            'edges': g.number_of_edges(),
+            'time': time.time(),
+        })
+        # 스냅샷에 이미 들어간 journal은 필요 없음
+        for segment in range(old_segment + 1):
+            if os.path.exists(self._journal_path(segment)):
+                os.remove(self._journal_path(segment))
+        self.roots_since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+        print(f"[+] checkpoint: {g}, {len(self.completed)} roots done")
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
@@ -0,0 +1,344 @@
+import sys
+from array import array
+from collections import namedtuple
+from node_key import split_key
+
+
+# 루트 하나를 처리하면서 새로 생긴 노드 ID들과 (upstream ID, downstream ID) 간선들
+ForestDelta = namedtuple('ForestDelta', ['nodes', 'edges'])
+
+
+class DepGraph:
+    """
+    - Description: 포레스트를 만들 때 쓰는 정수 인덱스 기반 의존성 그래프
+                   'name@version' 문자열은 한 번만 저장하고 정수 ID로 바꿔서 사용 (interning)
+                   패키지 이름은 sys.intern으로 한 객체만 쓰고,
+                   버전은 노드마다 따로 저장하지 않고 'name@version'에서 패키지 이름 길이만큼 잘라서 꺼냄 ('@'를 다시 찾지 않음)
+                   간선은 노드별 array('i')에 저장하고, 필요할 때 CSR(offsets, targets) 배열로 굳힘
+                   pygraphviz 서브그래프 대신 패키지 이름 -> 버전 노드 ID 목록 인덱스를 가짐
+                   패키지 -> 패키지 간선(버전 간선 수)도 간선을 추가/삭제할 때마다 같이 갱신해서,
+                   버전 노드를 펼치지 않고 패키지 단위 질의(package_index.py)를 할 수 있음
+                   Graphviz는 마지막에 to_agraph()로 내보낼 때만 사용
+    """
+
+    def __init__(self):
+        self.keys = []              # 노드 ID -> 'name@version'
+        self.ids = {}               # 'name@version' -> 노드 ID
+        self.package_of = array('i')  # 노드 ID -> 패키지 ID
+        self.package_names = []     # 패키지 ID -> 패키지 이름
+        self.package_ids = {}       # 패키지 이름 -> 패키지 ID
+        self.package_members = []   # 패키지 ID -> 버전 노드 ID들 (array('i'))
+        self.package_succ = []      # 패키지 ID -> {의존하는 패키지 ID: 버전 간선 수}
+        self.package_pred = []      # 패키지 ID -> {의존받는 패키지 ID: 버전 간선 수}
+        self.succ = []              # 노드 ID -> 자식 노드 ID들 (array('i'))
+        self.edge_count = 0
+        self._csr = None
+        self._reverse_csr = None
+        self._delta = None
+
+    # ---------- 노드 ----------
+
+    def _package_id(self, name):
+        package_id = self.package_ids.get(name)
+        if package_id is None:
+            name = sys.intern(name)
+            package_id = len(self.package_names)
+            self.package_ids[name] = package_id
+            self.package_names.append(name)
+            self.package_members.append(array('i'))
+            self.package_succ.append({})
+            self.package_pred.append({})
+        return package_id
+
+    def add_node(self, key):
+        """
+        - Description: 'name@version' 노드를 추가 (이미 있으면 그대로)
+        - Input: 노드 문자열
+        - Output: 노드 ID
+        """
+        node_id = self.ids.get(key)
+        if node_id is None:
+            node_id = len(self.keys)
+            self.ids[key] = node_id
+            self.keys.append(key)
+            try:
+                name = split_key(key)[0]
+            except ValueError:
+                # 버전이 없는 노드(이전 포레스트 파일)는 문자열 전체를 패키지 이름으로 봄 (버전은 '')
+                name = key
+            package_id = self._package_id(name)
+            self.package_of.append(package_id)
+            self.package_members[package_id].append(node_id)
+            self.succ.append(array('i'))
+            self._csr = None
+            self._reverse_csr = None
+            if self._delta is not None:
+                self._delta.nodes.append(node_id)
+        return node_id
+
+    def has_node(self, key):
+        return key in self.ids
+
+    def node_id(self, key):
+        """ 노드 문자열의 ID, 없으면 None """
+        return self.ids.get(key)
+
+    def key(self, node_id):
+        return self.keys[node_id]
+
+    def package_name(self, node_id):
+        return self.package_names[self.package_of[node_id]]
+
+    def version(self, node_id):
+        return self.name_version(node_id)[1]
+
+    def name_version(self, node_id):
+        """ 노드 ID -> (패키지 이름, 버전), 버전이 없는 노드는 (노드 문자열, '') """
+        name = self.package_names[self.package_of[node_id]]
+        return name, self.keys[node_id][len(name) + 1:]
+
+    def nodes(self):
+        return list(self.keys)
+
+    def number_of_nodes(self):
+        return len(self.keys)
+
+    # ---------- 패키지 인덱스 (서브그래프 대신) ----------
+
+    def has_package(self, name):
+        return name in self.package_ids
+
+    def packages(self):
+        return list(self.package_names)
+
+    def package_nodes(self, name):
+        """ 패키지의 모든 버전 노드 ID (없으면 빈 리스트) """
+        package_id = self.package_ids.get(name)
+        if package_id is None:
+            return []
+        return list(self.package_members[package_id])
+
+    def package_id(self, name):
+        """ 패키지 이름의 ID, 없으면 None """
+        return self.package_ids.get(name)
+
+    def package_name_of(self, package_id):
+        return self.package_names[package_id]
+
+    def package_size(self, package_id):
+        """ 패키지의 버전 노드 수 """
+        return len(self.package_members[package_id])
+
+    def number_of_packages(self):
+        return len(self.package_names)
+
+    def package_successors(self, package_id):
+        """ 이 패키지(어느 버전이든)가 의존하는 패키지들 {패키지 ID: 버전 간선 수} """
+        return self.package_succ[package_id]
+
+    def package_predecessors(self, package_id):
+        """ 이 패키지(어느 버전이든)를 의존하는 패키지들 {패키지 ID: 버전 간선 수} """
+        return self.package_pred[package_id]
+
+    # ---------- 간선 ----------
+
+    def add_edge_ids(self, source_id, target_id):
+        """
+        - Description: 노드 ID 사이에 간선 추가 (중복이면 추가하지 않음)
+        - Input: upstream 노드 ID, downstream 노드 ID
+        - Output: 새로 추가됐으면 True
+        """
+        targets = self.succ[source_id]
+        if target_id in targets:
+            return False
+        targets.append(target_id)
+        self.edge_count += 1
+        self._count_package_edge(source_id, target_id, 1)
+        self._csr = None
+        self._reverse_csr = None
+        if self._delta is not None:
+            self._delta.edges.append((source_id, target_id))
+        return True
+
+    def remove_edge_ids(self, source_id, target_id):
+        """
+        - Description: 노드 ID 사이의 간선을 지움 (노드는 남겨둠, delta에는 기록되지 않음)
+        - Input: upstream 노드 ID, downstream 노드 ID
+        - Output: 지웠으면 True, 없던 간선이면 False
+        """
+        targets = self.succ[source_id]
+        if target_id not in targets:
+            return False
+        targets.remove(target_id)
+        self.edge_count -= 1
+        self._count_package_edge(source_id, target_id, -1)
+        self._csr = None
+        self._reverse_csr = None
+        return True
+
+    def remove_edge(self, source, target):
+        """ 'name@version' 문자열 사이의 간선을 지움 """
+        source_id = self.ids.get(source)
+        target_id = self.ids.get(target)
+        if source_id is None or target_id is None:
+            return False
+        return self.remove_edge_ids(source_id, target_id)
+
+    def _count_package_edge(self, source_id, target_id, step):
+        # 패키지 -> 패키지 간선 수를 버전 간선과 같이 갱신 (0이 되면 지움)
+        source_package = self.package_of[source_id]
+        target_package = self.package_of[target_id]
+        for counts, other in ((self.package_succ[source_package], target_package),
+                              (self.package_pred[target_package], source_package)):
+            count = counts.get(other, 0) + step
+            if count:
+                counts[other] = count
+            else:
+                del counts[other]
+
+    def add_edge(self, source, target):
+        """ 'name@version' 문자열 사이에 간선 추가 (노드가 없으면 만듦) """
+        return self.add_edge_ids(self.add_node(source), self.add_node(target))
+
+    def has_edge(self, source, target):
+        source_id = self.ids.get(source)
+        target_id = self.ids.get(target)
+        if source_id is None or target_id is None:
+            return False
+        return target_id in self.succ[source_id]
+
+    def successors(self, node_id):
+        return self.succ[node_id]
+
+    def predecessors(self, node_id):
+        offsets, sources = self.reverse_csr()
+        return sources[offsets[node_id]:offsets[node_id + 1]]
+
+    def number_of_edges(self):
+        return self.edge_count
+
+    def edge_ids(self):
+        """ (upstream ID, downstream ID) 간선을 하나씩 돌려주는 generator """
+        for source_id, targets in enumerate(self.succ):
+            for target_id in targets:
+                yield source_id, target_id
+
+    def edges(self):
+        keys = self.keys
+        return [(keys[source_id], keys[target_id]) for source_id, target_id in self.edge_ids()]
+
+    def in_edges(self):
+        return self.edges()
+
+    # ---------- CSR ----------
+
+    def csr(self):
+        """
+        - Description: 정방향 인접 리스트를 CSR 배열로 굳힘 (그래프가 바뀌기 전까지 캐시)
+        - Output: (offsets array('q'), targets array('i')), 노드 i의 자식은 targets[offsets[i]:offsets[i+1]]
+        """
+        if self._csr is None:
+            offsets = array('q', [0])
+            targets = array('i')
+            for node_targets in self.succ:
+                targets.extend(node_targets)
+                offsets.append(len(targets))
+            self._csr = (offsets, targets)
+        return self._csr
+
+    def reverse_csr(self):
+        """
+        - Description: 역방향(부모) 인접 리스트를 CSR 배열로 만듦 (counting sort, 그래프가 바뀌기 전까지 캐시)
+        - Output: (offsets array('q'), sources array('i')), 노드 i의 부모는 sources[offsets[i]:offsets[i+1]]
+        """
+        if self._reverse_csr is None:
+            node_count = len(self.keys)
+            counts = array('q', bytes(8 * (node_count + 1)))
+            for targets in self.succ:
+                for target_id in targets:
+                    counts[target_id + 1] += 1
+            for i in range(node_count):
+                counts[i + 1] += counts[i]
+            offsets = array('q', counts)
+            sources = array('i', bytes(4 * self.edge_count))
+            for source_id, targets in enumerate(self.succ):
+                for target_id in targets:
+                    sources[counts[target_id]] = source_id
+                    counts[target_id] += 1
+            self._reverse_csr = (offsets, sources)
+        return self._reverse_csr
+
+    # ---------- 복사 / 합치기 ----------
+
+    def copy(self):
+        graph = DepGraph()
+        graph.update(self)
+        return graph
+
+    def update(self, other):
+        """ 다른 DepGraph의 모든 노드와 간선을 이 그래프에 추가 """
+        id_map = [self.add_node(key) for key in other.keys]
+        for source_id, target_id in other.edge_ids():
+            self.add_edge_ids(id_map[source_id], id_map[target_id])
+        return self
+
+    # ---------- 변경분(delta) ----------
+
+    def begin_delta(self):
+        """ 지금부터 새로 추가되는 노드와 간선을 기록하기 시작 """
+        self._delta = ForestDelta([], [])
+
+    def current_delta(self):
+        """ 지금 기록 중인 변경분 (기록 중이 아니면 None) """
+        return self._delta
+
+    def end_delta(self):
+        """
+        - Description: 기록을 멈추고 begin_delta 이후에 추가된 변경분을 돌려줌
+        - Output: ForestDelta(nodes, edges) - 이 그래프의 노드 ID 기준
+        """
+        delta = self._delta
+        self._delta = None
+        return delta if delta is not None else ForestDelta([], [])
+
+    def delta_keys(self, delta):
+        """ ID로 기록된 변경분을 다른 그래프/파일에서도 쓸 수 있게 'name@version' 문자열로 바꿈 """
+        keys = self.keys
+        return {
+            'nodes': [keys[node_id] for node_id in delta.nodes],
+            'edges': [(keys[source_id], keys[target_id]) for source_id, target_id in delta.edges],
+        }
+
+    def apply_delta(self, delta_keys):
+        """
+        - Description: 변경분을 이 그래프에 반영, 변경분 크기만큼만 일함 (O(delta))
+        - Input: delta_keys()가 만든 {'nodes': [...], 'edges': [...]}
+        - Output: 이 그래프
+        """
+        for key in delta_keys['nodes']:
+            self.add_node(key)
+        for source, target in delta_keys['edges']:
+            self.add_edge(source, target)
+        return self
+
+    # ---------- 내보내기 ----------
+
+    def to_agraph(self):
+        """
+        - Description: 시각화를 위해 pygraphviz AGraph로 내보냄 (패키지마다 서브그래프, 그 안에 버전 노드)
+        - Output: pgv.AGraph
+        """
+        import pygraphviz as pgv
+
+        agraph = pgv.AGraph(directed=True)
+        for package_id, name in enumerate(self.package_names):
+            subgraph = agraph.add_subgraph(name=name)
+            subgraph.graph_attr['label'] = f"*{name}*"
+            for node_id in self.package_members[package_id]:
+                subgraph.add_node(self.keys[node_id])
+        for source, target in self.edges():
+            agraph.add_edge(source, target)
+        return agraph
+
+    def __str__(self):
+        return f"DepGraph({len(self.keys)} nodes, {self.edge_count} edges, {len(self.package_names)} packages)"
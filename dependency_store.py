@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import sqlite3
+import datetime
+from node_key import parse_record_filename
+
+
+class DependencyStore:
+    """
+    - Description: (패키지 이름, 버전) -> dependencies를 SQLite 파일 하나에 모아둔 저장소
+                   dependencies/, versions_new/ 폴더의 수십만 개 작은 JSON 파일을 대신함
+    - Input: db_path - 저장소 파일 경로, read_only - 조회만 할 때 (여러 프로세스가 mmap으로 같은 페이지를 공유)
+    """
+
+    def __init__(self, db_path='dependency_store.sqlite', read_only=False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.conn = None
+
+    def available(self):
+        return self.conn is not None or os.path.exists(self.db_path)
+
+    def _connect(self):
+        if self.conn is None and self.read_only:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self.conn.execute("PRAGMA mmap_size=1073741824")
+        elif self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS dependencies ("
+                " name TEXT NOT NULL,"
+                " version TEXT NOT NULL,"
+                " dependencies TEXT NOT NULL,"
+                " PRIMARY KEY (name, version)) WITHOUT ROWID"
+            )
+        return self.conn
+
+    def get(self, name, version):
+        """
+        - Description: 한 버전의 dependencies 조회
+        - Input: 패키지 이름, 버전
+        - Output: dependencies dictionary, 저장소에 없으면 None
+        """
+        row = self._connect().execute(
+            "SELECT dependencies FROM dependencies WHERE name = ? AND version = ?", (name, version)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_many(self, pairs, chunk_size=400):
+        """
+        - Description: 여러 (이름, 버전)의 dependencies를 한 번에 조회 (쿼리 하나에 chunk_size개씩)
+        - Input: (패키지 이름, 버전) 쌍들
+        - Output: {(이름, 버전): dependencies} - 저장소에 없는 쌍은 빠짐
+        """
+        pairs = list(dict.fromkeys(pairs))
+        conn = self._connect()
+        result = {}
+        for start in range(0, len(pairs), chunk_size):
+            chunk = pairs[start:start + chunk_size]
+            values = ', '.join(['(?, ?)'] * len(chunk))
+            params = [item for pair in chunk for item in pair]
+            rows = conn.execute(
+                f"SELECT name, version, dependencies FROM dependencies WHERE (name, version) IN (VALUES {values})", params
+            )
+            for name, version, dependencies in rows:
+                result[(name, version)] = json.loads(dependencies)
+        return result
+
+    def put_many(self, records, replace=True):
+        """
+        - Description: (이름, 버전, dependencies) 레코드들을 저장
+        - Input: 레코드들, replace - 이미 있는 레코드를 덮어쓸지 여부
+        - Output: 저장한 레코드 수
+        """
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        conn = self._connect()
+        count = 0
+        batch = []
+        for name, version, dependencies in records:
+            batch.append((name, version, json.dumps(dependencies, separators=(',', ':'))))
+            if len(batch) >= 10000:
+                conn.executemany(f"{verb} INTO dependencies VALUES (?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        conn.executemany(f"{verb} INTO dependencies VALUES (?, ?, ?)", batch)
+        count += len(batch)
+        conn.commit()
+        return count
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM dependencies").fetchone()[0]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def iter_dependency_files(folder):
+    """
+    - Description: 폴더의 <name>@<version>_dependencies.json 파일들을 하나씩 읽음
+    - Input: dependencies 또는 versions_new 폴더
+    - Output: (패키지 이름, 버전, dependencies)를 하나씩 돌려주는 generator
+    """
+    if not os.path.isdir(folder):
+        print(f"{folder} does not exist. Skipping.")
+        return
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            parsed = parse_record_filename(entry.name, '_dependencies.json')
+            if parsed is None:
+                continue
+            pkg_name, pkg_version = parsed
+            try:
+                with open(entry.path, 'r') as file:
+                    dependencies = json.load(file)
+            except json.JSONDecodeError as e:
+                print(f"JSON decode error in {entry.name}: {e}")
+                continue
+            yield pkg_name, pkg_version, dependencies
+
+
+def import_dependency_folders(store, dependencies_folder='./dependencies', versions_new_folder='./versions_new'):
+    """
+    - Description: 기존 폴더들을 저장소로 옮김. read_dependencies처럼 dependencies 폴더가 versions_new보다 우선
+    - Input: DependencyStore, dependencies 폴더, versions_new 폴더
+    - Output: (dependencies에서 넣은 수, versions_new에서 넣은 수)
+    """
+    from_dependencies = store.put_many(iter_dependency_files(dependencies_folder), replace=True)
+    from_versions_new = store.put_many(iter_dependency_files(versions_new_folder), replace=False)
+    return from_dependencies, from_versions_new
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'import':
+        print("Usage: python3 dependency_store.py import [store_path] [dependencies_folder] [versions_new_folder]")
+    else:
+        db_path = sys.argv[2] if len(sys.argv) > 2 else 'dependency_store.sqlite'
+        dependencies_folder = sys.argv[3] if len(sys.argv) > 3 else './dependencies'
+        versions_new_folder = sys.argv[4] if len(sys.argv) > 4 else './versions_new'
+
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        store = DependencyStore(db_path)
+        from_dependencies, from_versions_new = import_dependency_folders(store, dependencies_folder, versions_new_folder)
+        print(f"[+] {from_dependencies} records from {dependencies_folder}, {from_versions_new} records from {versions_new_folder}")
+        print(f"[+] {len(store)} records in {db_path}")
+        store.close()
+        print(f"현재 시간:", datetime.datetime.now())
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import sqlite3
+import subprocess
+from collections import deque
+from semver_resolver import build_version_list, max_satisfying
+from resolution_cache import ResolutionCache, MISS
+from version_index import VersionIndex
+from registry_client import RegistryClient
+from dependency_store import DependencyStore
+from node_key import make_key, record_filename
+
+
+def get_latest_version(version_range, all_versions, as_of=None):
+    """
+    - Description: 주어진 패키지의 종속 패키지들을 semantic versioning화
+    - Input: package.json에 있는 버전정보, npm에 올라온 모든 버전 (리스트 또는 미리 파싱된 VersionList),
+             as_of - 이 시각(epoch 초)까지 publish 된 버전 중에서만 고름 (None이면 지금 기준)
+    - Output: range를 만족하는 최신 버전, 없으면 None
+    """
+    # Node.js 프로세스 대신 semver_resolver에서 semver.maxSatisfying과 같은 규칙으로 계산
+    # as_of를 주면 Destfying 논문처럼 그 시점에 설치됐을 버전으로 해석 (버전 리스트의 publish 시각 배열 사용)
+    latest_version = max_satisfying(all_versions, version_range, as_of)
+    print(f"[+] latest_version: {latest_version}")
+    return latest_version
+
+
+class ForestBuilder:
+    """
+    - Description: 포레스트를 만들고 고칠 때 쓰는 의존성 해석 (버전 인덱스, resolution cache, dependency store, registry)과
+                   BFS 확장을 묶은 클래스
+                   make_forest_and_save.py, forest_update.py, range_graph.py가 같이 씀 (모듈을 import 해도 파일이나 연결을 만들지 않음)
+    - Input: version_index_path - 버전 인덱스 (python3 version_index.py), resolution_cache_path - resolution cache 파일,
+             dependency_store_path - dependency store (python3 dependency_store.py import), registry - 인덱스에 없는 패키지를 물어볼 registry,
+             offline_mode - True면 인덱스에 없는 패키지도 registry에 묻지 않음,
+             resolve_as_of - 이 시각(epoch 초)까지 publish 된 버전으로만 range를 해석 (None이면 지금 기준)
+    """
+
+    def __init__(self, version_index_path='version_index.sqlite', resolution_cache_path='resolution_cache.sqlite',
+                 dependency_store_path='dependency_store.sqlite', registry='https://registry.npmjs.org',
+                 offline_mode=False, resolve_as_of=None):
+        # 패키지 이름 -> 정렬된 버전 리스트 (versions 폴더로 미리 만든 오프라인 인덱스)
+        self.version_index = VersionIndex(version_index_path)
+        self.offline_mode = offline_mode
+        self.resolve_as_of = resolve_as_of
+        # 인덱스에 없는 패키지의 버전 목록은 npm CLI 대신 registry에 직접 요청
+        self.registry_client = RegistryClient(registry)
+        # (패키지 이름, 버전 range) -> 해석된 버전 (재시작해도 유지되는 캐시)
+        self.resolution_cache = ResolutionCache(resolution_cache_path, './versions', version_index=self.version_index)
+        # (패키지 이름, 버전) -> dependencies (dependencies/, versions_new/ 폴더를 합친 저장소)
+        self.dependency_store = DependencyStore(dependency_store_path, read_only=True)
+        # BFS 한 단계의 frontier 전체를 get_many로 미리 읽어둔 dependencies
+        self.prefetched_dependencies = {}
+        # 끝난 루트와 BFS frontier를 기록하는 체크포인트 (make_forest_and_save.py의 main에서 넣음)
+        self.checkpoint = None
+        # depth 제한 BFS의 상태 (_depth_state 참고)
+        self.depth_graph = None
+        self.node_depths = {}
+        self.expanded_nodes = set()
+
+    def read_dependencies(self, pkg_name, pkg_version):
+        """
+        - Description: 저장된 dependencies 정보 읽기
+                       dependency store가 있으면 store에서 읽고 (store에 없는 버전은 의존성이 없는 것으로 봄),
+                       없으면 dependencies 폴더, versions_new 폴더의 JSON 파일에서 읽음
+        - Input: 의존성을 알고싶은 패키지 이름과 버전
+        - Output: 의존성 정보
+        """
+        if (pkg_name, pkg_version) in self.prefetched_dependencies:
+            return self.prefetched_dependencies.pop((pkg_name, pkg_version))
+        if self.dependency_store.available():
+            dependencies = self.dependency_store.get(pkg_name, pkg_version)
+            if dependencies is None:
+                print(f"Dependencies not found in dependency store for {pkg_name}@{pkg_version}")
+                return {}
+            return dependencies
+
+        # 첫 번째 폴더(dependencies)에서 파일을 찾기
+        filename = record_filename(pkg_name, pkg_version, '_dependencies.json')
+        file_path = os.path.join('dependencies', filename)
+
+        # 파일이 없으면 두 번째 폴더(versions_new)에서 검색
+        if not os.path.exists(file_path):
+            print(f"Dependencies file not found in dependencies folder for {pkg_name}@{pkg_version}. \nSearching in versions_new folder...")
+            file_path = os.path.join('versions_new', filename)
+
+        # 최종적으로 파일이 존재하는지 확인하고 읽기
+        try:
+            with open(file_path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            print(f"Dependencies file not found in both folders for {pkg_name}@{pkg_version}")
+            return {}
+        except json.JSONDecodeError as e:
+            print(f"JSON decode error: {e}")
+            return {}
+
+    def get_version_list(self, name):
+        """
+        - Description: 패키지의 모든 버전을 오프라인 인덱스에서 가져옴 (이진 탐색용 정렬된 VersionList)
+                       인덱스에 없는 패키지만 npm view로 가져오고 그 횟수를 셈
+        - Input: 패키지 이름
+        - Output: VersionList
+        """
+        version_list = self.version_index.get(name)
+        if version_list is None:
+            if self.offline_mode:
+                # 인덱스에 추가하지 않음 (resolution cache가 이 결과를 파일에 남기지 않도록 지문 없이 둠)
+                print(f"[!] {name} is not in the version index (offline mode)")
+                return build_version_list([])
+            else:
+                self.version_index.record_fallback(name)
+                # npm view <name> versions --json과 같은 결과를 registry에서 직접 가져오기
+                dep_result = self.registry_client.view([name, 'versions', '--json'])
+                times = None
+                if self.resolve_as_of is not None:
+                    # as-of 해석에는 npm view <name> time --json의 publish 시각도 필요
+                    time_result = self.registry_client.view([name, 'time', '--json'])
+                    times = json.loads(time_result) if time_result else {}
+                if not dep_result:
+                    # registry에서도 가져오지 못함, offline miss와 같이 지문 없이 둠 (다음 실행에서 다시 가져옴)
+                    return build_version_list([])
+                version_list = build_version_list(json.loads(dep_result), times)
+            self.version_index.add(name, version_list)
+        return version_list
+
+    def get_onewalk_dep(self, g, pkg_name, pkg_version, working):
+        """
+        - Description: 주어진 패키지의 종속 패키지들을 확인 + 정규화
+        - Input: 지금까지 만든 graph, 검사하고 싶은 패키지 이름, 버전
+        - Output: 'name: version (json)' 형식으로 만들어진 dictionary 
+        """
+
+        print(f"+++++ get_onewalk_dep for {pkg_name}")
+        dep_dict = {}
+        try:
+            dep_result = self.read_dependencies(pkg_name, pkg_version)
+            print(f"+++++ dep_result: {dep_result}")
+            # view 한 의존성 저장
+            dep_dict = dep_result
+
+        except subprocess.CalledProcessError as e:
+            print(f"Error occurred while fetching dependencies for {pkg_name}: {e}")
+            return g, working, dep_dict
+
+        except json.JSONDecodeError as e:
+            # 다음 디펜던시가 없어서 발생
+            print(f"JSON decode error: {e}")
+            return g, working, dep_dict
+
+        # 결과값 없으면 탈출
+        if not isinstance(dep_dict, dict):
+            #print(f"[-] get_onewalk_dep(): No dependencies for {pkg_name}.")
+            return g, working, dep_dict
+
+        for name, version_range in dep_dict.items():
+            dep_dict[name] = self.resolve_range(name, version_range)
+
+        return g, working, dep_dict
+
+    def resolve_range(self, name, version_range):
+        """
+        - Description: 의존성 range 하나를 실제 버전으로 해석 (resolution cache -> 버전 인덱스 -> registry 순서)
+                       resolve_as_of가 있으면 그 시각까지 publish 된 버전 중 최신 버전으로 해석
+        - Input: 의존하는 패키지 이름, package.json에 있는 버전 range
+        - Output: range를 만족하는 최신 버전, 없거나 가져오지 못하면 "0.0.0"
+        """
+        try:
+            # 같은 (name, range, as_of)는 이전에 해석한 결과를 재사용
+            try:
+                latest_version = self.resolution_cache.get(name, version_range, self.resolve_as_of)
+            except sqlite3.OperationalError as e:
+                # 다른 워커가 캐시 파일을 잠그고 있으면 캐시에 없는 것으로 보고 직접 해석
+                print(f"[!] resolution cache read failed for {name}: {e}")
+                latest_version = MISS
+            if latest_version is MISS:
+                start_time = time.perf_counter()
+                # 패키지별로 한 번만 가져와서 파싱한 버전 리스트
+                all_versions = self.get_version_list(name)
+
+                # 최신 버전 가져오기
+                latest_version = get_latest_version(version_range, all_versions, self.resolve_as_of)
+                self.resolution_cache.put(name, version_range, latest_version, time.perf_counter() - start_time, self.resolve_as_of)
+
+            if latest_version:
+                return latest_version
+            return "0.0.0"
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error occurred while fetching versions for {name}: {e}")
+            return "0.0.0"
+        except json.JSONDecodeError as e:
+            print(f"JSON decode error: {e}")
+            return "0.0.0"
+
+    def make_subgraph(self, g, pkg_name, pkg_version, working, dep_dict):
+        """
+        - Description: pkg_name의 의존성 노드와 엣지를 그래프에 추가하고 working 리스트 업데이트
+        - Input: 전체 그래프 g(DepGraph), upstream 패키지 이름, 버전, 
+        - Output:
+        ** upstream 정보: 'pkg_name@pkg_version'
+        ** downstream 정보: 'name@version'
+
+        """ 
+
+
+        upstream_str = make_key(pkg_name, pkg_version)
+        upstream_id = g.node_id(upstream_str)
+
+        for name, version in dep_dict.items():
+            #정규표현화된 버전정보를 working 리스트에 저장
+            downstream_str = make_key(name, version)
+            #새로운 노드를 만들기전 이미 있는 노드인지 아닌지 확인 (패키지 인덱스가 서브그래프 역할)
+            if g.has_node(downstream_str): # <-특정패키지 O, and 특정버전 O!!!
+                print(f"Subgraph node '{version} of {name}' already exists.")
+                # 얘는 특정 패키지의 특정 버전이 있는 경우임..! 엣지만 만든다면 여기서 사이클을 막을 수있음!! 얘만 암것두 안하고 다음 for문으로 넘어가는 방식으로 해결함
+            else:
+                if not g.has_package(name):
+                    #이 패키지 이름으로 만들어진 노드가 없음 = 처음 나온 패키지라는 뜻!
+                    print(f"Subgraph {name} does not exist.")
+                # 패키지 name이 인덱스의 키가 되고, 'name@version'이 노드의 이름이 된다.
+                g.add_node(downstream_str)
+                working.append(downstream_str)
+
+            #노드는 있어도 자식노드와 연결시키는 엣지는 없을 수 있음
+            if upstream_id is not None:
+                g.add_edge_ids(upstream_id, g.node_id(downstream_str))
+
+        return g, working
+
+    def prefetch_dependencies(self, g, frontier):
+        """
+        - Description: frontier에 있는 노드들의 dependencies를 dependency store에서 한 번에 읽어둠
+        - Input: 그래프 g, 이번 단계에서 펼칠 노드 ID들
+        - Output: 없음 (prefetched_dependencies에 저장, store에 없는 버전은 빈 dictionary)
+        """
+        if not self.dependency_store.available():
+            return
+        pairs = [g.name_version(node_id) for node_id in frontier]
+        found = self.dependency_store.get_many(pairs)
+        for pair in pairs:
+            self.prefetched_dependencies[pair] = found.get(pair, {})
+
+    def process_package(self, g, working, max_depth=None, start_depth=0):
+        """
+        Description: 주어진 패키지(package_name)의 종속되어있는 패키지 정보를
+        그래프 g에 노드, 간선 형태로 반복 업데이트
+        재귀 대신 deque 작업 큐로 한 depth씩 BFS 하고, 방문한 노드는 노드 ID 집합으로 관리
+        max_depth가 있으면 같은 g의 모든 루트에 걸쳐 노드별로 가장 얕은 depth를 기억해서,
+        앞 루트에서 depth 한계에 걸려 펼치지 못한 노드를 뒤 루트가 더 얕게 만나면 다시 펼침 (루트 순서와 상관없는 결과)
+        체크포인트가 있으면 한 단계가 끝날 때마다 새 노드/엣지와 다음 frontier를 journal에 남김
+        - Input: g, 시작 노드('name@version') 리스트, max_depth - 몇 단계까지 의존성을 펼칠지 (None이면 끝까지),
+                 start_depth - working의 depth (체크포인트에서 이어갈 때)
+        - Output: 업데이트된 그래프 g
+        """
+        frontier = deque(g.add_node(package_str) for package_str in working)
+        visited = set(frontier)
+        depth = start_depth
+        if max_depth is not None:
+            depths, expanded = self._depth_state(g)
+            for node_id in frontier:
+                depths[node_id] = min(depths.get(node_id, start_depth), start_depth)
+
+        while frontier:
+            if max_depth is not None and depth >= max_depth:
+                print(f"[+] depth limit {max_depth} reached, {len(frontier)} nodes left unexpanded")
+                break
+
+            level_start = time.perf_counter()
+            nodes_before = g.number_of_nodes()
+            edges_before = g.number_of_edges()
+            frontier_size = len(frontier)
+            next_frontier = deque()
+            if max_depth is None:
+                self.prefetch_dependencies(g, frontier)
+            else:
+                self.prefetch_dependencies(g, [node_id for node_id in frontier if node_id not in expanded])
+
+            while frontier:
+                node_id = frontier.popleft()
+
+                if max_depth is None:
+                    package_name, package_version = g.name_version(node_id)
+                    g, new_working, dep_dict = self.get_onewalk_dep(g, package_name, package_version, [])
+                    g, new_working = self.make_subgraph(g, package_name, package_version, new_working, dep_dict)
+
+                    for package_str in new_working:
+                        child_id = g.node_id(package_str)
+                        if child_id not in visited:
+                            visited.add(child_id)
+                            next_frontier.append(child_id)
+                    continue
+
+                if node_id not in expanded:
+                    package_name, package_version = g.name_version(node_id)
+                    g, new_working, dep_dict = self.get_onewalk_dep(g, package_name, package_version, [])
+                    g, new_working = self.make_subgraph(g, package_name, package_version, new_working, dep_dict)
+                    expanded.add(node_id)
+                # 이미 펼친 노드는 다시 읽지 않고 있는 간선으로 더 얕아진 depth만 자식에게 전달
+                for child_id in g.successors(node_id):
+                    if depth + 1 < depths.get(child_id, max_depth + 1):
+                        depths[child_id] = depth + 1
+                        next_frontier.append(child_id)
+
+            elapsed = max(time.perf_counter() - level_start, 1e-9)
+            new_nodes = g.number_of_nodes() - nodes_before
+            new_edges = g.number_of_edges() - edges_before
+            print(f"[+] depth {depth}: frontier {frontier_size}, +{new_nodes} nodes, +{new_edges} edges, "
+                  f"{new_nodes / elapsed:.1f} nodes/sec, {new_edges / elapsed:.1f} edges/sec")
+
+            frontier = next_frontier
+            depth += 1
+            if self.checkpoint is not None:
+                self.checkpoint.record_level(g, depth, frontier)
+
+        return g
+
+    def _depth_state(self, g):
+        """
+        - Description: depth 제한 BFS에서 g의 노드별 가장 얕은 depth와 이미 펼친 노드 집합 (g가 바뀌면 새로 시작)
+                       체크포인트에서 이어갈 때는 비어있으므로 이미 있는 노드도 한 번 더 읽어서 펼침
+        - Input: 그래프 g
+        - Output: (노드 ID -> depth dictionary, 펼친 노드 ID 집합)
+        """
+        if self.depth_graph is not g:
+            self.depth_graph = g
+            self.node_depths = {}
+            self.expanded_nodes = set()
+        return self.node_depths, self.expanded_nodes
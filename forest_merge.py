@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import datetime
+from array import array
+from multiprocessing import Pool
+from dep_graph import DepGraph
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _StreamReader:
+    """ 파일을 chunk 단위로 읽으면서 JSON 값을 하나씩 raw_decode 하는 버퍼 (이미 읽은 부분은 버림) """
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """ 공백을 건너뛰고 다음 글자를 돌려줌 (파일 끝이면 '') """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.position}")
+        self.position += 1
+
+    def decode(self):
+        """ 다음 JSON 값 하나를 읽음 (버퍼 끝에서 잘린 값이면 더 읽고 다시 시도) """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _iter_json_forest(file, chunk_size):
+    # {"nodes": [...], "edges": [...]} 를 통째로 올리지 않고 원소 하나씩 꺼냄
+    reader = _StreamReader(file, chunk_size)
+    reader.expect('{')
+    while True:
+        char = reader.peek()
+        if char == '}':
+            return
+        if char == ',':
+            reader.position += 1
+            continue
+        field = reader.decode()
+        reader.expect(':')
+        if field in ('nodes', 'edges') and reader.peek() == '[':
+            reader.position += 1
+            while True:
+                char = reader.peek()
+                if char == ']':
+                    reader.position += 1
+                    break
+                if char == ',':
+                    reader.position += 1
+                    continue
+                item = reader.decode()
+                if field == 'nodes':
+                    yield 'node', item
+                else:
+                    yield 'edge', (item[0], item[1])
+        else:
+            reader.decode()
+
+
+def iter_partial_forest(path, chunk_size=1 << 20):
+    """
+    - Description: partial forest 파일을 한 번에 json.load 하지 않고 노드/엣지를 하나씩 읽음
+                   .json은 {"nodes": [...], "edges": [...]}를 조금씩 파싱하고,
+                   .ndjson/.jsonl은 한 줄에 노드 문자열 하나 또는 [upstream, downstream] 엣지 하나
+    - Input: 파일 경로, 한 번에 읽을 글자 수
+    - Output: ('node', 'name@version') 또는 ('edge', (upstream, downstream))를 하나씩 돌려주는 generator
+    """
+    with open(path, 'r') as file:
+        if path.endswith(('.ndjson', '.jsonl')):
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                if isinstance(item, str):
+                    yield 'node', item
+                else:
+                    yield 'edge', (item[0], item[1])
+        else:
+            yield from _iter_json_forest(file, chunk_size)
+
+
+def save_partial_forest_ndjson(g, path):
+    """
+    - Description: 그래프를 줄 단위(NDJSON) partial forest로 저장 (노드 먼저, 그 다음 엣지)
+    - Input: DepGraph, 저장할 파일 경로
+    - Output: 없음
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        for key in g.keys:
+            file.write(json.dumps(key) + '\n')
+        for source, target in g.edges():
+            file.write(json.dumps([source, target]) + '\n')
+    os.replace(tmp_path, path)
+
+
+def find_partial_forests(directory):
+    """ 디렉토리에서 이름에 'partial_forest'가 들어간 .json/.ndjson/.jsonl 파일들 (이름 순) """
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if 'partial_forest' in filename and filename.endswith(('.json', '.ndjson', '.jsonl'))]
+
+
+def merge_into(g, paths):
+    """
+    - Description: partial forest 파일들을 차례로 스트리밍해서 g에 합침
+                   노드는 DepGraph의 문자열 -> ID 인덱스로, 엣지는 ID 쌍으로 중복을 걸러냄
+    - Input: DepGraph, 파일 경로들
+    - Output: g
+    """
+    for path in paths:
+        print(f"Loading {path}")
+        for kind, item in iter_partial_forest(path):
+            if kind == 'node':
+                g.add_node(item)
+            else:
+                g.add_edge(item[0], item[1])
+    return g
+
+
+def _merge_worker(paths):
+    # 워커 프로세스: 맡은 파일들을 합친 뒤 문자열 테이블과 CSR 배열만 돌려보냄
+    g = merge_into(DepGraph(), paths)
+    offsets, targets = g.csr()
+    return g.keys, offsets.tobytes(), targets.tobytes()
+
+
+def _reduce(g, keys, offsets_bytes, targets_bytes):
+    offsets = array('q')
+    offsets.frombytes(offsets_bytes)
+    targets = array('i')
+    targets.frombytes(targets_bytes)
+    id_map = [g.add_node(key) for key in keys]
+    for source_id in range(len(keys)):
+        mapped_source = id_map[source_id]
+        for target_id in targets[offsets[source_id]:offsets[source_id + 1]]:
+            g.add_edge_ids(mapped_source, id_map[target_id])
+
+
+def merge_partial_forests(paths, g=None, workers=1):
+    """
+    - Description: partial forest 파일 N개를 하나의 그래프로 합침
+                   workers > 1이면 파일들을 워커 프로세스에 나눠서 각자 합친 다음, 결과를 하나씩 g에 reduce
+    - Input: 파일 경로들, 합칠 그래프 (None이면 새로 만듦), 워커 프로세스 수
+    - Output: 합쳐진 DepGraph
+    """
+    if g is None:
+        g = DepGraph()
+    paths = list(paths)
+    if workers <= 1 or len(paths) <= 1:
+        return merge_into(g, paths)
+
+    groups = [paths[start::workers] for start in range(min(workers, len(paths)))]
+    with Pool(len(groups)) as pool:
+        for keys, offsets_bytes, targets_bytes in pool.imap_unordered(_merge_worker, groups):
+            _reduce(g, keys, offsets_bytes, targets_bytes)
+    return g
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    workers = 1
+    for option in options:
+        if option.startswith('--workers='):
+            workers = int(option.split('=', 1)[1])
+
+    if len(args) < 2:
+        print("Usage: python3 forest_merge.py partial_forest_directory output.json [--workers=N]\n"
+              " This code merges every *partial_forest* file in the directory into one forest")
+    else:
+        from forest_snapshot import write_snapshot
+
+        directory, output_path = args[0], args[1]
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        g = merge_partial_forests(find_partial_forests(directory), workers=workers)
+        if output_path.endswith('.snapshot'):
+            write_snapshot(g, output_path)
+        else:
+            with open(output_path, 'w') as f:
+                json.dump({'nodes': g.nodes(), 'edges': g.edges()}, f)
+        print(f"[+] {g} saved to {output_path}")
+        print(f"현재 시간:", datetime.datetime.now())
@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import datetime
+from collections import deque, namedtuple
+from multiprocessing import Process
+from xml.sax.saxutils import escape, quoteattr
+from dep_graph import DepGraph
+from forest_snapshot import ForestSnapshot
+
+
+# 그릴 부분 그래프: 노드 이름들, 노드 라벨들, (노드 인덱스, 노드 인덱스, 간선 수) 간선들, 예산 때문에 빠진 노드/간선 수
+RenderView = namedtuple('RenderView', ['nodes', 'labels', 'edges', 'dropped_nodes', 'dropped_edges'])
+
+# 노드가 이보다 많으면 dot 대신 sfdp로 레이아웃 (dot은 수천 노드부터 몇 시간씩 걸림)
+DOT_NODE_LIMIT = 2000
+
+# 한 번에 그릴 기본 노드/간선 수 (넘으면 루트에서 BFS로 닿는 순서대로 자름)
+DEFAULT_MAX_NODES = 5000
+DEFAULT_MAX_EDGES = 20000
+
+
+def open_forest(forest_path):
+    """ .snapshot이면 mmap으로 복사 없이 열고, 아니면 {'nodes', 'edges'} JSON을 DepGraph로 읽음 """
+    if forest_path.endswith('.snapshot'):
+        return ForestSnapshot(forest_path)
+    with open(forest_path, 'r') as file:
+        data = json.load(file)
+    g = DepGraph()
+    for node in data.get('nodes', []):
+        g.add_node(node)
+    for source, target in data.get('edges', []):
+        g.add_edge(source, target)
+    return g
+
+
+def package_graph(g):
+    """
+    - Description: 패키지의 버전 노드들을 노드 하나로 합친 패키지 단위 그래프를 만듦
+                   같은 두 패키지 사이의 버전 간선들은 간선 하나(간선 수 = weight)로, 패키지 안의 간선은 버림
+                   그래프가 들고 있는 패키지 -> 패키지 간선 수를 그대로 쓰므로 버전 간선은 훑지 않음
+    - Input: DepGraph 또는 ForestSnapshot
+    - Output: (패키지 이름 리스트, 패키지별 버전 수 리스트, {(패키지 인덱스, 패키지 인덱스): 간선 수})
+    """
+    package_count = g.number_of_packages()
+    names = [g.package_name_of(package_id) for package_id in range(package_count)]
+    counts = [g.package_size(package_id) for package_id in range(package_count)]
+    weights = {}
+    for source in range(package_count):
+        for target, weight in g.package_successors(source).items():
+            if source != target:
+                weights[(source, target)] = weight
+    return names, counts, weights
+
+
+def _select_nodes(node_count, successors, has_parent, max_nodes):
+    # 부모가 없는 노드(루트)부터 BFS로 닿는 순서대로 max_nodes개를 고름 (사이클만 남으면 남은 노드에서 다시 시작)
+    selected = []
+    seen = set()
+    starts = [node_id for node_id in range(node_count) if not has_parent(node_id)]
+    starts.extend(range(node_count))
+    for start in starts:
+        if len(selected) >= max_nodes:
+            break
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue and len(selected) < max_nodes:
+            node_id = queue.popleft()
+            selected.append(node_id)
+            for child_id in successors(node_id):
+                if child_id not in seen:
+                    seen.add(child_id)
+                    queue.append(child_id)
+    return selected
+
+
+def render_view(g, collapse=False, max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES):
+    """
+    - Description: 포레스트에서 실제로 그릴 부분 그래프를 고름
+                   collapse면 패키지마다 노드 하나로 합치고, 노드/간선 예산을 넘으면 루트에서 가까운 것부터 남김
+    - Input: DepGraph 또는 ForestSnapshot, collapse - 패키지 단위로 합칠지, max_nodes / max_edges - 예산 (None이면 제한 없음)
+    - Output: RenderView
+    """
+    if collapse:
+        names, counts, weights = package_graph(g)
+        children = [[] for _ in names]
+        has_parent = [False] * len(names)
+        for (source, target), weight in weights.items():
+            children[source].append((target, weight))
+            has_parent[target] = True
+        node_count = len(names)
+        total_edges = len(weights)
+        successors = lambda node_id: [target for target, _ in children[node_id]]
+        out_edges = lambda node_id: children[node_id]
+        node_name = names.__getitem__
+        node_label = lambda node_id: f"{names[node_id]}\n{counts[node_id]} versions"
+        parent_of = has_parent.__getitem__
+    else:
+        node_count = g.number_of_nodes()
+        total_edges = g.number_of_edges()
+        successors = g.successors
+        out_edges = lambda node_id: [(target, 1) for target in g.successors(node_id)]
+        node_name = g.key
+        node_label = g.key
+        parent_of = lambda node_id: len(g.predecessors(node_id)) > 0
+
+    if max_nodes is None or node_count <= max_nodes:
+        selected = list(range(node_count))
+    else:
+        selected = _select_nodes(node_count, successors, parent_of, max_nodes)
+    position = {node_id: index for index, node_id in enumerate(selected)}
+
+    edges = []
+    for node_id in selected:
+        if max_edges is not None and len(edges) >= max_edges:
+            break
+        for target, weight in out_edges(node_id):
+            if target in position:
+                edges.append((position[node_id], position[target], weight))
+    if max_edges is not None:
+        del edges[max_edges:]
+
+    return RenderView([node_name(node_id) for node_id in selected], [node_label(node_id) for node_id in selected],
+                      edges, node_count - len(selected), total_edges - len(edges))
+
+
+def choose_engine(node_count, engine='auto'):
+    """ engine이 auto면 노드 수로 레이아웃 엔진을 고름 (작으면 dot, 크면 sfdp) """
+    if engine != 'auto':
+        return engine
+    return 'dot' if node_count <= DOT_NODE_LIMIT else 'sfdp'
+
+
+def draw_view(view, output_path, engine='auto'):
+    """
+    - Description: RenderView를 Graphviz로 레이아웃해서 파일로 그림 (pdf, svg, png 등은 확장자로 결정)
+    - Input: RenderView, 출력 파일 경로, 레이아웃 엔진 (dot, sfdp, auto)
+    - Output: 그렸으면 True
+    """
+    try:
+        import pygraphviz as pgv
+    except ImportError:
+        print(f"[!] pygraphviz is not installed, skipping {output_path}")
+        return False
+
+    engine = choose_engine(len(view.nodes), engine)
+    agraph = pgv.AGraph(directed=True)
+    if engine == 'sfdp':
+        # 큰 그래프에서 겹침 제거와 곡선 간선 계산이 레이아웃 시간 대부분을 차지하므로 가볍게 설정
+        agraph.graph_attr.update(overlap='prism', splines='false', outputorder='edgesfirst')
+        agraph.node_attr.update(shape='point')
+    for name, label in zip(view.nodes, view.labels):
+        agraph.add_node(name, label=label)
+    for source, target, weight in view.edges:
+        if weight > 1:
+            agraph.add_edge(view.nodes[source], view.nodes[target], weight=weight, label=str(weight))
+        else:
+            agraph.add_edge(view.nodes[source], view.nodes[target])
+    if view.dropped_nodes or view.dropped_edges:
+        agraph.graph_attr['label'] = f"{view.dropped_nodes} nodes and {view.dropped_edges} edges not shown"
+    agraph.layout(prog=engine)
+    agraph.draw(output_path)
+    print(f"[+] {output_path}: {len(view.nodes)} nodes, {len(view.edges)} edges drawn with {engine}")
+    return True
+
+
+def render_graph(g, output_path, engine='auto', collapse=False, max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES):
+    """ 포레스트를 예산 안에서 골라서 바로 그림 (끝날 때까지 기다림) """
+    view = render_view(g, collapse, max_nodes, max_edges)
+    if view.dropped_nodes or view.dropped_edges:
+        print(f"[!] render budget: {view.dropped_nodes} nodes and {view.dropped_edges} edges left out of {output_path}")
+    return draw_view(view, output_path, engine)
+
+
+def render_in_background(g, output_path, engine='auto', collapse=False, max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES):
+    """
+    - Description: 그릴 부분 그래프만 지금 고르고, 레이아웃과 그리기는 다른 프로세스에서 함 (다음 단계를 막지 않음)
+    - Input: render_graph와 같음
+    - Output: 시작한 multiprocessing.Process (끝날 때 join)
+    """
+    view = render_view(g, collapse, max_nodes, max_edges)
+    if view.dropped_nodes or view.dropped_edges:
+        print(f"[!] render budget: {view.dropped_nodes} nodes and {view.dropped_edges} edges left out of {output_path}")
+    process = Process(target=draw_view, args=(view, output_path, engine))
+    process.start()
+    print(f"[+] rendering {output_path} in background (pid {process.pid})")
+    return process
+
+
+# ---------- 레이아웃 없이 스트리밍으로 내보내기 ----------
+
+def _export_items(g, collapse):
+    # (노드 인덱스, 노드 이름, 패키지 이름, 버전 수) generator와 (노드 인덱스, 노드 인덱스, 간선 수) generator
+    if collapse:
+        names, counts, weights = package_graph(g)
+        nodes = ((index, name, name, counts[index]) for index, name in enumerate(names))
+        edges = ((source, target, weight) for (source, target), weight in weights.items())
+    else:
+        nodes = ((node_id, g.key(node_id), g.package_name(node_id), 1) for node_id in range(g.number_of_nodes()))
+        edges = ((source_id, target_id, 1) for source_id, target_id in g.edge_ids())
+    return nodes, edges
+
+
+def _dot_quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def _write_graphml(file, nodes, edges):
+    file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+               '  <key id="name" for="node" attr.name="name" attr.type="string"/>\n'
+               '  <key id="package" for="node" attr.name="package" attr.type="string"/>\n'
+               '  <key id="versions" for="node" attr.name="versions" attr.type="int"/>\n'
+               '  <key id="weight" for="edge" attr.name="weight" attr.type="int"/>\n'
+               '  <graph id="forest" edgedefault="directed">\n')
+    for index, name, package, versions in nodes:
+        file.write(f'    <node id="n{index}"><data key="name">{escape(name)}</data>'
+                   f'<data key="package">{escape(package)}</data><data key="versions">{versions}</data></node>\n')
+    for source, target, weight in edges:
+        file.write(f'    <edge source="n{source}" target="n{target}"><data key="weight">{weight}</data></edge>\n')
+    file.write('  </graph>\n</graphml>\n')
+
+
+def _write_gexf(file, nodes, edges):
+    file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<gexf xmlns="http://gexf.net/1.3" version="1.3">\n'
+               '  <graph defaultedgetype="directed">\n'
+               '    <attributes class="node">\n'
+               '      <attribute id="0" title="package" type="string"/>\n'
+               '      <attribute id="1" title="versions" type="integer"/>\n'
+               '    </attributes>\n'
+               '    <nodes>\n')
+    for index, name, package, versions in nodes:
+        file.write(f'      <node id="{index}" label={quoteattr(name)}><attvalues>'
+                   f'<attvalue for="0" value={quoteattr(package)}/><attvalue for="1" value="{versions}"/></attvalues></node>\n')
+    file.write('    </nodes>\n    <edges>\n')
+    for edge_id, (source, target, weight) in enumerate(edges):
+        file.write(f'      <edge id="{edge_id}" source="{source}" target="{target}" weight="{weight}"/>\n')
+    file.write('    </edges>\n  </graph>\n</gexf>\n')
+
+
+def _write_dot(file, nodes, edges):
+    file.write('digraph forest {\n')
+    for index, name, _, versions in nodes:
+        label = f"{name}\n{versions} versions" if versions > 1 else name
+        file.write(f'  n{index} [label={_dot_quote(label)}];\n')
+    for source, target, weight in edges:
+        file.write(f'  n{source} -> n{target}' + (f' [weight={weight}, label="{weight}"]' if weight > 1 else '') + ';\n')
+    file.write('}\n')
+
+
+EXPORT_WRITERS = {'.graphml': _write_graphml, '.gexf': _write_gexf, '.dot': _write_dot, '.gv': _write_dot}
+
+
+def export_graph(g, output_path, collapse=False):
+    """
+    - Description: 레이아웃 없이 노드와 간선을 한 줄씩 써서 GraphML / GEXF / DOT 파일로 내보냄 (확장자로 결정)
+                   포레스트 전체를 문자열로 만들지 않으므로 Gephi, Cytoscape 등에서 열 큰 파일도 메모리가 일정함
+    - Input: DepGraph 또는 ForestSnapshot, 출력 파일 경로, collapse - 패키지 단위로 합칠지
+    - Output: 없음 (임시 파일에 쓴 뒤 교체)
+    """
+    writer = EXPORT_WRITERS.get(os.path.splitext(output_path)[1].lower())
+    if writer is None:
+        raise ValueError(f"unsupported export format: {output_path} (use {', '.join(EXPORT_WRITERS)})")
+    nodes, edges = _export_items(g, collapse)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        writer(file, nodes, edges)
+    os.replace(tmp_path, output_path)
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    # --collapse: 패키지마다 노드 하나, --engine=dot|sfdp|auto, --max-nodes=N / --max-edges=N: 그릴 예산 (0이면 제한 없음)
+    engine = 'auto'
+    max_nodes = DEFAULT_MAX_NODES
+    max_edges = DEFAULT_MAX_EDGES
+    for option in options:
+        if option.startswith('--engine='):
+            engine = option.split('=', 1)[1]
+        elif option.startswith('--max-nodes='):
+            max_nodes = int(option.split('=', 1)[1]) or None
+        elif option.startswith('--max-edges='):
+            max_edges = int(option.split('=', 1)[1]) or None
+    collapse = '--collapse' in options
+
+    if len(args) != 2:
+        print("Usage: python3 forest_render.py forest(.json|.snapshot) output(.pdf|.svg|.png|.graphml|.gexf|.dot) "
+              "[--collapse] [--engine=dot|sfdp|auto] [--max-nodes=N] [--max-edges=N]\n"
+              " .graphml/.gexf/.dot are streamed without a layout pass, other formats are drawn with Graphviz")
+    else:
+        forest_path, output_path = args
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        g = open_forest(forest_path)
+        print(f"[+] loaded {g}")
+        if os.path.splitext(output_path)[1].lower() in EXPORT_WRITERS:
+            export_graph(g, output_path, collapse)
+            print(f"[+] exported to {output_path}")
+        else:
+            render_graph(g, output_path, engine, collapse, max_nodes, max_edges)
+        if isinstance(g, ForestSnapshot):
+            g.close()
+        print(f"현재 시간:", datetime.datetime.now())
@@ -0,0 +1,315 @@
+import sys
+import time
+import datetime
+from array import array
+from collections import deque
+from forest_render import open_forest
+from forest_snapshot import ForestSnapshot
+from node_key import key_name
+
+
+def strongly_connected_components(node_count, offsets, targets):
+    """
+    - Description: 정방향 CSR에서 Tarjan 알고리즘으로 SCC를 구함 (재귀 대신 작업 스택이라 긴 의존성 사슬에서도 안전)
+    - Input: 노드 수, CSR offsets, targets
+    - Output: (노드 ID -> 컴포넌트 번호 array('i'), 컴포넌트 수)
+              컴포넌트 번호는 끝난 순서라서, 의존받는 쪽(downstream)이 먼저 끝나 작은 번호를 받음
+    """
+    index = array('i', [-1]) * node_count
+    low = array('i', [0]) * node_count
+    on_stack = bytearray(node_count)
+    component_of = array('i', [-1]) * node_count
+    stack = []
+    counter = 0
+    components = 0
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [[root, offsets[root]]]
+        while work:
+            frame = work[-1]
+            node, edge = frame
+            if edge < offsets[node + 1]:
+                frame[1] = edge + 1
+                child = targets[edge]
+                if index[child] == -1:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = 1
+                    work.append([child, offsets[child]])
+                elif on_stack[child] and index[child] < low[node]:
+                    low[node] = index[child]
+                continue
+            work.pop()
+            if work and low[node] < low[work[-1][0]]:
+                low[work[-1][0]] = low[node]
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component_of[member] = components
+                    if member == node:
+                        break
+                components += 1
+    return component_of, components
+
+
+class Condensation:
+    """
+    - Description: 포레스트의 SCC(사이클)를 노드 하나로 줄인 DAG
+                   컴포넌트 번호는 위상 순서 (dependents가 앞, 모든 DAG 간선 c -> d에서 c < d)
+                   컴포넌트의 노드들은 members에 연속으로 놓임 (members[component_start[c]:component_start[c+1]])
+                   reverse tree / closure 개수 / 위상 순서를 사이클에 상관없이 컴포넌트 단위로 선형 시간에 구함
+    - Input: keys - 노드 ID -> 'name@version', offsets / targets - 원래 그래프의 정방향 CSR,
+             component_of - 노드 ID -> 컴포넌트 번호, component_start / members - 컴포넌트별 노드 CSR,
+             cyclic - 컴포넌트가 사이클이면 1 (노드 2개 이상이거나 자기 자신을 의존),
+             dag_offsets / dag_targets - 컴포넌트 DAG의 정방향 CSR (중복 없음)
+    """
+
+    def __init__(self, keys, offsets, targets, component_of, component_start, members, cyclic,
+                 dag_offsets, dag_targets, build_seconds=0.0):
+        self.keys = keys
+        self.ids = {key: node_id for node_id, key in enumerate(keys)}
+        self.offsets = offsets
+        self.targets = targets
+        self.component_of = component_of
+        self.component_start = component_start
+        self.members = members
+        self.cyclic = cyclic
+        self.dag_offsets = dag_offsets
+        self.dag_targets = dag_targets
+        self.build_seconds = build_seconds
+        self._dag_reverse = None
+
+    @classmethod
+    def from_graph(cls, g):
+        """ DepGraph 또는 ForestSnapshot에서 SCC를 구하고 컴포넌트 DAG를 만듦 """
+        start_time = time.perf_counter()
+        keys = g.nodes()
+        node_count = len(keys)
+        offsets, targets = g.csr()
+        finished, component_count = strongly_connected_components(node_count, offsets, targets)
+
+        # Tarjan은 downstream을 먼저 끝내므로 뒤집으면 dependents가 앞에 오는 위상 순서
+        component_of = array('i', (component_count - 1 - component for component in finished))
+        component_start = array('q', [0]) * (component_count + 1)
+        for component in component_of:
+            component_start[component + 1] += 1
+        for component in range(component_count):
+            component_start[component + 1] += component_start[component]
+        fill = array('q', component_start)
+        members = array('i', [0]) * node_count
+        for node_id, component in enumerate(component_of):
+            members[fill[component]] = node_id
+            fill[component] += 1
+
+        cyclic = bytearray(component_count)
+        dag_offsets = array('q', [0])
+        dag_targets = array('i')
+        for component in range(component_count):
+            start, end = component_start[component], component_start[component + 1]
+            if end - start > 1:
+                cyclic[component] = 1
+            children = set()
+            for node_id in members[start:end]:
+                for child_id in targets[offsets[node_id]:offsets[node_id + 1]]:
+                    child = component_of[child_id]
+                    if child != component:
+                        children.add(child)
+                    elif child_id == node_id:
+                        cyclic[component] = 1
+            dag_targets.extend(sorted(children))
+            dag_offsets.append(len(dag_targets))
+        return cls(keys, offsets, targets, component_of, component_start, members, cyclic,
+                   dag_offsets, dag_targets, time.perf_counter() - start_time)
+
+    # ---------- 컴포넌트 ----------
+
+    def number_of_components(self):
+        return len(self.cyclic)
+
+    def component_members(self, component):
+        return self.members[self.component_start[component]:self.component_start[component + 1]]
+
+    def component_size(self, component):
+        return self.component_start[component + 1] - self.component_start[component]
+
+    def successors(self, component):
+        """ component가 직접 의존하는 컴포넌트들 """
+        return self.dag_targets[self.dag_offsets[component]:self.dag_offsets[component + 1]]
+
+    def predecessors(self, component):
+        """ component를 직접 의존하는 컴포넌트들 (역방향 DAG CSR은 처음 쓸 때 만듦) """
+        if self._dag_reverse is None:
+            component_count = len(self.cyclic)
+            reverse_offsets = array('q', [0]) * (component_count + 1)
+            for child in self.dag_targets:
+                reverse_offsets[child + 1] += 1
+            for component_index in range(component_count):
+                reverse_offsets[component_index + 1] += reverse_offsets[component_index]
+            fill = array('q', reverse_offsets)
+            reverse_sources = array('i', [0]) * len(self.dag_targets)
+            for parent in range(component_count):
+                for child in self.successors(parent):
+                    reverse_sources[fill[child]] = parent
+                    fill[child] += 1
+            self._dag_reverse = (reverse_offsets, reverse_sources)
+        reverse_offsets, reverse_sources = self._dag_reverse
+        return reverse_sources[reverse_offsets[component]:reverse_offsets[component + 1]]
+
+    # ---------- 사이클 ----------
+
+    def cyclic_components(self):
+        """ 사이클 컴포넌트 번호들 (큰 것부터) """
+        return sorted((component for component in range(len(self.cyclic)) if self.cyclic[component]),
+                      key=self.component_size, reverse=True)
+
+    def cycle_path(self, component):
+        """
+        - Description: 사이클 컴포넌트에서 실제 순환 하나를 찾음 (첫 노드에서 출발해 컴포넌트 안에서만 BFS)
+        - Input: 컴포넌트 번호
+        - Output: ['a@1.0.0', 'b@2.0.0', 'a@1.0.0'] 같은 가장 짧은 순환 (사이클이 아니면 빈 리스트)
+        """
+        if not self.cyclic[component]:
+            return []
+        start = self.members[self.component_start[component]]
+        parents = {}
+        queue = deque([start])
+        while queue:
+            node_id = queue.popleft()
+            for child_id in self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]:
+                if self.component_of[child_id] != component:
+                    continue
+                if child_id == start:
+                    path = [start]
+                    while node_id != start:
+                        path.append(node_id)
+                        node_id = parents[node_id]
+                    path.append(start)
+                    path.reverse()
+                    return [self.keys[path_id] for path_id in path]
+                if child_id not in parents:
+                    parents[child_id] = node_id
+                    queue.append(child_id)
+        return []
+
+    # ---------- 질의 ----------
+
+    def topological_order(self, dependencies_first=True):
+        """
+        - Description: 노드 ID를 위상 순서로 돌려줌 (사이클 안의 노드들은 연속으로, 순서는 임의)
+        - Input: dependencies_first - True면 설치 순서(의존받는 쪽 먼저), False면 dependents 먼저
+        - Output: 노드 ID generator
+        """
+        components = range(len(self.cyclic) - 1, -1, -1) if dependencies_first else range(len(self.cyclic))
+        for component in components:
+            yield from self.component_members(component)
+
+    def _closure_components(self, start_ids):
+        """ 시작 노드들을 의존하는 컴포넌트들 (역방향 DAG BFS, 컴포넌트마다 한 번) + 시작 컴포넌트 중 닿은 것 여부 """
+        start_components = dict.fromkeys(self.component_of[node_id] for node_id in start_ids)
+        reached = set()
+        frontier = list(start_components)
+        while frontier:
+            next_frontier = []
+            for component in frontier:
+                for parent in self.predecessors(component):
+                    if parent not in reached:
+                        reached.add(parent)
+                        if parent not in start_components:
+                            next_frontier.append(parent)
+            frontier = next_frontier
+        # 사이클 안의 시작 노드는 같은 컴포넌트의 다른 노드(또는 자기 자신)를 통해 닿음
+        reached.update(component for component in start_components if self.cyclic[component])
+        return reached
+
+    def closure_ids(self, start_ids):
+        """ 시작 노드들을 (전이적으로) 의존하는 노드 ID set (ReverseIndex.closure_of와 같은 집합) """
+        closure = set()
+        for component in self._closure_components(start_ids):
+            closure.update(self.component_members(component))
+        return closure
+
+    def closure_count(self, start_ids):
+        """ closure_ids의 크기를 노드를 펼치지 않고 컴포넌트 크기로 셈 """
+        return sum(self.component_size(component) for component in self._closure_components(start_ids))
+
+    def count_dependents_id(self, node_id):
+        """ node를 (전이적으로) 의존하는 노드 수 (자기 자신은 제외) """
+        component = self.component_of[node_id]
+        return self.closure_count([node_id]) - self.cyclic[component]
+
+    def stats(self):
+        component_count = len(self.cyclic)
+        cyclic = [component for component in range(component_count) if self.cyclic[component]]
+        return {
+            'nodes': len(self.keys),
+            'edges': len(self.targets),
+            'components': component_count,
+            'dag_edges': len(self.dag_targets),
+            'cyclic_components': len(cyclic),
+            'nodes_in_cycles': sum(self.component_size(component) for component in cyclic),
+            'largest_component': max((self.component_size(component) for component in cyclic), default=1),
+            'build_seconds': round(self.build_seconds, 3),
+        }
+
+    def __str__(self):
+        return f"Condensation({len(self.keys)} nodes, {len(self.cyclic)} components, {sum(self.cyclic)} cyclic)"
+
+
+def report_cycles(condensation, top=10):
+    """
+    - Description: 사이클 컴포넌트를 큰 것부터 출력 (크기, 패키지 수, 순환 하나)
+    - Input: Condensation, top - 몇 개까지 출력할지
+    - Output: 사이클 컴포넌트 수
+    """
+    cyclic = condensation.cyclic_components()
+    print(f"[+] {condensation}: {condensation.stats()}")
+    for component in cyclic[:top]:
+        packages = {key_name(condensation.keys[node_id]) for node_id in condensation.component_members(component)}
+        print(f"[+] cycle of {condensation.component_size(component)} nodes in {len(packages)} packages: "
+              f"{' -> '.join(condensation.cycle_path(component))}")
+    if len(cyclic) > top:
+        print(f"[+] ... {len(cyclic) - top} more cyclic components")
+    return len(cyclic)
+
+
+def save_topological_order(condensation, path):
+    """ 설치 순서(의존받는 쪽 먼저)로 노드 'name@version'을 한 줄씩 저장 """
+    with open(path, 'w') as file:
+        for node_id in condensation.topological_order():
+            file.write(condensation.keys[node_id] + '\n')
+    print(f"[+] topological order saved to {path}")
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    # --top=N: 사이클을 몇 개까지 출력할지, --order=path: 설치 순서(의존받는 쪽 먼저)로 노드를 한 줄씩 저장
+    top = 10
+    order_path = None
+    for option in options:
+        if option.startswith('--top='):
+            top = int(option.split('=', 1)[1])
+        elif option.startswith('--order='):
+            order_path = option.split('=', 1)[1]
+
+    if len(args) != 1:
+        print("Usage: python3 forest_scc.py forest(.json|.snapshot) [--top=N] [--order=path]\n"
+              " This code reports the dependency cycles in the forest and condenses them into a DAG")
+    else:
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        g = open_forest(args[0])
+        condensation = Condensation.from_graph(g)
+        report_cycles(condensation, top)
+        if order_path:
+            save_topological_order(condensation, order_path)
+        if isinstance(g, ForestSnapshot):
+            g.close()
+        print(f"현재 시간:", datetime.datetime.now())
@@ -0,0 +1,381 @@
+import os
+import sys
+import json
+import mmap
+import bisect
+import struct
+import datetime
+from array import array
+from dep_graph import DepGraph
+from semver_resolver import parse_version
+from node_key import make_key, split_key
+
+
+MAGIC = b'NPMFRST\0'
+FORMAT_VERSION = 3
+HEADER = struct.Struct('<8sII qqq')  # magic, 포맷 버전, byte order(1=little), 노드 수, 간선 수, 패키지 수
+SECTION = struct.Struct('<qq')       # 섹션 시작 위치, 바이트 길이
+
+# 섹션 순서 (이름, array typecode - None이면 UTF-8 문자열 blob)
+SECTIONS = [
+    ('package_name_offsets', 'q'),  # 패키지 ID -> package_name_blob 안의 시작 위치 (P+1개)
+    ('package_name_blob', None),
+    ('version_offsets', 'q'),       # 노드 ID -> version_blob 안의 시작 위치 (N+1개)
+    ('version_blob', None),
+    ('package_of', 'i'),            # 노드 ID -> 패키지 ID
+    ('package_offsets', 'q'),       # 패키지 ID -> package_members 안의 시작 위치 (P+1개)
+    ('package_members', 'i'),       # 패키지별 버전 노드 ID (semver 오름차순)
+    ('forward_offsets', 'q'),       # 정방향 CSR (N+1개)
+    ('forward_targets', 'i'),
+    ('reverse_offsets', 'q'),       # 역방향 CSR (N+1개)
+    ('reverse_sources', 'i'),
+    ('package_forward_offsets', 'q'),  # 패키지 -> 패키지 CSR (P+1개, 포맷 2부터)
+    ('package_forward_targets', 'i'),
+    ('package_forward_weights', 'q'),  # 두 패키지 사이의 버전 간선 수
+    ('package_reverse_offsets', 'q'),
+    ('package_reverse_sources', 'i'),
+    ('package_reverse_weights', 'q'),
+    ('bare_nodes', 'i'),            # 'name@' 없이 이름만 있는 노드 ID들 (오름차순, 포맷 3부터)
+]
+
+# 포맷 1 스냅샷에 들어있는 섹션 수 (패키지 -> 패키지 CSR 없음)
+FORMAT_1_SECTIONS = 11
+# 포맷 2 스냅샷에 들어있는 섹션 수 (이름만 있는 노드 목록 없음)
+FORMAT_2_SECTIONS = 17
+
+
+def _string_table(strings):
+    """ 문자열들을 (시작 위치 array('q'), UTF-8 blob)으로 만듦 """
+    offsets = array('q', [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def _version_sort_key(version):
+    # 유효하지 않은 버전은 뒤로 보냄
+    key = parse_version(version)
+    return (0, key) if key is not None else (1, version)
+
+
+def _package_csr(adjacency):
+    """ 패키지별 {패키지 ID: 간선 수} 리스트를 (offsets, 패키지 ID들, 간선 수들) CSR 배열로 만듦 """
+    offsets = array('q', [0])
+    targets = array('i')
+    weights = array('q')
+    for counts in adjacency:
+        for other in sorted(counts):
+            targets.append(other)
+            weights.append(counts[other])
+        offsets.append(len(targets))
+    return offsets, targets, weights
+
+
+def write_snapshot(g, snapshot_path):
+    """
+    - Description: DepGraph를 바이너리 스냅샷으로 저장 (임시 파일에 쓴 뒤 교체)
+                   간선마다 'name@version' 문자열을 반복하지 않고, 문자열은 한 번만 저장하고 간선은 정수 CSR 배열로 저장
+                   버전이 빈 노드는 'name@'과 'name'이 다른 노드이므로 이름만 있는 노드 ID를 따로 저장
+    - Input: DepGraph, 저장할 파일 경로
+    - Output: 파일 크기 (bytes)
+    """
+    node_count = g.number_of_nodes()
+    versions = [g.version(node_id) for node_id in range(node_count)]
+    bare_nodes = array('i', [node_id for node_id in range(node_count)
+                             if not versions[node_id] and g.key(node_id) == g.package_name(node_id)])
+
+    package_offsets = array('q', [0])
+    package_members = array('i')
+    for members in g.package_members:
+        package_members.extend(sorted(members, key=lambda node_id: _version_sort_key(versions[node_id])))
+        package_offsets.append(len(package_members))
+
+    package_name_offsets, package_name_blob = _string_table(g.package_names)
+    version_offsets, version_blob = _string_table(versions)
+    forward_offsets, forward_targets = g.csr()
+    reverse_offsets, reverse_sources = g.reverse_csr()
+    sections = [
+        package_name_offsets, package_name_blob,
+        version_offsets, version_blob,
+        array('i', g.package_of),
+        package_offsets, package_members,
+        forward_offsets, forward_targets,
+        reverse_offsets, reverse_sources,
+        *_package_csr(g.package_succ),
+        *_package_csr(g.package_pred),
+        bare_nodes,
+    ]
+
+    # 섹션은 mmap 위에서 바로 cast 할 수 있게 8바이트 단위로 정렬
+    payloads = [section if isinstance(section, bytes) else section.tobytes() for section in sections]
+    position = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    for payload in payloads:
+        position = (position + 7) & ~7
+        table.append((position, len(payload)))
+        position += len(payload)
+
+    tmp_path = snapshot_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 1 if sys.byteorder == 'little' else 0,
+                               node_count, g.number_of_edges(), len(g.package_names)))
+        for start, length in table:
+            file.write(SECTION.pack(start, length))
+        for (start, _), payload in zip(table, payloads):
+            file.write(b'\0' * (start - file.tell()))
+            file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, snapshot_path)
+    return position
+
+
+def convert_json(json_path, snapshot_path):
+    """
+    - Description: save_graph_as_json이 만든 {'nodes': [...], 'edges': [...]} 포레스트를 스냅샷으로 변환
+    - Input: JSON 포레스트 경로, 저장할 스냅샷 경로
+    - Output: 변환한 DepGraph
+    """
+    with open(json_path, 'r') as file:
+        forest = json.load(file)
+    g = DepGraph()
+    for node in forest.get('nodes', []):
+        g.add_node(node)
+    for source, target in forest.get('edges', []):
+        g.add_edge(source, target)
+    write_snapshot(g, snapshot_path)
+    return g
+
+
+class ForestSnapshot:
+    """
+    - Description: write_snapshot으로 저장한 포레스트를 mmap으로 열어서 복사 없이 읽는 read-only 그래프
+                   배열은 memoryview.cast로 파일 위에 바로 올라가므로 여는 시간은 간선 수와 상관없이 일정함
+                   문자열 -> ID 조회용 dictionary는 처음 필요할 때 패키지 이름만으로 만듦
+    - Input: 스냅샷 파일 경로
+    """
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.file = open(snapshot_path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, little_endian, node_count, edge_count, package_count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{snapshot_path} is not a forest snapshot")
+        if version not in (1, 2, FORMAT_VERSION):
+            self.close()
+            raise ValueError(f"{snapshot_path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        if bool(little_endian) != (sys.byteorder == 'little'):
+            self.close()
+            raise ValueError(f"{snapshot_path} was written on a machine with a different byte order")
+
+        self.node_count = node_count
+        self.edge_count = edge_count
+        self.package_count = package_count
+        view = memoryview(self.mm)
+        self.views = [view]
+        sections = SECTIONS[:{1: FORMAT_1_SECTIONS, 2: FORMAT_2_SECTIONS}.get(version, len(SECTIONS))]
+        # 포맷 2 이하는 'name@'과 'name'을 구분하지 않았으므로 버전이 빈 노드는 모두 이름만 있는 노드로 봄
+        self.bare_nodes = None
+        for index, (name, typecode) in enumerate(sections):
+            start, length = SECTION.unpack_from(self.mm, HEADER.size + SECTION.size * index)
+            section = view[start:start + length]
+            if typecode is not None:
+                section = section.cast(typecode)
+            self.views.append(section)
+            setattr(self, name, section)
+        self._package_ids = None
+        if version == 1:
+            print(f"[!] {snapshot_path} is a format 1 snapshot, computing package edges (rewrite it to skip this)")
+            self._compute_package_edges()
+
+    def _compute_package_edges(self):
+        # 포맷 1 스냅샷은 패키지 -> 패키지 CSR이 없으므로 버전 간선에서 한 번 계산
+        succ = [{} for _ in range(self.package_count)]
+        pred = [{} for _ in range(self.package_count)]
+        package_of = self.package_of
+        for source_id, target_id in self.edge_ids():
+            source, target = package_of[source_id], package_of[target_id]
+            succ[source][target] = succ[source].get(target, 0) + 1
+            pred[target][source] = pred[target].get(source, 0) + 1
+        self.package_forward_offsets, self.package_forward_targets, self.package_forward_weights = _package_csr(succ)
+        self.package_reverse_offsets, self.package_reverse_sources, self.package_reverse_weights = _package_csr(pred)
+
+    # ---------- 노드 ----------
+
+    def version(self, node_id):
+        return bytes(self.version_blob[self.version_offsets[node_id]:self.version_offsets[node_id + 1]]).decode('utf-8')
+
+    def package_name(self, node_id):
+        return self._package_name(self.package_of[node_id])
+
+    def _package_name(self, package_id):
+        start = self.package_name_offsets[package_id]
+        end = self.package_name_offsets[package_id + 1]
+        return bytes(self.package_name_blob[start:end]).decode('utf-8')
+
+    def name_version(self, node_id):
+        """ 노드 ID -> (패키지 이름, 버전) """
+        return self.package_name(node_id), self.version(node_id)
+
+    def _is_bare(self, node_id):
+        """ 'name@' 없이 이름만 있는 노드인지 (버전이 빈 노드에서만 의미가 있음) """
+        if self.bare_nodes is None:
+            return True
+        index = bisect.bisect_left(self.bare_nodes, node_id)
+        return index < len(self.bare_nodes) and self.bare_nodes[index] == node_id
+
+    def key(self, node_id):
+        """ 노드 ID -> 'name@version' (이름만 있는 노드는 DepGraph에 들어간 그대로 이름만, 'name@'은 그대로) """
+        version = self.version(node_id)
+        if not version and self._is_bare(node_id):
+            return self.package_name(node_id)
+        return make_key(self.package_name(node_id), version)
+
+    def nodes(self):
+        return [self.key(node_id) for node_id in range(self.node_count)]
+
+    def node_id(self, key):
+        """ 'name@version'의 노드 ID, 없으면 None """
+        try:
+            name, version = split_key(key)
+            bare = False
+        except ValueError:
+            # 버전이 없는 노드 (DepGraph.add_node와 같이 문자열 전체를 패키지 이름으로 봄)
+            name, version, bare = key, '', True
+        for node_id in self.package_nodes(name):
+            if self.version(node_id) == version and (version or self._is_bare(node_id) == bare):
+                return node_id
+        return None
+
+    def has_node(self, key):
+        return self.node_id(key) is not None
+
+    def number_of_nodes(self):
+        return self.node_count
+
+    # ---------- 패키지 인덱스 ----------
+
+    def packages(self):
+        return [self._package_name(package_id) for package_id in range(self.package_count)]
+
+    def has_package(self, name):
+        return self._package_id(name) is not None
+
+    def _package_id(self, name):
+        if self._package_ids is None:
+            self._package_ids = {package_name: package_id for package_id, package_name in enumerate(self.packages())}
+        return self._package_ids.get(name)
+
+    def package_nodes(self, name):
+        """ 패키지의 모든 버전 노드 ID (semver 오름차순, 없으면 빈 리스트) """
+        package_id = self._package_id(name)
+        if package_id is None:
+            return []
+        return self.package_members[self.package_offsets[package_id]:self.package_offsets[package_id + 1]]
+
+    def package_id(self, name):
+        """ 패키지 이름의 ID, 없으면 None """
+        return self._package_id(name)
+
+    def package_name_of(self, package_id):
+        return self._package_name(package_id)
+
+    def package_size(self, package_id):
+        return self.package_offsets[package_id + 1] - self.package_offsets[package_id]
+
+    def number_of_packages(self):
+        return self.package_count
+
+    def package_successors(self, package_id):
+        """ 이 패키지(어느 버전이든)가 의존하는 패키지들 {패키지 ID: 버전 간선 수} """
+        start, end = self.package_forward_offsets[package_id], self.package_forward_offsets[package_id + 1]
+        return dict(zip(self.package_forward_targets[start:end], self.package_forward_weights[start:end]))
+
+    def package_predecessors(self, package_id):
+        """ 이 패키지(어느 버전이든)를 의존하는 패키지들 {패키지 ID: 버전 간선 수} """
+        start, end = self.package_reverse_offsets[package_id], self.package_reverse_offsets[package_id + 1]
+        return dict(zip(self.package_reverse_sources[start:end], self.package_reverse_weights[start:end]))
+
+    # ---------- 간선 ----------
+
+    def successors(self, node_id):
+        return self.forward_targets[self.forward_offsets[node_id]:self.forward_offsets[node_id + 1]]
+
+    def predecessors(self, node_id):
+        return self.reverse_sources[self.reverse_offsets[node_id]:self.reverse_offsets[node_id + 1]]
+
+    def number_of_edges(self):
+        return self.edge_count
+
+    def edge_ids(self):
+        """ (upstream ID, downstream ID) 간선을 하나씩 돌려주는 generator """
+        offsets = self.forward_offsets
+        targets = self.forward_targets
+        for source_id in range(self.node_count):
+            for target_id in targets[offsets[source_id]:offsets[source_id + 1]]:
+                yield source_id, target_id
+
+    def edges(self):
+        keys = self.nodes()
+        return [(keys[source_id], keys[target_id]) for source_id, target_id in self.edge_ids()]
+
+    def csr(self):
+        return self.forward_offsets, self.forward_targets
+
+    def reverse_csr(self):
+        return self.reverse_offsets, self.reverse_sources
+
+    def as_numpy(self):
+        """
+        - Description: CSR 배열들을 복사 없이 NumPy 배열로 봄 (numpy가 없으면 ImportError)
+        - Output: {섹션 이름: numpy.ndarray}
+        """
+        import numpy as np
+
+        return {name: np.frombuffer(getattr(self, name), dtype=np.int64 if typecode == 'q' else np.int32)
+                for name, typecode in SECTIONS if typecode is not None and getattr(self, name, None) is not None}
+
+    def to_depgraph(self):
+        """ 수정할 수 있는 DepGraph로 읽어들임 (노드 ID는 그대로 유지) """
+        g = DepGraph()
+        for key in self.nodes():
+            g.add_node(key)
+        for source_id, target_id in self.edge_ids():
+            g.add_edge_ids(source_id, target_id)
+        return g
+
+    def close(self):
+        # mmap을 닫기 전에 그 위에 만든 memoryview를 먼저 해제해야 함
+        for view in reversed(getattr(self, 'views', [])):
+            view.release()
+        self.views = []
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        return f"ForestSnapshot({self.node_count} nodes, {self.edge_count} edges, {self.package_count} packages)"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 forest_snapshot.py forest.json [forest.snapshot]\n This code converts a JSON forest into a binary snapshot")
+    else:
+        json_path = sys.argv[1]
+        snapshot_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(json_path)[0] + '.snapshot'
+
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        convert_json(json_path, snapshot_path)
+        with ForestSnapshot(snapshot_path) as snapshot:
+            print(f"[+] {snapshot} saved to {snapshot_path} ({os.path.getsize(snapshot_path)} bytes, "
+                  f"JSON {os.path.getsize(json_path)} bytes)")
+        print(f"현재 시간:", datetime.datetime.now())
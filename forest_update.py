@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import datetime
+from collections import namedtuple
+from forest_builder import ForestBuilder
+from dep_graph import DepGraph
+from dependency_store import DependencyStore
+from forest_snapshot import ForestSnapshot, write_snapshot
+from packument_fanout import iter_version_dependencies
+from reverse_index import ClosureCache, forest_fingerprint
+from semver_resolver import build_version_list
+from version_index import update_version_index
+from node_key import make_key, record_filename
+
+
+# 업데이트 한 번으로 바뀐 것들 ('name@version' 기준)
+ForestUpdate = namedtuple('ForestUpdate', ['added_edges', 'removed_edges', 'new_nodes', 'rechecked_nodes', 'grown_packages'])
+
+
+def load_forest(forest_path):
+    """ .snapshot이면 노드 ID를 그대로 유지해서, 아니면 {'nodes', 'edges'} JSON에서 DepGraph를 읽음 """
+    if forest_path.endswith('.snapshot'):
+        with ForestSnapshot(forest_path) as snapshot:
+            return snapshot.to_depgraph()
+    with open(forest_path, 'r') as file:
+        data = json.load(file)
+    g = DepGraph()
+    for node in data.get('nodes', []):
+        g.add_node(node)
+    for source, target in data.get('edges', []):
+        g.add_edge(source, target)
+    return g
+
+
+def save_forest(g, forest_path):
+    """ 임시 파일에 쓴 뒤 교체해서 저장 (.snapshot이면 바이너리 스냅샷) """
+    if forest_path.endswith('.snapshot'):
+        write_snapshot(g, forest_path)
+        return
+    tmp_path = forest_path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump({'nodes': g.nodes(), 'edges': g.edges()}, file)
+    os.replace(tmp_path, forest_path)
+
+
+def _stored_dependencies(builder, pairs):
+    # read_dependencies가 읽는 곳(dependency store가 있으면 store, 없으면 dependencies 폴더)에 저장된 dependencies, 없는 쌍은 빠짐
+    if builder.dependency_store.available():
+        return builder.dependency_store.get_many(pairs)
+    stored = {}
+    for name, version in pairs:
+        path = os.path.join('dependencies', record_filename(name, version, '_dependencies.json'))
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as file:
+                    stored[(name, version)] = json.load(file)
+            except json.JSONDecodeError as e:
+                print(f"JSON decode error in {path}: {e}")
+    return stored
+
+
+def changed_dependency_records(builder, changes):
+    """
+    - Description: packument에서 꺼낸 레코드 중 저장된 dependencies와 다르거나 버전 리스트에 없는 버전(새 버전)만 남김
+                   packument에는 모든 버전이 들어있으므로 거르지 않으면 바뀌지 않은 버전 노드까지 모두 다시 해석함
+    - Input: ForestBuilder, (패키지 이름, 버전, dependencies) 레코드들
+    - Output: 바뀐 레코드 리스트
+    """
+    changes = [(name, version, dependencies if isinstance(dependencies, dict) else {})
+               for name, version, dependencies in changes]
+    stored = _stored_dependencies(builder, [(name, version) for name, version, _ in changes])
+    known_versions = {}
+    changed = []
+    for name, version, dependencies in changes:
+        if name not in known_versions:
+            known_versions[name] = set(builder.get_version_list(name).versions)
+        if stored.get((name, version)) != dependencies or version not in known_versions[name]:
+            changed.append((name, version, dependencies))
+    return changed
+
+
+def _store_dependency_records(builder, changes):
+    # 바뀐 dependencies를 read_dependencies가 읽는 곳(dependency store가 있으면 store, 없으면 dependencies 폴더)에 반영
+    if builder.dependency_store.available():
+        store = DependencyStore(builder.dependency_store.db_path)
+        store.put_many(changes, replace=True)
+        store.close()
+    else:
+        os.makedirs('dependencies', exist_ok=True)
+        for name, version, dependencies in changes:
+            path = os.path.join('dependencies', record_filename(name, version, '_dependencies.json'))
+            with open(path, 'w') as file:
+                json.dump(dependencies, file)
+    builder.prefetched_dependencies.clear()
+
+
+def apply_dependency_changes(g, changes, builder, max_depth=None, publish_times=None):
+    """
+    - Description: 바뀐 (이름, 버전, dependencies) 레코드들만으로 포레스트를 갱신
+                   1) 새 버전이 생긴 패키지는 버전 리스트를 늘리고 그 패키지의 resolution cache만 버림
+                   2) dependencies가 바뀐 버전 노드는 모든 range를, 새 버전이 생긴 패키지를 의존하는 노드
+                      (그 패키지 버전 노드들의 predecessors)는 그 패키지 range만 다시 해석
+                   3) 해석 결과가 달라진 간선은 지우고 새 간선을 추가, 처음 생긴 노드만 BFS로 펼침
+    - Input: 포레스트 g, (패키지 이름, 버전, dependencies dictionary) 레코드들 (changed_dependency_records로 거른 것),
+             ForestBuilder, 새 노드를 펼칠 최대 depth,
+             publish_times - {패키지 이름: {버전: publish 시각}} (늘어난 버전 리스트의 시각 배열에 반영)
+    - Output: ForestUpdate
+    """
+    changes = [(name, version, dependencies if isinstance(dependencies, dict) else {})
+               for name, version, dependencies in changes]
+    _store_dependency_records(builder, changes)
+
+    # 1) 새로 올라온 버전
+    published = {}
+    for name, version, _ in changes:
+        published.setdefault(name, set()).add(version)
+    grown = {}
+    for name, versions in published.items():
+        current = builder.get_version_list(name)
+        new_versions = versions - set(current.versions)
+        if new_versions:
+            # 원래 있던 버전의 publish 시각은 그대로 두고 새 버전의 시각만 더함
+            times = dict(zip(current.versions, current.times)) if current.times is not None else {}
+            times.update((publish_times or {}).get(name, {}))
+            grown[name] = build_version_list(list(current.versions) + sorted(new_versions), times or None)
+            builder.version_index.add(name, grown[name], fetched=not builder.version_index.available())
+    if grown:
+        builder.resolution_cache.invalidate(grown)
+        if builder.version_index.available():
+            update_version_index(builder.version_index.index_path, grown)
+
+    # 2) 다시 해석할 노드와 패키지 (None이면 모든 의존성), 간선을 바꾸기 전에 predecessors를 다 구해둠
+    recheck = {}
+    for name, version, _ in changes:
+        node_id = g.node_id(make_key(name, version))
+        if node_id is not None:
+            recheck[node_id] = None
+    for name in grown:
+        for node_id in g.package_nodes(name):
+            for parent_id in g.predecessors(node_id):
+                if parent_id in recheck and recheck[parent_id] is None:
+                    continue
+                recheck.setdefault(parent_id, set()).add(name)
+
+    # 3) 간선 바꾸기
+    added = []
+    removed = []
+    new_keys = []
+    g.begin_delta()
+    for node_id, names in recheck.items():
+        upstream = g.key(node_id)
+        pkg_name, pkg_version = g.name_version(node_id)
+        dependencies = builder.read_dependencies(pkg_name, pkg_version)
+        if not isinstance(dependencies, dict):
+            dependencies = {}
+        wanted = {}
+        for dep_name, version_range in dependencies.items():
+            if names is None or dep_name in names:
+                wanted[dep_name] = make_key(dep_name, builder.resolve_range(dep_name, version_range))
+
+        for child_id in list(g.successors(node_id)):
+            child_package = g.package_name(child_id)
+            if (names is None or child_package in names) and wanted.get(child_package) != g.key(child_id):
+                g.remove_edge_ids(node_id, child_id)
+                removed.append((upstream, g.key(child_id)))
+        for downstream in wanted.values():
+            if not g.has_node(downstream):
+                new_keys.append(downstream)
+            g.add_edge(upstream, downstream)
+
+    # 처음 생긴 노드는 평소처럼 BFS로 의존성을 펼침
+    builder.process_package(g, new_keys, max_depth)
+    delta = g.end_delta()
+    builder.resolution_cache.flush()
+
+    keys = g.keys
+    added = [(keys[source_id], keys[target_id]) for source_id, target_id in delta.edges]
+    return ForestUpdate(added, removed, [keys[node_id] for node_id in delta.nodes], len(recheck), sorted(grown))
+
+
+def changes_from_packuments(paths, publish_times=None):
+    """
+    - Description: 새로 받은 packument(또는 npm view 결과) 파일들에서 (이름, 버전, dependencies) 레코드를 꺼냄
+    - Input: packument JSON 파일 경로들, publish_times - dictionary를 주면 packument의 time 필드를 {이름: {버전: 시각}}으로 모음
+    - Output: 레코드 리스트
+    """
+    changes = []
+    for path in paths:
+        try:
+            with open(path, 'r') as file:
+                packument = json.load(file)
+        except json.JSONDecodeError as e:
+            print(f"JSON decode error in {path}: {e}")
+            continue
+        changes.extend(iter_version_dependencies(packument))
+        if publish_times is not None and isinstance(packument.get('time'), dict) and packument.get('name'):
+            publish_times.setdefault(packument['name'], {}).update(packument['time'])
+    return changes
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if len(args) < 2:
+        print("Usage: python3 forest_update.py forest(.json|.snapshot) packument.json [packument.json ...] [--offline] [--closure-cache=path]\n"
+              " This code updates the stored forest with the dependency records of freshly fetched packuments")
+    else:
+        builder = ForestBuilder(offline_mode='--offline' in options)
+        closure_cache_path = None
+        for option in options:
+            if option.startswith('--closure-cache='):
+                closure_cache_path = option.split('=', 1)[1]
+
+        forest_path = args[0]
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        g = load_forest(forest_path)
+        previous_fingerprint = forest_fingerprint(forest_path)
+        print(f"[+] loaded {g}")
+        publish_times = {}
+        records = changes_from_packuments(args[1:], publish_times)
+        # packument의 모든 버전 중 저장된 것과 dependencies가 다르거나 새로 올라온 버전만 반영
+        changes = changed_dependency_records(builder, records)
+        print(f"[+] {len(changes)} of {len(records)} version records are new or changed")
+        update = apply_dependency_changes(g, changes, builder, publish_times=publish_times)
+        save_forest(g, forest_path)
+        print(f"[+] {update.rechecked_nodes} nodes re-resolved, {len(update.grown_packages)} packages with new versions, "
+              f"+{len(update.added_edges)} / -{len(update.removed_edges)} edges, +{len(update.new_nodes)} nodes -> {g}")
+
+        if closure_cache_path:
+            # 바뀐 간선의 downstream에 닿는 대상의 reverse dependency 결과만 버림
+            # 캐시가 업데이트 전 포레스트의 것이 아니면 전부 버리고, 맞으면 바뀐 결과만 지운 뒤 새 포레스트의 지문을 남김
+            closure_cache = ClosureCache(closure_cache_path, previous_fingerprint)
+            stale = closure_cache.invalidate(target for _, target in update.added_edges + update.removed_edges)
+            closure_cache.set_fingerprint(forest_fingerprint(forest_path))
+            closure_cache.close()
+            if closure_cache.dropped:
+                print(f"[!] {closure_cache.dropped} cached reverse dependency results were from another forest and were dropped")
+            print(f"[+] {len(stale)} cached reverse dependency results invalidated")
+        print(f"현재 시간:", datetime.datetime.now())
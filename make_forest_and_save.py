@@ -5,69 +5,42 @@ import tarfile
 import shutil
 import re
 import sys
-import pygraphviz as pgv
 import csv
 import datetime
+import time
+from multiprocessing import Pool
 from picking_tree import get_reverse_dependency_tree
-
-
-def load_partial_forests(directory, g):
+from reverse_index import ReverseIndex, load_or_build
+from dep_graph import DepGraph
+from semver_resolver import parse_publish_time
+from forest_builder import ForestBuilder
+from forest_snapshot import write_snapshot
+from forest_merge import find_partial_forests, merge_partial_forests, save_partial_forest_ndjson
+from checkpoint import BuildJournal
+from forest_render import render_graph, render_in_background, export_graph, DEFAULT_MAX_NODES, DEFAULT_MAX_EDGES
+from forest_scc import Condensation, report_cycles, save_topological_order
+from node_key import make_key, record_filename
+
+# 버전 인덱스, resolution cache, dependency store, registry로 의존성을 해석하고 BFS로 펼치는 빌더
+# (--offline, --as-of, 체크포인트는 main에서 넣음, forest_update.py와 range_graph.py는 각자 ForestBuilder를 만듦)
+builder = ForestBuilder()
+
+
+def load_partial_forests(directory, g, workers=1):
     """
-    - Description: 주어진 디렉토리에서 'partial_forest'가 포함된 모든 JSON 파일을 찾아 읽고,
-                   그 내용을 전체 그래프 g에 통합합니다.
-    - Input: directory - JSON 파일이 저장된 디렉토리 경로, g - 전체 그래프 객체
+    - Description: 주어진 디렉토리에서 'partial_forest'가 포함된 모든 JSON(NDJSON) 파일을 찾아
+                   한 번에 json.load 하지 않고 스트리밍으로 읽어서 전체 그래프 g에 통합합니다.
+    - Input: directory - JSON 파일이 저장된 디렉토리 경로, g - 전체 그래프 객체, workers - 병렬로 합칠 프로세스 수
     - Output: 통합된 전체 그래프 g
     """
-    for filename in os.listdir(partial_forest_directory):
-        if 'partial_forest' in filename and filename.endswith('.json'):
-            print("Find partial forest")
-            file_path = os.path.join(directory, filename)
-            print(f"Loading {file_path}")
-            
-            # JSON 파일 읽기
-            with open(file_path, 'r') as file:
-                partial_forest = json.load(file)
-            
-            # 노드 추가
-            for node in partial_forest.get("nodes", []):
-                if not g.has_node(node):
-                    g.add_node(node)
-            
-            # 엣지 추가
-            for edge in partial_forest.get("edges", []):
-                source, target = edge
-                if not g.has_edge(source, target):
-                    g.add_edge(source, target)
+    paths = find_partial_forests(directory)
+    if paths:
+        print(f"Find partial forest: {len(paths)} files")
+    g = merge_partial_forests(paths, g, workers)
     if g is None:
         raise ValueError("Function 'load_partial_forests' returned None")
     return g
 
-def read_dependencies(pkg_name, pkg_version):
-    """
-    - Description: 저장된 dependencies 폴더의 JSON 파일에서 의존성 정보 읽기
-    - Input: 의존성을 알고싶은 패키지 이름과 버전
-    - Output: 의존성 정보
-    """
-    # 첫 번째 폴더(dependencies)에서 파일을 찾기
-    filename = f"{pkg_name.replace('/', '%')}@{pkg_version}_dependencies.json"
-    file_path = os.path.join('dependencies', filename)
-    
-    # 파일이 없으면 두 번째 폴더(versions_new)에서 검색
-    if not os.path.exists(file_path):
-        print(f"Dependencies file not found in dependencies folder for {pkg_name}@{pkg_version}. \nSearching in versions_new folder...")
-        file_path = os.path.join('versions_new', filename)
-    
-    # 최종적으로 파일이 존재하는지 확인하고 읽기
-    try:
-        with open(file_path, 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print(f"Dependencies file not found in both folders for {pkg_name}@{pkg_version}")
-        return {}
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {e}")
-        return {}
-
 def read_versionList(pkg_name, pkg_version):
     """
     - Description: 저장된 versions 폴더의 JSON 파일에서 버전 정보 읽기 for semver
@@ -76,7 +49,7 @@ def read_versionList(pkg_name, pkg_version):
     """
 
     """ 저장된 JSON 파일에서 버전 정보 읽기 """
-    filename = f"{pkg_name.replace('/', '%')}@{pkg_version}_versionList.json"
+    filename = record_filename(pkg_name, pkg_version, '_versionList.json')
     try:
         with open(os.path.join('versions', filename), 'r') as file:
             return json.load(file)
@@ -87,185 +60,16 @@ def read_versionList(pkg_name, pkg_version):
         print(f"JSON decode error: {e}")
         return {}
 
-def get_latest_version(version_range, all_versions):
-    """
-    - Description: 주어진 패키지의 종속 패키지들을 semantic versioning화
-    - Input: package.json에 있는 버전정보, npm에 올라온 모든 버전 metadata 정보
-    - Output: 
-    """
-    try:
-        # Node.js 스크립트에서 semver.maxSatisfying을 사용하여 최신 버전을 찾음
-        # Destfying 논문처럼 바꿔줘야함
-        node_script = f"""
-        const semver = require('semver');
-        const versions = {json.dumps(all_versions)};
-        const range = '{version_range}';
-        console.log(semver.maxSatisfying(versions, range));
-        """
-        result = subprocess.run(['node', '-e', node_script], capture_output=True, text=True, check=True)
-        latest_version = result.stdout.strip()
-        print(f"[+] latest_version: {latest_version}")
-        return latest_version
-    except subprocess.CalledProcessError as e:
-        print(f"Error occurred: {e}")
-        return None
-
-def get_onewalk_dep(g, pkg_name, pkg_version, working):
-    """
-    - Description: 주어진 패키지의 종속 패키지들을 확인 + 정규화
-    - Input: 지금까지 만든 graph, 검사하고 싶은 패키지 이름, 버전
-    - Output: 'name: version (json)' 형식으로 만들어진 dictionary 
-    """
-
-    print(f"+++++ get_onewalk_dep for {pkg_name}")
-    dep_dict = {}
-    try:
-        dep_result = read_dependencies(pkg_name, pkg_version)
-        print(f"+++++ dep_result: {dep_result}")
-        # view 한 의존성 저장
-        dep_dict = dep_result
-
-    except subprocess.CalledProcessError as e:
-        print(f"Error occurred while fetching dependencies for {pkg_name}: {e}")
-        return g, working, dep_dict
-
-    except json.JSONDecodeError as e:
-        # 다음 디펜던시가 없어서 발생
-        print(f"JSON decode error: {e}")
-        return g, working, dep_dict
-
-    # 결과값 없으면 탈출
-    if not isinstance(dep_dict, dict):
-        #print(f"[-] get_onewalk_dep(): No dependencies for {pkg_name}.")
-        return g, working, dep_dict
-
-    for name, version_range in dep_dict.items():
-        try:
-            # npm view 명령어를 사용하여 모든 버전을 가져오기
-            dep_result = subprocess.run(['npm', 'view', name, 'versions', '--json'], capture_output=True, text=True, check=True)
-            all_versions = json.loads(dep_result.stdout)
-
-            # 최신 버전 가져오기
-            latest_version = get_latest_version(version_range, all_versions)
-
-            if latest_version:
-                dep_dict[name] = latest_version
-            else:
-                dep_dict[name] = "0.0.0"
-        except subprocess.CalledProcessError as e:
-            print(f"Error occurred while fetching versions for {name}: {e}")
-            dep_dict[name] = "0.0.0"
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}")
-            dep_dict[name] = "0.0.0"
-
-    return g, working, dep_dict
-
-        
-
-def make_subgraph(g, pkg_name, pkg_version, working, dep_dict):
-    """
-    - Description: pkg_name에 맞는 서브그래프를 그리고 working 리스트 업데이트
-    - Input: 전체 그래프 g, upstream 패키지 이름, 버전, 
-    - Output:
-    ** upstream 정보: 'pkg_name@pkg_version'
-    ** downstream 정보: 'name@version'
-  
-    """ 
-
-
-    upstream_str = f"{pkg_name}@{pkg_version}"
-
-    for name, version in dep_dict.items():
-        #정규표현화된 버전정보를 working 리스트에 저장
-        downstream_str = f"{name}@{version}"
-        #새로운 subgraph를 만들기전 이미 있는 그래프인지 아닌지 확인
-        if g.get_subgraph(name): # <- 특정패키지 O
-            #print(f"Subgraph '{name}' exists.") 
-            
-            #해당 서브그래프에 버전이 이미 있는지 확인하고 없으면 추가합니다.
-            if downstream_str not in g.get_subgraph(name).nodes(): # <-특정패키지 O, but 특정버전 X!!!
-                
-                g.get_subgraph(name).add_node(downstream_str)
-                #print(f"Subgraph node '{version} of {name}' is just made.")
-                working.append(downstream_str)
-            else: # <-특정패키지 O, and 특정버전 O!!!
-                print(f"Subgraph node '{version} of {name}' already exists.")
-                # 얘는 특정 패키지의 특정 버전이 있는 경우임..! 엣지만 만든다면 여기서 사이클을 막을 수있음!! 얘만 암것두 안하고 다음 for문으로 넘어가는 방식으로 해결함
-        else:
-            #이 패키지 이름으로 만들어진 서브그래프가 없음 = 처음 나온 패키지라는 뜻!
-            print(f"Subgraph {name} does not exist.")
-
-            working.append(downstream_str)
-            
-            #서브그래프 없으니 새롭게 만들기. 패키지 name이 subgraph의 이름이 되고, 패키지 version이 노드의 이름이 된다.
-            subgraph_name = name
-            g.add_subgraph(name=subgraph_name)
-            g.get_subgraph(subgraph_name).graph_attr['label'] = f"*{name}*"  # 라벨은 시각화를 위한 듯
-            
-            # Add nodes with versions to the subgraph
-            #자기 자신이면 노드 생성 X
-            g.get_subgraph(subgraph_name).add_node(downstream_str)
-
-
-        #서브그래프는 있어도 자식노드와 연결시키는 엣지는 없을 수 있음
-        for sg in g.subgraphs(): #모든 서브그래프를 반복적으로 확인
-            if sg.name == pkg_name:
-        # 노드 찾기 및 연결
-                if sg.has_node(upstream_str):
-                    #진짜 그래프의 노드끼리 연결
-                    parent = g.get_subgraph(pkg_name).get_node(upstream_str)
-                    #print(f"부모 확인: {parent}")
-                    child = g.get_subgraph(name).get_node(downstream_str)
-                    #print(f"자식 확인: {child}")
-                    g.add_edge(g.get_subgraph(pkg_name).get_node(upstream_str), g.get_subgraph(name).get_node(downstream_str))
-
-    return g, working
-
- 
-def process_package(g, working):
-    """
-    Description: 주어진 패키지(package_name)의 종속되어있는 패키지 정보를
-    그래프 g에 노드, 간선 형태로 반복 업데이트
-    - Input: g
-    - Output: 
-    """
-    if working != []:
-        
-        package_str = working.pop(0)
-        package_name, package_version = package_str.rsplit('@',1)
-
-
-        g, working, dep_dict = get_onewalk_dep(g, package_name, package_version, working)
-        result = make_subgraph(g, package_name, package_version, working, dep_dict)
-
-        g = result[0]
-        working_pkg_list = result[1]
-
-        g = process_package(g, working_pkg_list)        
-
-    return g
-
 def combine_graphs(graph1, graph2):
     """
     - Description: 두 개의 그래프를 결합하여 새로운 그래프를 만듭니다.
+                   (포레스트를 만들 때는 복사 없이 g.begin_delta()/end_delta()/apply_delta()를 사용)
     - Input: graph1는 새로운 그래프 graph2는 원래 있던 그래프
     - Output: 합친 그래프
     """
     combined_graph = graph1.copy()  # 첫 번째 그래프를 복사하여 새로운 그래프 생성
-    # graph2의 모든 서브그래프를 반복하여 추가 <- 이렇게 해줘야 서브그래프의 모든 요소가 복제되어 combine됨. 안그러면 이름이 복제안되거나.. 
-    for subgraph in graph2.subgraphs():
-        subgraph_name = subgraph.name  # 서브그래프의 이름 가져오기
-        subgraph_attr = subgraph.graph_attr  # 서브그래프의 속성 가져오기
-
-        # 새로운 그래프에 동일한 이름과 속성으로 서브그래프 생성
-        new_subgraph = combined_graph.add_subgraph(name=subgraph_name, **subgraph_attr)
-
-        # 서브그래프의 노드와 엣지를 새로운 서브그래프에 추가
-        for node in subgraph.nodes():
-            new_subgraph.add_node(node, **subgraph.get_node(node).attr)
-        for edge in subgraph.edges():
-            new_subgraph.add_edge(*edge, **subgraph.get_edge(*edge).attr)
+    # graph2의 모든 노드와 엣지를 추가 (패키지 인덱스는 노드를 추가할 때 같이 만들어짐)
+    combined_graph.update(graph2)
     return combined_graph
 
 def create_graph(): 
@@ -274,7 +78,7 @@ def create_graph():
     - Input: 
     - Output: 초기화된 그래프 g
     """
-    G = pgv.AGraph(directed=True)
+    G = DepGraph()
     return G
 
 
@@ -291,15 +95,26 @@ def save_graph_as_json(G):
         'edges': list(G.edges())
     }
 
-    with open("entire_forest.json", 'w') as f:
+    # 임시 파일에 다 쓴 다음 교체해서, 저장하다 죽어도 이전 entire_forest.json은 그대로 남음
+    with open("entire_forest.json.tmp", 'w') as f:
         json.dump(graph_dict, f)  # JSON 파일로 저장
+    os.replace("entire_forest.json.tmp", "entire_forest.json")
 
-def process_packages_from_csv(lines_to_process, g):
+def save_graph_as_snapshot(G):
     """
-    - Description: csv의 패키지이름과 패키지버전 정보를 읽어 transitive하게 그래프 g를 만듭니다.
-    - Input: 모든 패키지 info가 있는 csv, 초기화되어있는 그래프 g
-    - Output: 모든 패키지 info가 추가된 그래프 g
+    - Description: 그래프를 바이너리 스냅샷(문자열 테이블 + CSR 배열)으로 저장, ForestSnapshot으로 mmap 해서 바로 열 수 있음
+    - Input: 모든 패키지 info가 추가된 그래프 g
+    - Output: entire_forest.snapshot 파일 (return 값 없음)
     """
+    write_snapshot(G, "entire_forest.snapshot")
+
+def build_rows(lines_to_process, g, max_depth=None):
+    """
+    - Description: csv 행들의 패키지이름과 패키지버전마다 transitive하게 그래프 g에 의존성을 추가 (저장은 하지 않음)
+    - Input: csv 행들, 그래프 g, 의존성을 펼칠 최대 depth (None이면 끝까지)
+    - Output: 업데이트된 그래프 g
+    """
+    checkpoint = builder.checkpoint
 
     for row in lines_to_process:
         package_name = row[0]  # 첫 번째 열의 값은 the package name
@@ -316,34 +131,63 @@ def process_packages_from_csv(lines_to_process, g):
                 # 현재 시간 가져오기
                 current_time = datetime.datetime.now()
                 print(f"\n\n현재 시간:", current_time)
-                package_str = f"{package_name}@{version}"
+                package_str = make_key(package_name, version)
                 print(f"Processing {package_str}")
 
-                package_subgraph = g.subgraph(name = package_name)
-                package_subgraph.graph_attr['label'] = package_name
-                package_subgraph.add_node(package_str)
-
                 # Prepare to check dependencies and process them 전의적의존성 체크
+                # 하나의 포레스트 g를 그대로 수정하고, 이 루트에서 새로 생긴 노드/엣지(delta)만 기록 (그래프 복사 X)
+                if checkpoint is not None and package_str in checkpoint.completed:
+                    print(f"Skipping {package_str}: already done in checkpoint")
+                    continue
                 working = []
                 working.append(package_str)
-                this_graph = process_package(g, working)
-                g = combine_graphs(this_graph, g)
+                start_depth = 0
+                if checkpoint is not None and checkpoint.pending_root == package_str:
+                    # 지난번에 이 루트를 하다가 멈췄으면 기록된 frontier부터 이어감
+                    working = list(checkpoint.pending_frontier)
+                    start_depth = checkpoint.pending_depth
+                    print(f"Resuming {package_str} at depth {start_depth} ({len(working)} nodes in frontier)")
+                g.begin_delta()
+                if checkpoint is not None:
+                    checkpoint.begin_root(package_str)
+                g = builder.process_package(g, working, max_depth, start_depth)
+                if checkpoint is not None:
+                    checkpoint.finish_root(g)
+                delta = g.end_delta()
+                print(f"[+] {package_str}: +{len(delta.nodes)} nodes, +{len(delta.edges)} edges")
+
+    return g
+
+
+def process_packages_from_csv(lines_to_process, g, max_depth=None):
+    """
+    - Description: csv의 패키지이름과 패키지버전 정보를 읽어 transitive하게 그래프 g를 만듭니다.
+    - Input: 모든 패키지 info가 있는 csv, 초기화되어있는 그래프 g, 의존성을 펼칠 최대 depth (None이면 끝까지)
+    - Output: 모든 패키지 info가 추가된 그래프 g
+    """
+    g = build_rows(lines_to_process, g, max_depth)
 
     # After processing all rows, save the graph structure
     save_graph_as_json(g)
+    save_graph_as_snapshot(g)
+
+    # 이번 배치에서 resolution cache가 얼마나 도움이 됐는지 출력
+    builder.resolution_cache.flush()
+    print(f"[+] resolution cache: {builder.resolution_cache.stats()}")
+    print(f"[+] version index: {builder.version_index.stats()}")
 
     # Additional processing or output
-    for sg in g.subgraphs():
-        print(sg)
-        print("Subgraph name:", sg.name)
+    print(g)
+    for name in g.packages():
+        print("Subgraph name:", name)
 
     return g
 
 
-def seperate_csv(csv_path, csv_line, g): 
+def seperate_csv(csv_path, csv_line, g, max_depth=None): 
     """
     - Description: input으로 csv 파일과 라인 번호를 받아 라인 10씩 쪼갠 값을 리턴
-    - Input: csv 파일 주소, line 수
+    - Input: csv 파일 주소, line 수, 의존성을 펼칠 최대 depth (None이면 끝까지)
     - Output: 
     """
     try:
@@ -360,7 +204,7 @@ def seperate_csv(csv_path, csv_line, g):
                 if len(lines_to_process) == 10:
                     # 10줄을 다 모으면 process_packages_from_csv 함수 호출
                     #print(f"[+++++++++++++++] lines_to_process = {lines_to_process}")
-                    g = process_packages_from_csv(lines_to_process, g)
+                    g = process_packages_from_csv(lines_to_process, g, max_depth)
                     #print(f"[+++++++++++++++] ggggggggggggggggggggggggggggggggggggggg = {g}")
                     lines_to_process = []
                     current_line = line_number + 1  # 현재 라인 번호를 업데이트
@@ -368,7 +212,7 @@ def seperate_csv(csv_path, csv_line, g):
             # 남은 줄이 있다면 마지막으로 처리
             if lines_to_process:
                 #print(f"[+++++++++++++++] last lines_to_process = {lines_to_process}")
-                g = process_packages_from_csv(lines_to_process,g)
+                g = process_packages_from_csv(lines_to_process, g, max_depth)
                 #print(f"Middle ggggggggggggggggggggggggggggggggggggggg : {g}")
         return g
     except FileNotFoundError:
@@ -379,50 +223,218 @@ def seperate_csv(csv_path, csv_line, g):
         print(f"An unexpected error occurred: {e}")
 
 
+def iter_csv_chunks(csv_path, csv_line, chunk_size=10):
+    """
+    - Description: csv를 csv_line번째 줄부터 chunk_size줄씩 묶어서 돌려줌
+    - Input: csv 파일 주소, 시작 라인 번호, 묶을 줄 수
+    - Output: 행 리스트를 하나씩 돌려주는 generator
+    """
+    with open(csv_path, mode='r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        for _ in range(csv_line - 1):  # 시작 라인까지 스킵
+            next(reader)
+        lines_to_process = []
+        for row in reader:
+            lines_to_process.append(row)
+            if len(lines_to_process) == chunk_size:
+                yield lines_to_process
+                lines_to_process = []
+        if lines_to_process:
+            yield lines_to_process
+
+
+def _init_shard_worker(offline_mode, resolve_as_of):
+    """
+    - Description: 워커 프로세스마다 부모의 설정으로 ForestBuilder를 새로 만듦
+                   fork가 아닌 spawn(macOS 기본값)으로 시작해도 오프라인 모드와 해석 기준 시각이 그대로 전달되도록 인자로 받음
+                   SQLite 연결은 워커마다 새로 열고 (version index, dependency store는 read-only + mmap이라 OS page cache를 같이 씀),
+                   체크포인트 journal은 부모 프로세스만 씀 (워커는 shard 파일이 곧 체크포인트)
+    - Input: 부모 builder의 offline_mode, resolve_as_of
+    - Output: 없음
+    """
+    global builder
+    builder = ForestBuilder(offline_mode=offline_mode, resolve_as_of=resolve_as_of)
+
+
+def build_shard(job):
+    """
+    - Description: 워커 프로세스에서 csv 묶음 하나로 독립된 그래프를 만들어 partial forest 파일로 저장
+    - Input: (shard 번호, csv 행들, 최대 depth, shard 디렉토리)
+    - Output: (저장한 파일 경로, 노드 수, 엣지 수)
+    """
+    shard_index, lines_to_process, max_depth, shard_directory = job
+    g = build_rows(lines_to_process, create_graph(), max_depth)
+    path = os.path.join(shard_directory, f"partial_forest_shard_{shard_index:05d}.ndjson")
+    save_partial_forest_ndjson(g, path)
+    builder.resolution_cache.flush()
+    return path, g.number_of_nodes(), g.number_of_edges()
+
+
+def build_forest_parallel(csv_path, csv_line, g, workers, max_depth=None, shard_directory='./shards', resume=False):
+    """
+    - Description: csv를 10줄씩 묶어서 프로세스 풀로 동시에 처리하고, shard별 partial forest를 마지막에 g로 합침
+                   (노드/엣지 중복은 합칠 때 걸러짐)
+    - Input: csv 파일 주소, 시작 라인 번호, 합칠 그래프 g, 워커 프로세스 수, 최대 depth, shard 파일을 둘 디렉토리,
+             resume - 이미 저장된 shard는 다시 만들지 않음
+    - Output: 모든 shard가 합쳐진 그래프 g
+    """
+    os.makedirs(shard_directory, exist_ok=True)
+    shard_paths = []
+    if resume:
+        # shard 파일은 다 쓴 다음 이름을 바꿔서 저장하므로 있는 파일은 끝난 shard
+        shard_paths = [os.path.join(shard_directory, filename) for filename in os.listdir(shard_directory)
+                       if filename.startswith('partial_forest_shard_') and filename.endswith('.ndjson')]
+        print(f"[+] resuming with {len(shard_paths)} finished shards")
+    else:
+        # 이전 실행에서 남은 shard 파일이 섞이지 않게 지움
+        for filename in os.listdir(shard_directory):
+            if filename.startswith('partial_forest_shard_'):
+                os.remove(os.path.join(shard_directory, filename))
+    finished = set(shard_paths)
+
+    start_time = time.perf_counter()
+    jobs = ((shard_index, lines_to_process, max_depth, shard_directory)
+            for shard_index, lines_to_process in enumerate(iter_csv_chunks(csv_path, csv_line))
+            if os.path.join(shard_directory, f"partial_forest_shard_{shard_index:05d}.ndjson") not in finished)
+    with Pool(workers, initializer=_init_shard_worker, initargs=(builder.offline_mode, builder.resolve_as_of)) as pool:
+        for path, node_count, edge_count in pool.imap_unordered(build_shard, jobs):
+            shard_paths.append(path)
+            print(f"[+] shard {path}: {node_count} nodes, {edge_count} edges")
+
+    g = merge_partial_forests(sorted(shard_paths), g, workers)
+    print(f"[+] {len(shard_paths)} shards merged into {g} in {time.perf_counter() - start_time:.1f}s")
+    save_graph_as_json(g)
+    save_graph_as_snapshot(g)
+    return g
+
+
 if __name__ == "__main__":
 
     # partial_forest.json 파일들이 있는 디렉토리 경로 설정
     partial_forest_directory = './'
 
+    # '--'로 시작하는 옵션과 위치 인자를 나눔
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    # --offline: versions 폴더로 만든 인덱스만 사용하고 npm view는 부르지 않음
+    builder.offline_mode = '--offline' in options
+
+    # --resume: ./checkpoint에 남은 스냅샷과 journal로 멈춘 곳부터 이어감 (끝난 루트는 다시 돌지 않음)
+    resume = '--resume' in options
+
+    # --max-depth=N: 루트에서 N 단계까지만 의존성을 펼침
+    # --workers=N: 포레스트를 N개 프로세스로 나눠서 만들고, partial forest들도 N개 프로세스로 합침
+    # --as-of=DATE: DATE(2021-06-01, ISO 8601)까지 publish 된 버전으로만 range를 해석
+    # --render=background|sync|skip: 포레스트와 reverse dependency tree 그림을 다른 프로세스에서 그릴지(기본), 기다릴지, 그리지 않을지
+    # --collapse: 패키지마다 노드 하나로 합쳐서 그림, --max-nodes=N / --max-edges=N: 그릴 노드 / 간선 예산 (0이면 제한 없음)
+    # --export=path: 레이아웃 없이 .graphml / .gexf / .dot으로 스트리밍 내보내기
+    # --order=path: 사이클을 줄인 DAG의 위상 순서(의존받는 쪽 먼저)로 노드를 한 줄씩 저장
+    max_depth = None
+    workers = 1
+    render_mode = 'background'
+    render_max_nodes = DEFAULT_MAX_NODES
+    render_max_edges = DEFAULT_MAX_EDGES
+    export_path = None
+    order_path = None
+    for option in options:
+        if option.startswith('--max-depth='):
+            max_depth = int(option.split('=', 1)[1])
+        elif option.startswith('--workers='):
+            workers = int(option.split('=', 1)[1])
+        elif option.startswith('--as-of='):
+            builder.resolve_as_of = parse_publish_time(option.split('=', 1)[1])
+            if builder.resolve_as_of is None:
+                print(f"[ERROR] cannot parse {option}, resolving as of now")
+        elif option.startswith('--render='):
+            render_mode = option.split('=', 1)[1]
+        elif option.startswith('--max-nodes='):
+            render_max_nodes = int(option.split('=', 1)[1]) or None
+        elif option.startswith('--max-edges='):
+            render_max_edges = int(option.split('=', 1)[1]) or None
+        elif option.startswith('--export='):
+            export_path = option.split('=', 1)[1]
+        elif option.startswith('--order='):
+            order_path = option.split('=', 1)[1]
+
     # 사용자 입력을 받아서 뽑을 tree 정함
-    if len(sys.argv) != 3:
-        print("[ERROR] Usage: python3 script_name.py tree_package_name tree_package_version\n This code returns the downstream graph that depends on 'tree_package_name'@'tree_package_version'")
+    if len(args) != 2:
+        print("[ERROR] Usage: python3 script_name.py tree_package_name tree_package_version [--offline] [--max-depth=N] [--workers=N] [--resume] [--as-of=DATE] [--render=background|sync|skip] [--collapse] [--max-nodes=N] [--max-edges=N] [--export=path] [--order=path]\n This code returns the downstream graph that depends on 'tree_package_name'@'tree_package_version'")
     
     else:
-        tree_name = sys.argv[1]  # 첫 번째 인자는 패키지 이름
-        tree_version = sys.argv[2]  # 두 번째 인자는 패키지 버전
+        tree_name = args[0]  # 첫 번째 인자는 패키지 이름
+        tree_version = args[1]  # 두 번째 인자는 패키지 버전
         print(f"[+] TREE_NAME : {tree_name}")
         print(f"[+] TREE_VERSION : {tree_version}")
 
-    g = create_graph()
+    checkpoint = BuildJournal('./checkpoint')
+    builder.checkpoint = checkpoint
+    g = checkpoint.resume() if resume else checkpoint.start()
 
     # partial_forest들을 전체 그래프 g에 통합
-    g = load_partial_forests(partial_forest_directory, g)
+    g = load_partial_forests(partial_forest_directory, g, workers)
 
     #포레스트를 구성할 패키지 정보가 담긴 csv
     csv_path = './info_packages/info_packages8.csv'
-    g = seperate_csv(csv_path, 2, g)
+    if workers > 1:
+        # --workers=N: csv 묶음들을 N개 프로세스로 나눠서 만들고 마지막에 합침
+        g = build_forest_parallel(csv_path, 2, g, workers, max_depth, resume=resume)
+    else:
+        g = seperate_csv(csv_path, 2, g, max_depth)
+    if g is not None:
+        checkpoint.snapshot(g)
+    checkpoint.close()
     if g is None:
         raise ValueError("'load_partial_forests' returned None")
 
     print(f"Last ggggggggggggggggggggggggggggggggggggggg : {g}")
 
-    # 최종적으로 그래프를 레이아웃하고 저장
+    # make_subgraph는 이미 있는 노드를 다시 펼치지 않을 뿐 사이클 간선은 그대로 남으므로, 여기서 SCC를 구해 보고함
+    condensation = Condensation.from_graph(g)
+    report_cycles(condensation)
+    if order_path:
+        save_topological_order(condensation, order_path)
+
+    # 최종적으로 그래프를 레이아웃하고 저장 (Graphviz는 여기서 내보낼 때만 사용)
+    # 포레스트 전체를 dot으로 그리면 몇 시간씩 걸리므로 예산 안에서만 그리고, 기본은 다른 프로세스에서 그림
+    render_processes = []
     if g is not None:
-        g.layout(prog="dot")  # use dot
-        g.draw("popular_forest.pdf")  # Save as PDF format
+        if export_path:
+            export_graph(g, export_path, collapse='--collapse' in options)
+            print(f"[+] forest exported to {export_path}")
+        if render_mode == 'sync':
+            render_graph(g, "popular_forest.pdf", collapse='--collapse' in options,
+                         max_nodes=render_max_nodes, max_edges=render_max_edges)
+        elif render_mode == 'background':
+            render_processes.append(render_in_background(g, "popular_forest.pdf", collapse='--collapse' in options,
+                                                          max_nodes=render_max_nodes, max_edges=render_max_edges))
     else:
         print("Error: Graph 'g' is None")
 
     #tree 뽑는 과정 ing..
     print("tree 뽑는 과정 ing..")
-    reverse_dependency_tree = get_reverse_dependency_tree(tree_name, tree_version, g)
+    # 방금 만든 메모리의 g로 reverse index를 만들어서 추출
+    # (entire_forest.json은 이번 실행에서 저장하지 않았거나 예전 포레스트일 수 있으므로 g가 없을 때만 파일에서 읽음)
+    if g is not None:
+        reverse_index = ReverseIndex.from_graph(g)
+    else:
+        reverse_index = load_or_build('entire_forest.json')
+    reverse_dependency_tree = get_reverse_dependency_tree(tree_name, tree_version, g, reverse_index=reverse_index)
 
     if reverse_dependency_tree is not None:
-        reverse_dependency_tree.layout(prog="dot")
-        reverse_dependency_tree.draw("reverse_dependency_tree.pdf")
+        # 포레스트 그림과 같은 예산, 같은 방식으로 그림 (background면 기다리지 않고 다음으로 넘어감)
+        if render_mode == 'sync':
+            render_graph(reverse_dependency_tree, "reverse_dependency_tree.pdf",
+                         max_nodes=render_max_nodes, max_edges=render_max_edges)
+        elif render_mode == 'background':
+            render_processes.append(render_in_background(reverse_dependency_tree, "reverse_dependency_tree.pdf",
+                                                          max_nodes=render_max_nodes, max_edges=render_max_edges))
         print("SUCCESS :D")
 
+    for render_process in render_processes:
+        # 포레스트와 reverse dependency tree 그림이 끝날 때까지 기다림
+        render_process.join()
+
 
     """
     - Description: 
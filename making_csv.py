@@ -4,6 +4,7 @@ import csv
 import re
 import datetime
 import glob
+from node_key import escape_name
 
 def read_json_file(json_file_path):
     """ JSON 파일 읽기 """
@@ -17,7 +18,7 @@ def get_versions(pkg_name, versions_folder):
     versions_list = []
 
     # 해당 패키지 이름을 포함하는 모든 버전 리스트 파일 검색
-    version_files = glob.glob(os.path.join(versions_folder, f"{pkg_name.replace('/', '%')}@*_versionList.json"))
+    version_files = glob.glob(os.path.join(versions_folder, f"{escape_name(pkg_name)}@*_versionList.json"))
     for version_file in version_files:
         with open(version_file, 'r') as f:
             versions = json.load(f)
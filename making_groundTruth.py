@@ -1,54 +1,75 @@
+import os
 import json
 import subprocess
+from npm_fetcher import NpmFetcher
+from registry_client import RegistryClient
+from node_key import split_key, package_filename, record_filename
 
-def process_package(pkg_name):
+def save_package_metadata(pkg_name, stdout):
+    """ npm view <pkg> --json 결과를 metadata, versions, dependencies 폴더에 저장 """
     try:
-        # npm view 명령 실행
-        dep_result = subprocess.run(['npm', 'view', pkg_name, '--json'], 
-                                    capture_output=True, text=True, check=True)
-        dep_data = json.loads(dep_result.stdout)
+        dep_data = json.loads(stdout)
 
-        with open(f"./metadata/{pkg_name}_metadata.json", 'w') as outfile:
+        with open(os.path.join('./metadata', package_filename(pkg_name, '_metadata.json')), 'w') as outfile:
             json.dump(dep_data, outfile)
 
         # "_id" 정보 추출
         pkg_id = dep_data.get("_id")
         if pkg_id:
             # "_id" 정보에서 이름과 버전 추출
-            current_name, current_version = pkg_id.rsplit("@", 1)
+            current_name, current_version = split_key(pkg_id)
             print(f"Package Name: {current_name}, Version: {current_version}")
 
             # 버전 정보 저장
-            with open(f"./versions/{current_name}@{current_version}_versionList.json", 'w') as version_file:
+            version_filename = record_filename(current_name, current_version, '_versionList.json')
+            with open(os.path.join('./versions', version_filename), 'w') as version_file:
                 json.dump(dep_data.get("versions"), version_file)
-                print(f"Versions saved: {current_name}@{current_version}_versionList.json")
+                print(f"Versions saved: {version_filename}")
 
         pkg_dependency = dep_data.get("dependencies")
         if pkg_dependency:
             # 의존성 정보 저장
             dependencies = dep_data.get("dependencies", {})
-            with open(f"./dependencies/{current_name}@{current_version}_dependencies.json", 'w') as dep_file:
+            dependency_filename = record_filename(current_name, current_version, '_dependencies.json')
+            with open(os.path.join('./dependencies', dependency_filename), 'w') as dep_file:
                 json.dump(dependencies, dep_file)
-                print(f"Dependencies saved: {current_name}@{current_version}_dependencies.json")
+                print(f"Dependencies saved: {dependency_filename}")
         else:
             print(f"[+] No Dependencies : {current_name}@{current_version}")
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error occurred while fetching information for {pkg_name}: {e}")
-
     except json.JSONDecodeError as e:
         print(f"JSON decode error occurred for {pkg_name}: {e}")
+    except ValueError as e:
+        print(f"Invalid _id for {pkg_name}: {e}")
+
+def process_package(pkg_name, fetcher):
+    try:
+        # npm view 명령 실행
+        stdout = fetcher.view([pkg_name, '--json'])
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        print(f"Error occurred while fetching information for {pkg_name}: {e}")
+        return
+    save_package_metadata(pkg_name, stdout)
 
-def main(json_file):
+def main(json_file, fetcher):
     # JSON 파일 읽기
     with open(json_file, 'r') as file:
         package_names = json.load(file)
 
-    # 각 패키지에 대해 작업 수행
-    for pkg_name in package_names:
+    # 각 패키지에 대해 작업 수행 (npm view는 fetcher가 여러 개 동시에 실행)
+    jobs = ((pkg_name, [pkg_name, '--json']) for pkg_name in package_names)
+    for pkg_name, stdout, error in fetcher.map(jobs):
         print(f"Processing package: {pkg_name}")
-        process_package(pkg_name)
+        if error is not None:
+            print(f"Error occurred while fetching information for {pkg_name}: {error}")
+            continue
+        save_package_metadata(pkg_name, stdout)
+    print(f"[+] fetcher: {fetcher.stats()}")
 
-# JSON 파일 경로 지정
-json_file = 'all_npm_package_names_24051.json'
-main(json_file)
\ No newline at end of file
+if __name__ == "__main__":
+    # JSON 파일 경로 지정
+    json_file = 'all_npm_package_names_24051.json'
+    # npm CLI 대신 registry에 keep-alive HTTP로 직접 요청
+    registry_client = RegistryClient('https://registry.npmjs.org')
+    fetcher = NpmFetcher(concurrency=16, rate=50, retries=3, backoff=1.0, timeout=60, fetch_function=registry_client.view)
+    main(json_file, fetcher)
@@ -3,6 +3,10 @@ import json
 import subprocess
 import re
 import datetime
+from npm_fetcher import NpmFetcher
+from registry_client import RegistryClient
+from packument_fanout import fanout_packument
+from node_key import make_key, unescape_name, package_filename, record_filename, parse_record_filename
 
 def read_processed_packages(log_file_path):
     """ 로그 파일에서 처리된 패키지 이름을 읽어 리스트로 반환합니다. """
@@ -15,33 +19,66 @@ def read_processed_packages(log_file_path):
                 suffix = " as it has been processed already."
                 start = line.find(prefix) + len(prefix)
                 end = line.find(suffix)
-                package_name = line[start:end].strip()
-                if '%' in package_name:
-                    package_name = package_name.replace('%', '/')
+                package_name = unescape_name(line[start:end].strip())
                 processed_packages.add(package_name)
             elif "++++++++++ Processing package: " in line:
                 # 일반 처리 로그에서 패키지 이름 추출
                 _, package_name = line.split(':', 1)
-                if '%' in package_name:
-                    package_name = package_name.replace('%', '/')
-                processed_packages.add(package_name.strip())
+                processed_packages.add(unescape_name(package_name.strip()))
     print(processed_packages)
     return processed_packages
 
 
-def process_versions_folder(input_folder_path, output_folder_path, processed_packages_by_log):
+def load_packument(pkg_name, packument_folder, registry_client):
+    """
+    - Description: 패키지의 packument를 한 번만 가져옴 (packuments 폴더에 있으면 네트워크 요청 없이 읽음)
+    - Input: 패키지 이름, packument를 저장해두는 폴더 (None 가능), RegistryClient (None 가능)
+    - Output: packument dictionary, 가져올 수 없으면 None
+    """
+    packument_file = None
+    if packument_folder:
+        packument_file = os.path.join(packument_folder, package_filename(pkg_name, '_packument.json'))
+        if os.path.exists(packument_file):
+            try:
+                with open(packument_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                # 예전에 쓰다 만 파일, 없는 것으로 보고 다시 가져와서 덮어씀
+                print(f"JSON decode error in {packument_file}: {e}")
+    if registry_client is None:
+        return None
+    try:
+        # 축약 packument에도 모든 버전의 dependencies가 들어있음
+        packument = registry_client.get_packument(pkg_name, abbreviated=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Error occurred while fetching packument for {pkg_name}: {e}")
+        return None
+    if packument_file:
+        # 임시 파일에 다 쓴 뒤 교체해서, 중간에 죽어도 반쯤 쓴 packument가 남지 않게 함 (워커끼리 임시 파일이 겹치지 않도록 pid를 붙임)
+        tmp_path = f"{packument_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(packument, f)
+        os.replace(tmp_path, packument_file)
+    return packument
+
+
+def process_versions_folder(input_folder_path, output_folder_path, processed_packages_by_log, fetcher=None, registry_client=None, packument_folder=None):
+    """
+    - Description: versions 폴더의 패키지마다 모든 n.n.n 버전의 dependencies 파일을 만든다
+                   registry_client나 packument_folder가 있으면 패키지당 packument 하나로 모든 버전을 한꺼번에 만들고,
+                   없으면 버전마다 npm view를 (fetcher로 동시에) 실행한다
+    """
+    if fetcher is None:
+        fetcher = NpmFetcher()
+
     # 입력 폴더 내 모든 파일을 읽어온다
     files = os.listdir(input_folder_path)
     
     for file in files:
-        if file.endswith('_versionList.json'):
-            # 파일 이름에서 패키지 이름과 버전을 추출한다
-            file_base = file.rsplit('_', 1)[0]
-            pkg_name, pkg_version = file_base.rsplit('@', 1)
-            
-            # 패키지 이름에 %가 있으면 /로 변경한다
-            if '%' in pkg_name:
-                pkg_name = pkg_name.replace('%', '/')
+        parsed = parse_record_filename(file, '_versionList.json')
+        if parsed is not None:
+            # 파일 이름에서 패키지 이름과 버전을 추출한다 (scoped 이름의 %는 /로 돌려놓음)
+            pkg_name, pkg_version = parsed
 
             # 패키지가 이미 처리된 경우 건너뛴다
             if pkg_name in processed_packages_by_log:
@@ -55,50 +92,58 @@ def process_versions_folder(input_folder_path, output_folder_path, processed_pac
             print(f"\n\n현재 시간:", current_time)
             print(f"++++++++++ Processing package: {pkg_name}")
 
+            # packument 하나에서 모든 버전의 dependencies 파일을 만든다 (버전별 npm view 없음)
+            packument = load_packument(pkg_name, packument_folder, registry_client)
+            if packument is not None:
+                written, skipped = fanout_packument(packument, output_folder_path)
+                print(f"++++++++++ Fan-out {pkg_name}: {written} written, {skipped} skipped")
+                continue
+
             # JSON 파일을 읽어 유효한 버전만 추출한다
             with open(os.path.join(input_folder_path, file), 'r') as f:
                 versions = json.load(f)
             
             valid_versions = [v for v in versions if re.match(r'^\d+\.\d+\.\d+$', v)]
-            
+
+            jobs = []
             for version in valid_versions:
                 print(f"++++++++++ Processing version: {version}")
                 # 결과를 저장할 파일 이름을 구성한다
-                safe_pkg_name = pkg_name.replace('/', '%')
-                output_file = os.path.join(output_folder_path, f"{safe_pkg_name}@{version}_dependencies.json")
+                output_file = os.path.join(output_folder_path, record_filename(pkg_name, version, '_dependencies.json'))
                 
                 # 이미 같은 이름의 JSON 파일이 존재하면 건너뛴다
                 if os.path.exists(output_file):
                     print(f"Skipping {output_file} as it already exists.")
                     continue
-                
-                # npm view 명령을 실행하여 결과를 저장한다
-                command = ['npm', 'view', f'{pkg_name}@{version}', 'dependencies', '--json']
-                try:
-                    result = subprocess.run(command, capture_output=True, text=True, check=True)
-                    dependencies = result.stdout.strip()
+
+                jobs.append(((version, output_file), [make_key(pkg_name, version), 'dependencies', '--json']))
+
+            # npm view 명령을 여러 버전에 대해 동시에 실행하여 결과를 저장한다
+            for (version, output_file), stdout, error in fetcher.map(jobs):
+                if error is not None:
+                    print(f"Error occurred while fetching dependencies for {pkg_name}@{version}: {error}")
+                    continue
+
+                dependencies = stdout.strip()
                     
-                    # 명령어 실행 결과가 비어있는 경우
-                    if not dependencies:
-                        print(f"No dependencies found for {pkg_name}@{version}.")
-                        continue
-
-                    # JSON 디코딩 시도
-                    try:
-                        dep_json = json.loads(dependencies)
-                    except json.JSONDecodeError as e:
-                        print(f"JSON decode error for {pkg_name}@{version}: {e}")
-                        continue
-
-                    # 결과를 파일에 저장
-                    try:
-                        with open(output_file, 'w') as out_f:
-                            json.dump(dep_json, out_f)
-                    except IOError as e:
-                        print(f"Error writing to file {output_file}: {e}")
-                
-                except subprocess.CalledProcessError as e:
-                    print(f"Error occurred while fetching dependencies for {pkg_name}@{version}: {e}")
+                # 명령어 실행 결과가 비어있는 경우
+                if not dependencies:
+                    print(f"No dependencies found for {pkg_name}@{version}.")
+                    continue
+
+                # JSON 디코딩 시도
+                try:
+                    dep_json = json.loads(dependencies)
+                except json.JSONDecodeError as e:
+                    print(f"JSON decode error for {pkg_name}@{version}: {e}")
+                    continue
+
+                # 결과를 파일에 저장
+                try:
+                    with open(output_file, 'w') as out_f:
+                        json.dump(dep_json, out_f)
+                except IOError as e:
+                    print(f"Error writing to file {output_file}: {e}")
 
 
 if __name__ == "__main__":
@@ -113,5 +158,15 @@ if __name__ == "__main__":
     # 로그 파일에서 이미 처리된 패키지 이름을 읽어옵니다.
     processed_packages_by_log = read_processed_packages(log_file_path)
     
-    # 버전 폴더 처리
-    process_versions_folder(input_folder_path, output_folder_path, processed_packages_by_log)
+    # packument를 저장해두는 폴더 (다음에 실행할 때는 네트워크 요청 없이 fan-out)
+    packument_folder = './packuments'
+    if not os.path.exists(packument_folder):
+        os.makedirs(packument_folder)
+
+    # 버전 폴더 처리 (패키지당 packument 하나를 받아 모든 버전을 한꺼번에 저장,
+    # packument를 못 받으면 버전마다 npm view를 동시에 실행)
+    # npm CLI 대신 registry에 keep-alive HTTP로 직접 요청
+    registry_client = RegistryClient('https://registry.npmjs.org')
+    fetcher = NpmFetcher(concurrency=16, rate=50, retries=3, backoff=1.0, timeout=60, fetch_function=registry_client.view)
+    process_versions_folder(input_folder_path, output_folder_path, processed_packages_by_log, fetcher, registry_client, packument_folder)
+    print(f"[+] fetcher: {fetcher.stats()}")
@@ -0,0 +1,74 @@
+# 노드 문자열 'name@version'과 폴더 파일 이름을 만들고 나누는 곳을 여기 한 군데로 모음
+# scoped 패키지('@babel/core')는 이름 맨 앞에도 '@'가 있고 '/'가 들어가므로, 직접 split / replace 하지 말고 여기 함수를 씀
+
+SEPARATOR = '@'
+SCOPE_ESCAPE = '%'  # 파일 이름에서 '/' 대신 쓰는 문자 (npm 패키지 이름에는 '%'가 들어갈 수 없음)
+
+
+def make_key(name, version):
+    """ ('@babel/core', '7.0.0') -> '@babel/core@7.0.0' """
+    return f"{name}{SEPARATOR}{version}"
+
+
+def split_key(key):
+    """
+    - Description: 'name@version'을 (name, version)으로 나눔. scoped 이름의 맨 앞 '@'는 구분자로 보지 않음
+    - Input: 노드 문자열
+    - Output: (패키지 이름, 버전), 버전이 없으면 ValueError ('@babel/core'를 ('', 'babel/core')로 잘못 나누지 않음)
+    """
+    index = key.rfind(SEPARATOR)
+    if index <= 0:
+        raise ValueError(f"invalid node key {key!r} (expected name@version)")
+    return key[:index], key[index + 1:]
+
+
+def key_name(key):
+    return split_key(key)[0]
+
+
+def key_version(key):
+    return split_key(key)[1]
+
+
+# ---------- 파일 이름 ----------
+
+def escape_name(name):
+    """ 패키지 이름을 파일 이름에 쓸 수 있게 바꿈 ('@babel/core' -> '@babel%core') """
+    return name.replace('/', SCOPE_ESCAPE)
+
+
+def unescape_name(safe_name):
+    """ escape_name의 반대 """
+    return safe_name.replace(SCOPE_ESCAPE, '/')
+
+
+def record_filename(name, version, suffix):
+    """ ('@babel/core', '7.0.0', '_dependencies.json') -> '@babel%core@7.0.0_dependencies.json' """
+    return f"{escape_name(name)}{SEPARATOR}{version}{suffix}"
+
+
+def package_filename(name, suffix):
+    """ ('@babel/core', '_metadata.json') -> '@babel%core_metadata.json' """
+    return f"{escape_name(name)}{suffix}"
+
+
+def parse_record_filename(filename, suffix):
+    """
+    - Description: record_filename의 반대
+    - Input: 파일 이름 (경로 없이), 접미사
+    - Output: (패키지 이름, 버전), 형식이 다르면 None
+    """
+    if not filename.endswith(suffix):
+        return None
+    try:
+        safe_name, version = split_key(filename[:len(filename) - len(suffix)])
+    except ValueError:
+        return None
+    return unescape_name(safe_name), version
+
+
+def parse_package_filename(filename, suffix):
+    """ package_filename의 반대, 형식이 다르면 None """
+    if not filename.endswith(suffix):
+        return None
+    return unescape_name(filename[:len(filename) - len(suffix)])
@@ -0,0 +1,125 @@
+import time
+import random
+import threading
+import subprocess
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class RateLimiter:
+    """
+    - Description: 초당 요청 수를 제한하는 token bucket (여러 스레드가 같이 사용)
+    - Input: rate - 초당 최대 요청 수 (None이나 0이면 제한 없음), burst - 한 번에 몰아서 보낼 수 있는 요청 수
+    """
+
+    def __init__(self, rate=None, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                sleep_seconds = (1 - self.tokens) / self.rate
+            time.sleep(sleep_seconds)
+
+
+class NpmFetcher:
+    """
+    - Description: npm 메타데이터 요청(npm view ...)을 여러 개 동시에 보내는 fetcher
+                   동시 실행 수 제한, 초당 요청 수 제한, 지수 backoff 재시도, 요청별 timeout을 지원
+    - Input: concurrency - 동시에 실행할 요청 수, rate - 초당 최대 요청 수,
+             retries - 실패했을 때 다시 시도할 횟수, backoff - 첫 재시도 전 대기 시간(초, 이후 2배씩),
+             timeout - 요청 하나의 최대 시간(초), registry - npm registry 주소 (테스트용 stub registry 등),
+             fetch_function - npm view 대신 쓸 함수 (args, timeout) -> stdout 문자열
+    """
+
+    def __init__(self, concurrency=8, rate=None, retries=3, backoff=1.0, timeout=60, registry=None, fetch_function=None):
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, burst=concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.registry = registry
+        self.fetch_function = fetch_function or self._run_npm_view
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _run_npm_view(self, args, timeout):
+        command = ['npm', 'view', *args]
+        if self.registry:
+            command += ['--registry', self.registry]
+        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=timeout)
+        return result.stdout
+
+    def _should_retry(self, error):
+        # 없는 패키지/버전(E404)은 다시 시도해도 결과가 같음
+        if isinstance(error, subprocess.CalledProcessError):
+            stderr = error.stderr or ''
+            return 'E404' not in stderr and '404 Not Found' not in stderr
+        return True
+
+    def view(self, args):
+        """
+        - Description: npm view 요청 하나를 rate limit과 재시도를 적용해서 실행
+        - Input: npm view 뒤에 붙는 인자 리스트 (예: ['lodash', 'versions', '--json'])
+        - Output: stdout 문자열 (재시도까지 모두 실패하면 마지막 예외를 그대로 raise)
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            with self.lock:
+                self.requests += 1
+            try:
+                return self.fetch_function(args, self.timeout)
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+                if attempt >= self.retries or not self._should_retry(e):
+                    with self.lock:
+                        self.failed += 1
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.1)
+                print(f"[!] npm view {' '.join(args)} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                with self.lock:
+                    self.retried += 1
+                attempt += 1
+                time.sleep(delay)
+
+    def map(self, jobs):
+        """
+        - Description: 여러 요청을 동시에 실행하고 끝나는 순서대로 결과를 돌려줌
+                       한 번에 concurrency * 4개까지만 제출해서 작업 목록이 커도 메모리가 일정함
+        - Input: (key, npm view 인자 리스트) 쌍들 (generator도 가능)
+        - Output: (key, stdout, error)를 하나씩 돌려주는 generator (성공하면 error는 None)
+        """
+        jobs = iter(jobs)
+        window = self.concurrency * 4
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = {}
+            for key, args in islice(jobs, window):
+                pending[executor.submit(self.view, args)] = key
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        yield key, future.result(), None
+                    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+                        yield key, None, e
+                for key, args in islice(jobs, len(done)):
+                    pending[executor.submit(self.view, args)] = key
+
+    def stats(self):
+        return {'requests': self.requests, 'retried': self.retried, 'failed': self.failed}
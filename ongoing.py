@@ -8,6 +8,27 @@ import sys
 import pygraphviz as pgv
 import csv
 from picking_tree import get_reverse_dependency_tree
+from npm_fetcher import NpmFetcher
+from registry_client import RegistryClient
+from node_key import make_key, split_key, key_name
+
+# 패키지 이름 -> (npm view dependencies 결과, 에러)
+prefetched = {}
+
+# npm view를 여러 개 동시에 실행하는 fetcher (npm CLI 대신 registry에 직접 HTTP 요청)
+registry_client = RegistryClient('https://registry.npmjs.org')
+fetcher = NpmFetcher(concurrency=16, rate=50, retries=3, backoff=1.0, timeout=60, fetch_function=registry_client.view)
+
+def prefetch_dependencies(working):
+    """
+    - Description: working 리스트에 있는 패키지들의 의존성을 한꺼번에 동시에 받아둠
+    - Input: 'name@version' 문자열 리스트
+    - Output: 없음 (prefetched에 저장)
+    """
+    names = {key_name(package_str) for package_str in working} - prefetched.keys()
+    jobs = ((name, [name, 'dependencies', '--json']) for name in names)
+    for name, stdout, error in fetcher.map(jobs):
+        prefetched[name] = (stdout, error)
 
 def get_onewalk_dep(g, pkg_name, pkg_version, working): 
     """
@@ -19,11 +40,16 @@ def get_onewalk_dep(g, pkg_name, pkg_version, working):
     #print(f"+++++ get_onewalk_dep for {pkg_name}")
     dep_dict = {}
     try:
-        dep_result = subprocess.run(['npm', 'view', pkg_name, 'dependencies', '--json'], capture_output=True, text=True, check=True)
+        # prefetch_dependencies가 미리 받아둔 결과가 있으면 사용
+        stdout, error = prefetched.get(pkg_name, (None, None))
+        if error is not None:
+            raise error
+        if stdout is None:
+            stdout = fetcher.view([pkg_name, 'dependencies', '--json'])
         #view 한 의존성 저장
-        dep_dict = json.loads(dep_result.stdout)
+        dep_dict = json.loads(stdout)
 
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
         #print(f"Error occurred while fetching dependencies for {pkg_name}: {e}")
         return g, working, dep_dict
 
@@ -59,11 +85,11 @@ def make_subgraph(g, pkg_name, pkg_version, working, dep_dict):
     """ 
 
 
-    upstream_str = f"{pkg_name}@{pkg_version}"
+    upstream_str = make_key(pkg_name, pkg_version)
 
     for name, version in dep_dict.items():
         #정규표현화된 버전정보를 working 리스트에 저장
-        downstream_str = f"{name}@{version}"
+        downstream_str = make_key(name, version)
         #새로운 subgraph를 만들기전 이미 있는 그래프인지 아닌지 확인
         if g.get_subgraph(name): # <- 특정패키지 O
             #print(f"Subgraph '{name}' exists.") 
@@ -117,9 +143,11 @@ def process_package(g, working):
     - Output: 
     """
     if working != []:
-        
+        # 다음에 처리할 패키지들의 의존성을 미리 동시에 받아둠
+        prefetch_dependencies(working)
+
         package_str = working.pop(0)
-        package_name, package_version = package_str.rsplit('@',1)
+        package_name, package_version = split_key(package_str)
 
 
         g, working, dep_dict = get_onewalk_dep(g, package_name, package_version, working)
@@ -181,7 +209,7 @@ if __name__ == "__main__":
         for row in reader:
             package_name = row[1]  # 두 번째 열의 값
             package_version = row[2]  # 세 번째 열의 값
-            package_str = f"{package_name}@{package_version}"
+            package_str = make_key(package_name, package_version)
 
             # Initialize graph for the target
             print("STEP 2")
@@ -208,5 +236,6 @@ if __name__ == "__main__":
     # # tree 뽑는 과정 ing.. 
     reverse_dependency_tree = get_reverse_dependency_tree(tree_name, tree_version, g)
 
-    reverse_dependency_tree.layout(prog="dot")
-    reverse_dependency_tree.draw("reverse_dependency_tree.png")
+    reverse_agraph = reverse_dependency_tree.to_agraph()
+    reverse_agraph.layout(prog="dot")
+    reverse_agraph.draw("reverse_dependency_tree.png")
@@ -0,0 +1,95 @@
+import sys
+import heapq
+import datetime
+from forest_render import open_forest
+from forest_snapshot import ForestSnapshot
+
+
+def iter_package_reachable(g, name, reverse=True, max_depth=None):
+    """
+    - Description: 패키지 -> 패키지 간선만으로 BFS (버전 노드는 펼치지 않음)
+                   reverse면 "어느 버전이든 name을 (transitive하게) 의존하는 패키지", 아니면 name이 의존하는 패키지
+    - Input: DepGraph 또는 ForestSnapshot, 패키지 이름, reverse - 방향, max_depth - 몇 단계까지 (None이면 끝까지)
+    - Output: (패키지 이름, depth, 그 단계로 들어온 버전 간선 수) generator (name 자신은 빼고)
+              버전 단위가 아니라 패키지 단위로 합친 것이므로, 특정 버전에서 실제로 닿는지는 reverse_index로 확인
+    """
+    start_id = g.package_id(name)
+    if start_id is None:
+        return
+    neighbors = g.package_predecessors if reverse else g.package_successors
+    visited = {start_id}
+    frontier = [start_id]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        next_frontier = []
+        for package_id in frontier:
+            for other_id, multiplicity in neighbors(package_id).items():
+                if other_id not in visited:
+                    visited.add(other_id)
+                    next_frontier.append(other_id)
+                    yield g.package_name_of(other_id), depth, multiplicity
+        frontier = next_frontier
+
+
+def package_ranking(g, by='fan_in', top=20):
+    """
+    - Description: 패키지들을 직접 의존하는(fan_in) / 직접 의존하는(fan_out) 서로 다른 패키지 수로 순위를 매김
+                   같은 패키지 안의 간선(다른 버전을 의존)은 세지 않음
+    - Input: DepGraph 또는 ForestSnapshot, by - 'fan_in' 또는 'fan_out', top - 몇 개까지
+    - Output: (패키지 이름, 서로 다른 패키지 수, 버전 간선 수, 버전 수) 리스트 (많은 순)
+    """
+    if by not in ('fan_in', 'fan_out'):
+        raise ValueError(f"unknown ranking {by} (use fan_in or fan_out)")
+    neighbors = g.package_predecessors if by == 'fan_in' else g.package_successors
+
+    def score(package_id):
+        counts = neighbors(package_id)
+        distinct = len(counts) - (package_id in counts)
+        multiplicity = sum(counts.values()) - counts.get(package_id, 0)
+        return distinct, multiplicity
+
+    best = heapq.nlargest(top, range(g.number_of_packages()), key=score)
+    return [(g.package_name_of(package_id), *score(package_id), g.package_size(package_id)) for package_id in best]
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    max_depth = None
+    top = 20
+    for option in options:
+        if option.startswith('--max-depth='):
+            max_depth = int(option.split('=', 1)[1])
+        elif option.startswith('--top='):
+            top = int(option.split('=', 1)[1])
+
+    if len(args) == 3 and args[1] in ('dependents', 'dependencies'):
+        forest_path, mode, name = args
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        g = open_forest(forest_path)
+        if g.package_id(name) is None:
+            print(f"[+] {name} is not in {forest_path}")
+        else:
+            count = 0
+            for package, depth, multiplicity in iter_package_reachable(g, name, mode == 'dependents', max_depth):
+                count += 1
+                if '--count' not in options:
+                    print(f"{depth}\t{package}\t{multiplicity}")
+            print(f"[+] {name}: {count} {mode} packages")
+        if isinstance(g, ForestSnapshot):
+            g.close()
+        print(f"현재 시간:", datetime.datetime.now())
+    elif len(args) == 3 and args[1] == 'rank':
+        forest_path, _, by = args
+        g = open_forest(forest_path)
+        for package, distinct, multiplicity, versions in package_ranking(g, by, top):
+            print(f"{package}\t{distinct} packages\t{multiplicity} version edges\t{versions} versions")
+        if isinstance(g, ForestSnapshot):
+            g.close()
+    else:
+        print("Usage: python3 package_index.py forest(.json|.snapshot) dependents package_name [--max-depth=N] [--count]\n"
+              "       python3 package_index.py forest(.json|.snapshot) dependencies package_name [--max-depth=N] [--count]\n"
+              "       python3 package_index.py forest(.json|.snapshot) rank fan_in|fan_out [--top=N]\n"
+              " This code answers package-level questions from the package -> package edge counts, without expanding versions")
@@ -0,0 +1,131 @@
+import os
+import re
+import sys
+import json
+import datetime
+from node_key import split_key, record_filename
+
+
+VALID_VERSION = re.compile(r'^\d+\.\d+\.\d+$')
+
+
+def is_full_packument(packument):
+    """ registry의 전체(또는 축약) packument처럼 versions가 {버전: manifest}인지 (npm view --json metadata는 버전 리스트) """
+    return isinstance(packument.get('versions'), dict)
+
+
+def iter_packument_versions(packument):
+    """
+    - Description: 전체(또는 축약) packument에서 모든 버전의 의존성을 꺼냄
+    - Input: packument dictionary (is_full_packument가 True인 것)
+    - Output: (패키지 이름, 버전, 의존성 dictionary)를 하나씩 돌려주는 generator
+              (manifest에 dependencies 필드가 없는 버전은 npm view처럼 건너뜀)
+    """
+    name = packument.get('name')
+    for version, manifest in packument['versions'].items():
+        if isinstance(manifest, dict) and 'dependencies' in manifest:
+            yield manifest.get('name', name), version, manifest['dependencies']
+
+
+def iter_version_dependencies(packument):
+    """
+    - Description: packument 하나에서 버전별 의존성을 꺼냄
+                   registry의 전체(또는 축약) packument는 versions가 {버전: manifest}라서 모든 버전이 나오고,
+                   npm view <pkg> --json으로 저장한 metadata는 최신 버전(_id) 하나의 의존성만 들어있음
+    - Input: packument dictionary
+    - Output: (패키지 이름, 버전, 의존성 dictionary)를 하나씩 돌려주는 generator
+    """
+    if is_full_packument(packument):
+        yield from iter_packument_versions(packument)
+        return
+
+    pkg_id = packument.get('_id')
+    if pkg_id and 'dependencies' in packument:
+        try:
+            name, version = split_key(pkg_id)
+        except ValueError:
+            return
+        yield name, version, packument['dependencies']
+
+
+def fanout_packument(packument, output_folder):
+    """
+    - Description: 전체(또는 축약) packument 하나를 <name>@<version>_dependencies.json 파일들로 나눠서 저장
+                   버전마다 npm view <name>@<version> dependencies --json을 실행해서 저장하던 것과 같은 파일만 만듦
+                   (n.n.n 형식의 버전만, 의존성이 비어있는 버전은 npm view가 아무것도 출력하지 않으므로 파일을 만들지 않음)
+                   이미 있는 파일은 건너뛰고, 임시 파일에 다 쓴 뒤 교체해서 중간에 죽어도 반쯤 쓴 파일이 남지 않게 함
+                   npm view --json metadata는 최신 버전 하나의 의존성만 있어서 다른 버전을 알 수 없으므로 아무것도 쓰지 않음
+    - Input: packument dictionary, 저장할 폴더 (versions_new 등)
+    - Output: (새로 쓴 파일 수, 건너뛴 파일 수)
+    """
+    written = 0
+    skipped = 0
+    if not is_full_packument(packument):
+        return written, skipped
+    for name, version, dependencies in iter_packument_versions(packument):
+        if not VALID_VERSION.match(version) or not dependencies:
+            continue
+        output_file = os.path.join(output_folder, record_filename(name, version, '_dependencies.json'))
+        if os.path.exists(output_file):
+            skipped += 1
+            continue
+        tmp_path = f"{output_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as out_f:
+                json.dump(dependencies, out_f)
+            os.replace(tmp_path, output_file)
+            written += 1
+        except IOError as e:
+            print(f"Error writing to file {output_file}: {e}")
+    return written, skipped
+
+
+def fanout_packument_folder(packument_folder, output_folder, suffix='_packument.json'):
+    """
+    - Description: packuments 폴더의 *_packument.json(registry에서 받은 전체/축약 packument)을 하나씩 스트리밍으로 읽어서
+                   (파일마다 한 번만 파싱) 모든 버전의 의존성 파일을 한꺼번에 만듦. 네트워크 요청은 하지 않음
+                   metadata 폴더의 *_metadata.json(npm view --json)은 최신 버전의 의존성만 있어서 세기만 하고 건너뜀
+    - Input: packument 폴더, 저장할 폴더, 읽을 파일 이름의 끝부분
+    - Output: (읽은 packument 수, 새로 쓴 파일 수, 건너뛴 파일 수, 전체 packument가 아니라서 건너뛴 파일 수)
+    """
+    packuments = 0
+    total_written = 0
+    total_skipped = 0
+    not_full = 0
+    with os.scandir(packument_folder) as entries:
+        for entry in entries:
+            if not entry.name.endswith(suffix):
+                continue
+            try:
+                with open(entry.path, 'r') as file:
+                    packument = json.load(file)
+            except json.JSONDecodeError as e:
+                print(f"JSON decode error in {entry.name}: {e}")
+                continue
+            packuments += 1
+            if not is_full_packument(packument):
+                not_full += 1
+                continue
+            written, skipped = fanout_packument(packument, output_folder)
+            total_written += written
+            total_skipped += skipped
+            if packuments % 1000 == 0:
+                print(f"[+] {packuments} packuments, {total_written} written, {total_skipped} skipped")
+    return packuments, total_written, total_skipped, not_full
+
+
+if __name__ == "__main__":
+    packument_folder = sys.argv[1] if len(sys.argv) > 1 else './packuments'
+    output_folder = sys.argv[2] if len(sys.argv) > 2 else './versions_new'
+    suffix = '_metadata.json' if 'metadata' in os.path.basename(os.path.normpath(packument_folder)) else '_packument.json'
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    print(f"\n\n현재 시간:", datetime.datetime.now())
+    packuments, written, skipped, not_full = fanout_packument_folder(packument_folder, output_folder, suffix)
+    print(f"[+] {packuments} packuments -> {written} dependencies files written, {skipped} already existed")
+    if not_full:
+        print(f"[!] {not_full} files only have the latest version's dependencies (npm view --json metadata), skipped. "
+              f"Fetch full packuments into ./packuments to fan out every version")
+    print(f"현재 시간:", datetime.datetime.now())
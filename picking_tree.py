@@ -5,53 +5,59 @@ import tarfile
 import shutil
 import re
 import sys
-import pygraphviz as pgv
 import csv
+from dep_graph import DepGraph
+from reverse_index import ReverseIndex
+from node_key import make_key
 
 
-def collect_dfs(tree_str, g, extracted_graph, visited):
+def collect_dfs(tree_str, g, extracted_graph, visited, max_depth=None):
 	"""
-    - Description: 입력으로 주어진 패키지와 버전에 대한 reverse dependency를 dfs 방식으로 탐방
-    - Input: 어떤 트리를 뽑을 것인지 패키지 이름과 버전. dfs가 반복되며 downstream pkg name = tree_name
+    - Description: 입력으로 주어진 패키지와 버전에 대한 reverse dependency를 탐방
+                   모든 엣지를 매번 훑는 대신 reverse index(역방향 CSR)로 부모 노드만 따라가는 반복 BFS
+    - Input: 어떤 트리를 뽑을 것인지 'name@version', 그래프 g(DepGraph 또는 ReverseIndex), 결과 그래프, 방문한 노드 set, 최대 depth
     - Output: 업데이트된 그래프
     """
-    # tree_name에 해당하는 서브그래프 찾기
-	tree_name, tree_version = tree_str.rsplit('@',1)
-	downstream_subgraph = g.get_subgraph(tree_name)
-
-	for edge in g.in_edges():
-		# g에 있는 모든 
-		upstream, downstream = edge
-        # 엣지 정보 출력 또는 처리
-		if downstream == tree_str:
-		
-			extracted_graph.add_edge(downstream, upstream)
-			
-			if not upstream in visited:
-				visited.append(upstream)
-				collect_dfs(upstream, g, extracted_graph, visited)
-				
+	index = g if isinstance(g, ReverseIndex) else ReverseIndex.from_graph(g)
+	start_id = index.ids.get(tree_str)
+	if start_id is None:
+		return extracted_graph
+
+	frontier = [start_id]
+	depth = 0
+	while frontier and (max_depth is None or depth < max_depth):
+		depth += 1
+		next_frontier = []
+		for node_id in frontier:
+			downstream = index.keys[node_id]
+			for parent_id in index.dependents(node_id):
+				upstream = index.keys[parent_id]
+				extracted_graph.add_edge(downstream, upstream)
+
+				if not upstream in visited:
+					visited.add(upstream)
+					next_frontier.append(parent_id)
+		frontier = next_frontier
 
 	return extracted_graph
 
 
-def get_reverse_dependency_tree(tree_name, tree_version, g):
+def get_reverse_dependency_tree(tree_name, tree_version, g, max_depth=None, reverse_index=None):
 	"""
     - Description: 입력으로 주어진 패키지와 버전에 대한 디펜던시 그래프 생성
-    - Input: 어떤 트리를 뽑을 것인지 패키지 이름과 버전
+    - Input: 어떤 트리를 뽑을 것인지 패키지 이름과 버전, 포레스트 g, 최대 depth (None이면 끝까지),
+             reverse_index - 포레스트마다 한 번 만들어둔 ReverseIndex (None이면 g에서 만듦)
     - Output: 패키지 이름과 버전에 맞는 트리 
     """
-	tree_str = f"{tree_name}@{tree_version}" #노드 이름이자 엣지구분방
+	tree_str = make_key(tree_name, tree_version) #노드 이름이자 엣지구분방
 	print(f"[+] TREE_NAME : {tree_name}")
 	print(f"[+] TREE_VERSION : {tree_version}")
 	print(f"[+] 리버스디펜던시 추출 : <<<{tree_name}@{tree_version}>>> 대상")
-	extracted_graph = pgv.AGraph(directed=True)  # 새로운 그래프 생성
-	visited = []
-	visited.append(tree_str)
-	extracted_graph = collect_dfs(tree_str, g, extracted_graph, visited)
+	extracted_graph = DepGraph()  # 새로운 그래프 생성
+	visited = set()
+	visited.add(tree_str)
+	extracted_graph = collect_dfs(tree_str, reverse_index or g, extracted_graph, visited, max_depth)
 
 
 	print(extracted_graph)
 	return extracted_graph
-
-
@@ -0,0 +1,362 @@
+import os
+import sys
+import json
+import bisect
+import datetime
+from array import array
+from forest_builder import ForestBuilder
+from dep_graph import DepGraph
+from semver_resolver import VersionList, parse_publish_time, parse_version, satisfying_runs
+from node_key import make_key, split_key
+
+
+class RangeGraph:
+    """
+    - Description: 의존성 range를 버전 하나(maxSatisfying)로 줄이지 않고 만족하는 모든 버전을 가리키게 하는 그래프
+                   간선은 '버전 노드 -> range edge', range edge는 (패키지, range) -> 그 패키지의 semver 정렬된
+                   버전 배열 위의 구간 [lo, hi)들로 저장하고, 같은 (패키지, range)는 한 번만 저장 (interning)
+                   버전 노드 ID는 패키지마다 연속된 블록 (패키지 base + 버전 인덱스)이라 노드 자체는 따로 저장하지 않음
+                   노드의 dependencies는 탐색하다 처음 닿았을 때만 읽고, 구간은 탐색할 때만 버전 노드로 펼침
+                   "설치될 수 있는 버전 중 하나라도 X에 닿는가"를 버전 조합을 다 만들지 않고 답함
+                   builder.resolve_as_of가 있으면 그 시각까지 publish 된 버전만 range를 만족하는 것으로 봄 (포레스트와 같은 기준)
+    - Input: builder - 버전 리스트와 dependencies를 읽을 ForestBuilder (None이면 기본 경로로 새로 만듦)
+    """
+
+    def __init__(self, builder=None):
+        self.builder = builder if builder is not None else ForestBuilder()
+        self.package_names = []         # 패키지 ID -> 패키지 이름
+        self.package_ids = {}           # 패키지 이름 -> 패키지 ID
+        self.version_lists = []         # 패키지 ID -> VersionList (semver 정렬)
+        self.bases = array('q')         # 패키지 ID -> 첫 버전 노드 ID
+        self.node_count = 0
+        self.range_ids = {}             # (패키지 ID, range) -> range edge ID
+        self.range_package = array('i')  # range edge ID -> 패키지 ID
+        self.range_strings = []         # range edge ID -> range 문자열
+        self.run_offsets = array('q', [0])  # range edge i의 구간은 runs[2*run_offsets[i]:2*run_offsets[i+1]]
+        self.runs = array('i')          # lo, hi, lo, hi, ... (버전 인덱스)
+        self.expanded = {}              # 버전 노드 ID -> range edge ID들 (array('i')), dependencies를 읽은 노드만
+        self.unresolved = 0             # 만족하는 버전이 하나도 없던 range 수
+
+    # ---------- 패키지 / 버전 노드 ----------
+
+    def _add_package(self, name, version_list):
+        name = sys.intern(name)
+        package_id = len(self.package_names)
+        self.package_ids[name] = package_id
+        self.package_names.append(name)
+        self.version_lists.append(version_list)
+        self.bases.append(self.node_count)
+        self.node_count += len(version_list.versions)
+        return package_id
+
+    def package_id(self, name):
+        """ 패키지 ID, 처음 보는 패키지면 버전 인덱스(없으면 registry)에서 버전 리스트를 읽어 블록을 잡음 """
+        package_id = self.package_ids.get(name)
+        if package_id is None:
+            package_id = self._add_package(name, self.builder.get_version_list(name))
+        return package_id
+
+    def package_of(self, node_id):
+        # 버전이 없는 패키지는 base가 다음 패키지와 같으므로 bisect_right로 마지막 것을 고름
+        return bisect.bisect_right(self.bases, node_id) - 1
+
+    def node_id(self, key):
+        """ 'name@version'의 노드 ID, 버전 리스트에 없는 버전이면 None """
+        try:
+            name, version = split_key(key)
+        except ValueError:
+            return None
+        package_id = self.package_id(name)
+        version_list = self.version_lists[package_id]
+        version_key = parse_version(version)
+        if version_key is None:
+            return None
+        index = bisect.bisect_left(version_list.keys, version_key)
+        while index < len(version_list.keys) and version_list.keys[index] == version_key:
+            if version_list.versions[index] == version:
+                return self.bases[package_id] + index
+            index += 1
+        return None
+
+    def name_version(self, node_id):
+        """ 노드 ID -> (패키지 이름, 버전) """
+        package_id = self.package_of(node_id)
+        return self.package_names[package_id], self.version_lists[package_id].versions[node_id - self.bases[package_id]]
+
+    def key(self, node_id):
+        return make_key(*self.name_version(node_id))
+
+    def package_name(self, node_id):
+        return self.package_names[self.package_of(node_id)]
+
+    # ---------- range edge ----------
+
+    def range_edge(self, name, version_range):
+        """
+        - Description: (패키지, range)를 range edge로 만듦 (이미 있으면 그 ID)
+        - Input: 의존하는 패키지 이름, package.json에 있는 버전 range
+        - Output: range edge ID
+        """
+        package_id = self.package_id(name)
+        range_id = self.range_ids.get((package_id, version_range))
+        if range_id is None:
+            range_id = len(self.range_strings)
+            self.range_ids[(package_id, version_range)] = range_id
+            self.range_package.append(package_id)
+            self.range_strings.append(version_range)
+            runs = satisfying_runs(self.version_lists[package_id], version_range, self.builder.resolve_as_of)
+            if not runs:
+                self.unresolved += 1
+            for lo, hi in runs:
+                self.runs.extend((lo, hi))
+            self.run_offsets.append(self.run_offsets[-1] + len(runs))
+        return range_id
+
+    def range_runs(self, range_id):
+        """ range edge의 버전 인덱스 구간 [(lo, hi), ...] """
+        start, end = self.run_offsets[range_id], self.run_offsets[range_id + 1]
+        runs = self.runs
+        return [(runs[2 * i], runs[2 * i + 1]) for i in range(start, end)]
+
+    def range_nodes(self, range_id, max_only=False):
+        """
+        - Description: range edge를 버전 노드 ID들로 펼침 (필요할 때만)
+        - Input: range edge ID, max_only - True면 maxSatisfying 버전 하나만 (같은 resolve_as_of로 만든 포레스트와 같은 해석)
+        - Output: 버전 노드 ID generator
+        """
+        runs = self.range_runs(range_id)
+        if not runs:
+            return
+        base = self.bases[self.range_package[range_id]]
+        if max_only:
+            yield base + runs[-1][1] - 1
+            return
+        for lo, hi in runs:
+            yield from range(base + lo, base + hi)
+
+    def range_size(self, range_id):
+        return sum(hi - lo for lo, hi in self.range_runs(range_id))
+
+    # ---------- 노드 펼치기 ----------
+
+    def expand(self, node_id):
+        """
+        - Description: 버전 노드의 dependencies를 읽어서 range edge들로 바꿈 (노드마다 한 번만)
+        - Input: 버전 노드 ID
+        - Output: range edge ID들 (array('i'))
+        """
+        range_ids = self.expanded.get(node_id)
+        if range_ids is None:
+            name, version = self.name_version(node_id)
+            dependencies = self.builder.read_dependencies(name, version)
+            if not isinstance(dependencies, dict):
+                dependencies = {}
+            range_ids = array('i', (self.range_edge(dep_name, version_range)
+                                    for dep_name, version_range in dependencies.items()
+                                    if isinstance(version_range, str)))
+            self.expanded[node_id] = range_ids
+        return range_ids
+
+    def successors(self, node_id, max_only=False):
+        for range_id in self.expand(node_id):
+            yield from self.range_nodes(range_id, max_only)
+
+    def iter_reachable(self, start_ids, max_depth=None, max_only=False):
+        """
+        - Description: 시작 노드들에서 range edge를 따라 닿는 버전 노드를 BFS로 하나씩 돌려줌
+                       한 단계의 아직 안 읽은 노드들은 dependency store에서 한 번에 읽어둠
+        - Input: 시작 버전 노드 ID들, max_depth - 몇 단계까지 갈지 (None이면 끝까지),
+                 max_only - True면 range마다 maxSatisfying 버전만 따라감
+        - Output: (노드 ID, depth, 부모 노드 ID) generator (시작 노드는 depth 0, 부모 None)
+        """
+        visited = set()
+        frontier = []
+        for node_id in start_ids:
+            if node_id not in visited:
+                visited.add(node_id)
+                frontier.append(node_id)
+                yield node_id, 0, None
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            self.builder.prefetch_dependencies(self, [node_id for node_id in frontier if node_id not in self.expanded])
+            depth += 1
+            next_frontier = []
+            for node_id in frontier:
+                for child_id in self.successors(node_id, max_only):
+                    if child_id not in visited:
+                        visited.add(child_id)
+                        next_frontier.append(child_id)
+                        yield child_id, depth, node_id
+            frontier = next_frontier
+
+    def find_path(self, start_ids, target_ids, max_depth=None, max_only=False):
+        """
+        - Description: 시작 노드들 중 하나에서 대상 노드들 중 하나로 가는 가장 짧은 경로 (찾으면 바로 멈춤)
+        - Input: 시작 버전 노드 ID들, 대상 버전 노드 ID들, max_depth, max_only
+        - Output: 노드 ID 리스트 (시작 -> 대상), 닿지 않으면 None
+        """
+        target_ids = set(target_ids)
+        parents = {}
+        for node_id, _, parent_id in self.iter_reachable(start_ids, max_depth, max_only):
+            parents[node_id] = parent_id
+            if node_id in target_ids:
+                path = [node_id]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+        return None
+
+    def range_node_ids(self, name, version_range):
+        """ 패키지에서 range를 만족하는 모든 버전 노드 ID """
+        return list(self.range_nodes(self.range_edge(name, version_range)))
+
+    def to_depgraph(self, start_ids, max_depth=None, max_only=False):
+        """
+        - Description: 시작 노드들에서 닿는 부분만 버전 노드 간선으로 펼쳐서 DepGraph로 만듦 (시각화, 기존 도구용)
+        - Output: DepGraph
+        """
+        g = DepGraph()
+        reached = []
+        for node_id, depth, _ in self.iter_reachable(start_ids, max_depth, max_only):
+            g.add_node(self.key(node_id))
+            if max_depth is None or depth < max_depth:
+                reached.append(node_id)
+        for node_id in reached:
+            source = self.key(node_id)
+            for child_id in self.successors(node_id, max_only):
+                g.add_edge(source, self.key(child_id))
+        return g
+
+    # ---------- 저장 / 통계 ----------
+
+    def save(self, path):
+        """
+        - Description: 패키지 버전 리스트(publish 시각 포함), range edge, 읽어둔 노드의 range edge들을 JSON으로 저장 (임시 파일에 쓴 뒤 교체)
+                       range edge의 구간은 resolve_as_of에 따라 다르므로 as_of도 같이 저장
+        """
+        data = {
+            'as_of': self.builder.resolve_as_of,
+            'packages': [[name, version_list.versions, list(version_list.times) if version_list.times is not None else None]
+                         for name, version_list in zip(self.package_names, self.version_lists)],
+            'ranges': [[self.range_package[range_id], self.range_strings[range_id], [list(run) for run in self.range_runs(range_id)]]
+                       for range_id in range(len(self.range_strings))],
+            'expanded': [[node_id, list(range_ids)] for node_id, range_ids in self.expanded.items()],
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, builder=None):
+        """
+        - Description: save로 저장한 그래프를 읽음 (노드 ID가 그대로 유지됨)
+                       저장한 뒤에 올라온 버전은 반영되지 않으므로 버전 인덱스가 바뀌면 다시 만들어야 함
+        - Output: RangeGraph (builder.resolve_as_of와 다른 as_of로 저장한 파일이면 ValueError)
+        """
+        with open(path, 'r') as file:
+            data = json.load(file)
+        graph = cls(builder)
+        if data.get('as_of') != graph.builder.resolve_as_of:
+            raise ValueError(f"{path} was resolved as of {data.get('as_of')}, expected {graph.builder.resolve_as_of}")
+        for name, versions, *times in data['packages']:
+            # 저장된 순서를 그대로 써야 노드 ID가 바뀌지 않음 (다시 정렬하지 않음)
+            times = array('q', times[0]) if times and times[0] is not None else None
+            graph._add_package(name, VersionList([parse_version(version) for version in versions], versions, times))
+        for package_id, version_range, runs in data['ranges']:
+            graph.range_ids[(package_id, version_range)] = len(graph.range_strings)
+            graph.range_package.append(package_id)
+            graph.range_strings.append(version_range)
+            if not runs:
+                graph.unresolved += 1
+            for lo, hi in runs:
+                graph.runs.extend((lo, hi))
+            graph.run_offsets.append(graph.run_offsets[-1] + len(runs))
+        for node_id, range_ids in data['expanded']:
+            graph.expanded[node_id] = array('i', range_ids)
+        return graph
+
+    def stats(self):
+        """
+        - Description: 저장한 크기와, 모든 버전 간선을 다 만들었을 때의 간선 수 비교
+        - Output: 통계 dictionary
+        """
+        range_refs = sum(len(range_ids) for range_ids in self.expanded.values())
+        range_sizes = [self.range_size(range_id) for range_id in range(len(self.range_strings))]
+        return {
+            'packages': len(self.package_names),
+            'version_nodes': self.node_count,
+            'expanded_nodes': len(self.expanded),
+            'range_edges': len(self.range_strings),
+            'range_edge_refs': range_refs,
+            'intervals': len(self.runs) // 2,
+            'unresolved_ranges': self.unresolved,
+            'materialized_edges': sum(range_sizes[range_id] for range_ids in self.expanded.values() for range_id in range_ids),
+        }
+
+    def __str__(self):
+        return (f"RangeGraph({len(self.package_names)} packages, {self.node_count} versions, "
+                f"{len(self.expanded)} expanded, {len(self.range_strings)} range edges)")
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    # --max-depth=N: N 단계까지만 따라감, --max-only: range마다 maxSatisfying 버전만 (기존 포레스트와 같은 해석)
+    # --as-of=DATE: DATE(2021-06-01, ISO 8601)까지 publish 된 버전만 따라감 (make_forest_and_save.py --as-of와 같은 기준)
+    # --load=path / --save=path: 이전에 읽어둔 range graph를 이어서 쓰고, 끝나면 저장
+    max_depth = None
+    load_path = None
+    save_path = None
+    resolve_as_of = None
+    for option in options:
+        if option.startswith('--max-depth='):
+            max_depth = int(option.split('=', 1)[1])
+        elif option.startswith('--load='):
+            load_path = option.split('=', 1)[1]
+        elif option.startswith('--save='):
+            save_path = option.split('=', 1)[1]
+        elif option.startswith('--as-of='):
+            resolve_as_of = parse_publish_time(option.split('=', 1)[1])
+            if resolve_as_of is None:
+                print(f"[ERROR] cannot parse {option}, resolving as of now")
+    builder = ForestBuilder(offline_mode='--offline' in options, resolve_as_of=resolve_as_of)
+    max_only = '--max-only' in options
+
+    if len(args) not in (2, 4):
+        print("Usage: python3 range_graph.py package_name 'version_range' [target_name 'target_range'] "
+              "[--max-depth=N] [--max-only] [--as-of=DATE] [--offline] [--load=path] [--save=path]\n"
+              " This code follows every version that satisfies each dependency range from package_name@version_range,\n"
+              " and tells whether any installable version reaches target_name@target_range")
+    else:
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        graph = RangeGraph(builder)
+        if load_path and os.path.exists(load_path):
+            try:
+                graph = RangeGraph.load(load_path, builder)
+            except ValueError as e:
+                print(f"[!] {e}, starting a new range graph")
+        start_ids = graph.range_node_ids(args[0], args[1])
+        print(f"[+] {args[0]} {args[1]}: {len(start_ids)} versions")
+
+        if len(args) == 4:
+            target_ids = graph.range_node_ids(args[2], args[3])
+            path = graph.find_path(start_ids, target_ids, max_depth, max_only)
+            if path is None:
+                print(f"[+] no installable version of {args[0]} {args[1]} reaches {args[2]} {args[3]}")
+            else:
+                print(f"[+] reachable in {len(path) - 1} steps: " + ' -> '.join(graph.key(node_id) for node_id in path))
+        else:
+            reached = set()
+            packages = set()
+            for node_id, _, _ in graph.iter_reachable(start_ids, max_depth, max_only):
+                reached.add(node_id)
+                packages.add(graph.package_of(node_id))
+            print(f"[+] {len(reached)} reachable versions in {len(packages)} packages")
+
+        print(f"[+] {graph}: {graph.stats()}")
+        if save_path:
+            graph.save(save_path)
+            print(f"[+] saved to {save_path}")
+        print(f"현재 시간:", datetime.datetime.now())
@@ -0,0 +1,382 @@
+import os
+import sys
+import time
+import struct
+import bisect
+import datetime
+from array import array
+from forest_render import open_forest
+from forest_snapshot import ForestSnapshot
+from forest_scc import Condensation
+from reverse_index import forest_fingerprint
+from node_key import make_key
+
+
+MAGIC = b'REACH2\n\0'
+HEADER = struct.Struct('<qqqqd')  # 노드 수, 컴포넌트 수, 포레스트 파일 mtime_ns, 포레스트 파일 크기, 만드는 데 걸린 시간(초)
+DEFAULT_MAX_BYTES = 1 << 30  # load_or_build에서 이보다 커지면 만들지 않고 reverse_index 탐색을 쓰도록 함
+
+# 컴포넌트마다 조상 집합을 저장하는 방식
+SPARSE = 0  # 조상 컴포넌트 번호들의 정렬된 int32 배열
+DENSE = 1   # 조상 중 가장 작은 번호(lo)부터 자기 번호까지의 비트셋 (4 bytes 단위, little-endian)
+
+# 컴포넌트 하나에 붙는 고정 크기 (up_offsets 8 + up_counts 8 + up_lo 4 + up_kinds 1)
+COMPONENT_BYTES = 21
+
+
+def _dense_bytes(lo, component):
+    # lo..component 비트셋을 int32 배열과 같이 4 bytes 단위로 맞춘 크기
+    return ((component - lo + 32) >> 5) << 2
+
+
+def _iter_bits(data, lo):
+    # 비트셋 bytes에서 켜진 비트의 번호(lo 기준)를 작은 것부터 돌려줌
+    for byte_index, byte in enumerate(data):
+        while byte:
+            lowest = byte & -byte
+            byte ^= lowest
+            yield lo + (byte_index << 3) + lowest.bit_length() - 1
+
+
+class ReachabilityIndex:
+    """
+    - Description: 포레스트의 전이 폐쇄(transitive closure)를 미리 계산해둔 reachability 인덱스
+                   forest_scc의 Condensation(SCC를 노드 하나로 줄인 DAG)에서 컴포넌트마다 "여기에 닿는 컴포넌트 + 자기 자신"
+                   (조상 집합)을 저장하고, 집합마다 정렬된 번호 배열(sparse)과 비트셋(dense) 중 작은 쪽으로 저장
+                   위상 순서(dependents가 앞)라서 조상 번호는 모두 자기 번호 이하이므로 비트셋은 [가장 작은 조상, 자기 번호]만 있으면 됨
+                   크기는 노드 수^2이 아니라 실제 reachability(조상 수의 합)를 따라감 (서로 떨어진 작은 트리가 많으면 작음)
+                   "A가 B를 전이적으로 의존하는가"는 이진 탐색이나 비트 하나, dependents 수는 미리 센 값으로 탐색 없이 답함
+    - Input: keys - 노드 ID -> 'name@version', component_of - 노드 ID -> 컴포넌트(위상 순서) 번호,
+             component_start / members - 컴포넌트별 노드 CSR (Condensation과 같음), cyclic - 컴포넌트가 사이클이면 1,
+             up_offsets / up_blob - 컴포넌트 c의 조상 집합은 up_blob[up_offsets[c]:up_offsets[c+1]],
+             up_kinds - SPARSE / DENSE, up_lo - 가장 작은 조상 번호, up_counts - 조상 컴포넌트들의 노드 수 합
+    """
+
+    def __init__(self, keys, component_of, component_start, members, cyclic, up_offsets, up_kinds, up_lo, up_blob, up_counts,
+                 fingerprint=(0, 0), build_seconds=0.0):
+        self.keys = keys
+        self.ids = {key: node_id for node_id, key in enumerate(keys)}
+        self.component_of = component_of
+        self.component_start = component_start
+        self.members = members
+        self.cyclic = cyclic
+        self.up_offsets = up_offsets
+        self.up_kinds = up_kinds
+        self.up_lo = up_lo
+        self.up_blob = up_blob
+        self.up_ints = memoryview(up_blob).cast('i') if len(up_blob) else []
+        self.up_counts = up_counts
+        self.fingerprint = fingerprint
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def from_graph(cls, g, max_bytes=None):
+        """
+        - Description: DepGraph 또는 ForestSnapshot에서 인덱스를 만듦
+                       위상 순서대로 컴포넌트마다 이미 끝난 부모(predecessors)들의 조상 집합을 합쳐서 바로 저장하므로,
+                       아래로 내려보낼 집합을 따로 들고 있지 않음 (만드는 동안의 메모리도 max_bytes 안에서 셈)
+        - Input: 그래프, max_bytes - 인덱스와 만드는 동안의 임시 비트셋 크기가 이걸 넘으면 만들다가 멈춤 (None이면 제한 없음)
+        - Output: ReachabilityIndex (max_bytes를 넘으면 ValueError)
+        """
+        start_time = time.perf_counter()
+        condensation = Condensation.from_graph(g)
+        keys = condensation.keys
+        node_count = len(keys)
+        component_count = condensation.number_of_components()
+        component_start = condensation.component_start
+        sizes = array('q', (component_start[c + 1] - component_start[c] for c in range(component_count)))
+
+        # 노드가 여러 개인 컴포넌트(사이클)의 (크기 - 1)을 자리수별 비트셋으로 나눠둠
+        # dense 조상 집합의 노드 수 = popcount + sum(2^j * popcount(집합 & planes[j]))
+        planes = []
+        for component in range(component_count):
+            extra = sizes[component] - 1
+            j = 0
+            while extra:
+                if extra & 1:
+                    while len(planes) <= j:
+                        planes.append(bytearray((component_count + 7) >> 3))
+                    planes[j][component >> 3] |= 1 << (component & 7)
+                extra >>= 1
+                j += 1
+        planes_bytes = sum(len(plane) for plane in planes)
+
+        up_offsets = array('q', [0])
+        up_kinds = bytearray(component_count)
+        up_lo = array('i', [0]) * component_count
+        up_counts = array('q', [0]) * component_count
+        up_blob = bytearray()
+        for component in range(component_count):
+            members = {component}
+            dense_parents = []
+            lo = component
+            for parent in condensation.predecessors(component):
+                parent_start, parent_end = up_offsets[parent], up_offsets[parent + 1]
+                if up_kinds[parent] == DENSE:
+                    dense_parents.append(parent)
+                else:
+                    ancestors = array('i')
+                    ancestors.frombytes(up_blob[parent_start:parent_end])
+                    members.update(ancestors)
+                lo = min(lo, up_lo[parent])
+            lo = min(lo, min(members))
+            dense_size = _dense_bytes(lo, component)
+
+            if not dense_parents and 4 * len(members) <= dense_size:
+                kind = SPARSE
+                ancestors = sorted(members)
+                count = sum(sizes[ancestor] for ancestor in ancestors)
+                up_blob += array('i', ancestors).tobytes()
+                temporary = 0
+            else:
+                bits = 0
+                for parent in dense_parents:
+                    data = up_blob[up_offsets[parent]:up_offsets[parent + 1]]
+                    bits |= int.from_bytes(data, 'little') << (up_lo[parent] - lo)
+                data = bytearray(bits.to_bytes(dense_size, 'little'))
+                for member in members:
+                    offset = member - lo
+                    data[offset >> 3] |= 1 << (offset & 7)
+                bits = int.from_bytes(data, 'little')
+                count = bits.bit_count()
+                for j, plane in enumerate(planes):
+                    window = int.from_bytes(plane[lo >> 3:(component >> 3) + 1], 'little') >> (lo & 7)
+                    count += (bits & window).bit_count() << j
+                temporary = dense_size
+                if 4 * bits.bit_count() < dense_size:
+                    # dense 부모들을 합쳤더니 조상이 적은 경우
+                    kind = SPARSE
+                    up_blob += array('i', _iter_bits(data, lo)).tobytes()
+                else:
+                    kind = DENSE
+                    up_blob += data
+            up_kinds[component] = kind
+            up_lo[component] = lo
+            up_counts[component] = count
+            up_offsets.append(len(up_blob))
+
+            used = len(up_blob) + COMPONENT_BYTES * (component + 1) + planes_bytes + temporary
+            if max_bytes is not None and used > max_bytes:
+                raise ValueError(f"reachability index exceeds {max_bytes} bytes at component {component + 1}/{component_count} "
+                                 f"({node_count} nodes), use reverse_index instead")
+
+        return cls(keys, condensation.component_of, component_start, condensation.members, condensation.cyclic,
+                   up_offsets, up_kinds, up_lo, bytes(up_blob), up_counts, build_seconds=time.perf_counter() - start_time)
+
+    # ---------- 저장 / 읽기 ----------
+
+    def save(self, index_path):
+        """ 인덱스를 바이너리 파일로 저장 (임시 파일에 쓴 뒤 교체) """
+        keys_blob = '\n'.join(self.keys).encode('utf-8')
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(HEADER.pack(len(self.keys), len(self.up_counts), *self.fingerprint, self.build_seconds))
+            file.write(struct.pack('<qq', len(keys_blob), len(self.up_blob)))
+            file.write(keys_blob)
+            array('i', self.component_of).tofile(file)
+            array('i', self.members).tofile(file)
+            array('q', self.component_start).tofile(file)
+            file.write(bytes(self.cyclic))
+            file.write(bytes(self.up_kinds))
+            array('i', self.up_lo).tofile(file)
+            array('q', self.up_offsets).tofile(file)
+            array('q', self.up_counts).tofile(file)
+            file.write(self.up_blob)
+        os.replace(tmp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{index_path} is not a reachability index (or was written by an older version)")
+            node_count, component_count, mtime_ns, size, build_seconds = HEADER.unpack(file.read(HEADER.size))
+            keys_length, blob_length = struct.unpack('<qq', file.read(16))
+            keys_blob = file.read(keys_length).decode('utf-8')
+            keys = keys_blob.split('\n') if node_count else []
+
+            def read_array(typecode, count):
+                values = array(typecode)
+                values.fromfile(file, count)
+                return values
+
+            component_of = read_array('i', node_count)
+            members = read_array('i', node_count)
+            component_start = read_array('q', component_count + 1)
+            cyclic = bytearray(file.read(component_count))
+            up_kinds = bytearray(file.read(component_count))
+            up_lo = read_array('i', component_count)
+            up_offsets = read_array('q', component_count + 1)
+            up_counts = read_array('q', component_count)
+            up_blob = file.read(blob_length)
+        return cls(keys, component_of, component_start, members, cyclic, up_offsets, up_kinds, up_lo, up_blob, up_counts,
+                   (mtime_ns, size), build_seconds)
+
+    # ---------- 질의 ----------
+
+    def _ancestors(self, component):
+        """ component에 닿는 컴포넌트들 (자기 자신 포함, 번호 오름차순) """
+        start, end = self.up_offsets[component], self.up_offsets[component + 1]
+        if self.up_kinds[component] == SPARSE:
+            return iter(self.up_ints[start >> 2:end >> 2])
+        return _iter_bits(self.up_blob[start:end], self.up_lo[component])
+
+    def _has_ancestor(self, component, ancestor):
+        start, end = self.up_offsets[component], self.up_offsets[component + 1]
+        if self.up_kinds[component] == SPARSE:
+            ancestors = self.up_ints[start >> 2:end >> 2]
+            index = bisect.bisect_left(ancestors, ancestor)
+            return index < len(ancestors) and ancestors[index] == ancestor
+        offset = ancestor - self.up_lo[component]
+        byte_index = start + (offset >> 3)
+        return offset >= 0 and byte_index < end and (self.up_blob[byte_index] >> (offset & 7)) & 1 == 1
+
+    def _component_members(self, component):
+        return self.members[self.component_start[component]:self.component_start[component + 1]]
+
+    def reaches_ids(self, source_id, target_id):
+        """ source가 target을 (길이 1 이상의 경로로) 전이적으로 의존하면 True """
+        source = self.component_of[source_id]
+        target = self.component_of[target_id]
+        if source == target:
+            # 같은 컴포넌트면 사이클 안에서만 닿음
+            return self.cyclic[target] == 1
+        return self._has_ancestor(target, source)
+
+    def reaches(self, source, target):
+        """ 'name@version' source가 target을 전이적으로 의존하는지 (둘 중 하나라도 포레스트에 없으면 False) """
+        source_id = self.ids.get(source)
+        target_id = self.ids.get(target)
+        if source_id is None or target_id is None:
+            return False
+        return self.reaches_ids(source_id, target_id)
+
+    def count_dependents_id(self, node_id):
+        """ node를 전이적으로 의존하는 노드 수 (자기 자신은 제외), 탐색 없이 미리 센 값 """
+        return self.up_counts[self.component_of[node_id]] - 1
+
+    def count_dependents(self, key):
+        node_id = self.ids.get(key)
+        return 0 if node_id is None else self.count_dependents_id(node_id)
+
+    def iter_dependent_ids(self, node_id):
+        """ node를 전이적으로 의존하는 노드 ID들 (자기 자신은 제외, 위상 순서) """
+        for ancestor in self._ancestors(self.component_of[node_id]):
+            for dependent_id in self._component_members(ancestor):
+                if dependent_id != node_id:
+                    yield dependent_id
+
+    def _closure_components(self, start_ids):
+        """
+        - Description: 시작 노드들의 dependents가 들어있는 컴포넌트 집합 (ReverseIndex.closure_of와 같은 노드 집합이 됨)
+                       시작 노드는 다른 시작 노드를 의존하거나 사이클 안에 있을 때만 들어감
+        """
+        closure = set()
+        for component in {self.component_of[node_id] for node_id in start_ids}:
+            ancestors = set(self._ancestors(component))
+            if not self.cyclic[component]:
+                ancestors.discard(component)
+            closure |= ancestors
+        return closure
+
+    def closure_count(self, start_ids):
+        return sum(self.component_start[component + 1] - self.component_start[component]
+                   for component in self._closure_components(start_ids))
+
+    def closure_ids(self, start_ids):
+        """ 시작 노드들의 dependents 합집합 노드 ID set """
+        closure = set()
+        for component in self._closure_components(start_ids):
+            closure.update(self._component_members(component))
+        return closure
+
+    def stats(self):
+        component_count = len(self.up_counts)
+        node_count = len(self.keys)
+        index_bytes = len(self.up_blob) + COMPONENT_BYTES * component_count
+        return {
+            'nodes': node_count,
+            'components': component_count,
+            'cyclic_components': sum(self.cyclic),
+            'nodes_in_cycles': sum(1 for component in self.component_of if self.cyclic[component]),
+            'sparse_components': component_count - sum(self.up_kinds),
+            'dense_components': sum(self.up_kinds),
+            'index_bytes': index_bytes,
+            'bytes_per_node': index_bytes / node_count if node_count else 0.0,
+            'build_seconds': round(self.build_seconds, 3),
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __str__(self):
+        return f"ReachabilityIndex({len(self.keys)} nodes, {len(self.up_counts)} components, {len(self.up_blob)} bytes)"
+
+
+def load_or_build(forest_path='entire_forest.json', index_path=None, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    - Description: 포레스트의 reachability 인덱스를 읽음. 인덱스 파일이 없거나 포레스트가 바뀌었으면 새로 만들어서 저장
+    - Input: 포레스트 JSON(또는 .snapshot) 경로, 인덱스 파일 경로 (None이면 포레스트 옆의 .reach),
+             만들 때의 크기 제한 (None이면 제한 없음)
+    - Output: ReachabilityIndex (크기 제한을 넘으면 ValueError)
+    """
+    index_path = index_path or (forest_path + '.reach' if forest_path.endswith('.snapshot') else os.path.splitext(forest_path)[0] + '.reach')
+    if os.path.exists(index_path):
+        try:
+            index = ReachabilityIndex.load(index_path)
+            if index.fingerprint == forest_fingerprint(forest_path):
+                return index
+            print(f"[+] {forest_path} changed, rebuilding {index_path}")
+        except (ValueError, EOFError) as e:
+            print(f"Error occurred while loading {index_path}: {e}")
+    g = open_forest(forest_path)
+    try:
+        index = ReachabilityIndex.from_graph(g, max_bytes)
+    finally:
+        if isinstance(g, ForestSnapshot):
+            g.close()
+    index.fingerprint = forest_fingerprint(forest_path)
+    index.save(index_path)
+    print(f"[+] {index} saved to {index_path}: {index.stats()}")
+    return index
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    # --max-bytes=N: 인덱스(만드는 동안의 임시 비트셋 포함)가 N bytes를 넘으면 만들지 않음 (0이면 제한 없음)
+    max_bytes = DEFAULT_MAX_BYTES
+    for option in options:
+        if option.startswith('--max-bytes='):
+            max_bytes = int(option.split('=', 1)[1]) or None
+
+    try:
+        if len(args) == 2 and args[0] == 'build':
+            print(f"\n\n현재 시간:", datetime.datetime.now())
+            index = load_or_build(args[1], max_bytes=max_bytes)
+            print(f"[+] {index.stats()}")
+            print(f"현재 시간:", datetime.datetime.now())
+        elif len(args) == 4 and args[0] == 'query':
+            forest_path, tree_name, tree_version = args[1:]
+            index = load_or_build(forest_path, max_bytes=max_bytes)
+            tree_str = make_key(tree_name, tree_version)
+            node_id = index.ids.get(tree_str)
+            if node_id is None:
+                print(f"[+] {tree_str} is not in {forest_path}")
+            elif '--count' in options:
+                print(f"[+] {tree_str}: {index.count_dependents_id(node_id)} dependents")
+            else:
+                for dependent_id in index.iter_dependent_ids(node_id):
+                    print(index.keys[dependent_id])
+        elif len(args) == 6 and args[0] == 'reaches':
+            forest_path, name, version, dep_name, dep_version = args[1:]
+            index = load_or_build(forest_path, max_bytes=max_bytes)
+            source, target = make_key(name, version), make_key(dep_name, dep_version)
+            print(f"[+] {source} {'depends' if index.reaches(source, target) else 'does not depend'} on {target}")
+        else:
+            print("Usage: python3 reachability_index.py build forest.json [--max-bytes=N]\n"
+                  "       python3 reachability_index.py query forest.json package_name package_version [--count]\n"
+                  "       python3 reachability_index.py reaches forest.json package_name package_version dep_name dep_version")
+    except ValueError as e:
+        print(f"[ERROR] {e}")
@@ -0,0 +1,206 @@
+import json
+import gzip
+import zlib
+import threading
+from collections import OrderedDict
+import subprocess
+import http.client
+from urllib.parse import urlsplit, quote
+from semver_resolver import build_version_list, satisfies
+
+
+# npm이 install 할 때 쓰는 축약 메타데이터 (versions 안에 dependencies, dist 등만 들어있음)
+ABBREVIATED_ACCEPT = 'application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8, */*'
+FULL_ACCEPT = 'application/json'
+
+# 축약 메타데이터만으로 답할 수 있는 npm view 필드
+ABBREVIATED_FIELDS = {'versions', 'dependencies', 'optionalDependencies', 'peerDependencies', 'dist-tags', 'name', 'version', 'dist'}
+
+
+class PackumentDecodeError(OSError):
+    """ registry가 보낸 본문을 gzip/JSON으로 풀 수 없음 (잘린 전송 등, 네트워크 오류처럼 재시도 대상) """
+
+
+class RegistryClient:
+    """
+    - Description: npm CLI를 띄우지 않고 registry에서 packument를 직접 받아오는 HTTP client
+                   스레드마다 keep-alive 연결을 재사용하고, gzip 응답과 ETag(If-None-Match) 재검증을 지원
+                   view()는 'npm view ... --json'과 같은 stdout 문자열을 돌려줘서 NpmFetcher의 fetch_function으로 바로 사용 가능
+                   ETag 재검증용으로는 최근 etag_capacity개 패키지의 (ETag, 받은 그대로의 gzip 본문)만 LRU로 기억
+                   (파싱한 packument를 패키지마다 계속 들고 있으면 크롤링하는 동안 메모리가 끝없이 늘어남)
+    - Input: registry - registry 주소 (테스트할 때는 로컬 mock 서버 주소), timeout - 요청 하나의 최대 시간(초),
+             etag_capacity - ETag를 기억할 최대 packument 수
+    """
+
+    def __init__(self, registry='https://registry.npmjs.org', timeout=60, etag_capacity=2000):
+        parts = urlsplit(registry)
+        self.scheme = parts.scheme or 'https'
+        self.host = parts.netloc
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.etag_capacity = etag_capacity
+        self.etags = OrderedDict()  # (이름, 축약 여부) -> (ETag, Content-Encoding, 본문 bytes), 오래 안 쓴 것부터 버림
+
+        self.requests = 0
+        self.not_modified = 0
+
+    def _connection(self, timeout):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            if self.scheme == 'https':
+                connection = http.client.HTTPSConnection(self.host, timeout=timeout)
+            else:
+                connection = http.client.HTTPConnection(self.host, timeout=timeout)
+            self.local.connection = connection
+        connection.timeout = timeout
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+        self.local.connection = None
+
+    def _request(self, path, headers, timeout):
+        # keep-alive 연결이 서버 쪽에서 끊겼으면 한 번만 새로 연결해서 다시 시도
+        for attempt in range(2):
+            connection = self._connection(timeout)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self._drop_connection()
+                return response.status, response.getheader('ETag'), response.getheader('Content-Encoding'), body
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError, http.client.CannotSendRequest):
+                self._drop_connection()
+                if attempt == 1:
+                    raise
+            except http.client.HTTPException as e:
+                self._drop_connection()
+                raise OSError(f"HTTP error from {self.host}: {e}") from e
+            except OSError:
+                self._drop_connection()
+                raise
+
+    def _decode(self, body, encoding, path):
+        """ 응답 본문 -> packument, 잘리거나 깨진 본문은 PackumentDecodeError """
+        try:
+            return json.loads(gzip.decompress(body) if encoding == 'gzip' else body)
+        except (ValueError, EOFError, gzip.BadGzipFile, zlib.error) as e:
+            raise PackumentDecodeError(f"undecodable packument from {self.host}{path}: {e}") from e
+
+    def get_packument(self, name, abbreviated=False, timeout=None):
+        """
+        - Description: 패키지의 packument를 가져옴 (캐시된 ETag가 있으면 304로 재검증)
+        - Input: 패키지 이름, abbreviated - 축약 메타데이터 요청 여부, timeout - 초
+        - Output: packument dictionary (없는 패키지면 E404 메시지를 가진 CalledProcessError,
+                  본문을 풀 수 없으면 PackumentDecodeError)
+        """
+        cache_key = (name, abbreviated)
+        headers = {
+            'Accept': ABBREVIATED_ACCEPT if abbreviated else FULL_ACCEPT,
+            'Accept-Encoding': 'gzip',
+            'Connection': 'keep-alive',
+        }
+        with self.lock:
+            cached = self.etags.get(cache_key)
+            if cached is not None:
+                self.etags.move_to_end(cache_key)
+        if cached is not None:
+            headers['If-None-Match'] = cached[0]
+
+        path = f"{self.base_path}/{quote(name, safe='@')}"
+        status, etag, encoding, body = self._request(path, headers, timeout or self.timeout)
+        with self.lock:
+            self.requests += 1
+
+        if status == 304 and cached is not None:
+            with self.lock:
+                self.not_modified += 1
+            _, encoding, body = cached
+            return self._decode(body, encoding, path)
+        if status == 404:
+            raise subprocess.CalledProcessError(1, ['GET', path], output='', stderr=f"npm ERR! code E404\nnpm ERR! 404 Not Found - GET {path}")
+        if status != 200:
+            raise subprocess.CalledProcessError(1, ['GET', path], output='', stderr=f"npm ERR! HTTP {status} - GET {path}")
+
+        try:
+            packument = self._decode(body, encoding, path)
+        except PackumentDecodeError:
+            # 연결에 남은 응답이 어긋났을 수 있으므로 새로 연결하고, 예전 ETag도 버려서 다음에는 전체 본문을 다시 받음
+            self._drop_connection()
+            with self.lock:
+                self.etags.pop(cache_key, None)
+            raise
+        if etag and self.etag_capacity > 0:
+            with self.lock:
+                self.etags[cache_key] = (etag, encoding, body)
+                self.etags.move_to_end(cache_key)
+                if len(self.etags) > self.etag_capacity:
+                    self.etags.popitem(last=False)
+        return packument
+
+    def _select_versions(self, packument, spec_version):
+        """ npm view의 'name@spec'처럼 태그/정확한 버전/range로 버전을 고름 """
+        versions = packument.get('versions', {})
+        dist_tags = packument.get('dist-tags', {})
+        if spec_version is None:
+            spec_version = 'latest'
+        if spec_version in dist_tags:
+            return [dist_tags[spec_version]]
+        if spec_version in versions:
+            return [spec_version]
+        version_list = build_version_list(list(versions))
+        return [version for version in version_list.versions if satisfies(version, spec_version)]
+
+    def _manifest_view(self, packument, version):
+        """ npm view <name>의 출력처럼 버전 manifest에 packument 수준의 정보(versions, time, dist-tags)를 합침 """
+        manifest = dict(packument.get('versions', {}).get(version, {}))
+        data = {key: value for key, value in packument.items() if key not in ('versions', '_rev', '_attachments', 'readme')}
+        data.update(manifest)
+        data['versions'] = list(packument.get('versions', {}))
+        if 'time' in packument:
+            data['time'] = packument['time']
+        data.setdefault('_id', f"{packument.get('name')}@{version}")
+        return data
+
+    def view(self, args, timeout=None):
+        """
+        - Description: 'npm view <spec> [field] --json'을 대신함 (NpmFetcher의 fetch_function과 같은 형태)
+        - Input: npm view 뒤에 붙는 인자 리스트 (예: ['lodash@4.17.21', 'dependencies', '--json']), timeout - 초
+        - Output: npm view --json의 stdout과 같은 JSON 문자열 (값이 없으면 빈 문자열)
+        """
+        positional = [arg for arg in args if not arg.startswith('--')]
+        spec = positional[0]
+        field = positional[1] if len(positional) > 1 else None
+
+        if spec.startswith('@'):
+            scope_name, _, spec_version = spec[1:].partition('@')
+            name = '@' + scope_name
+        else:
+            name, _, spec_version = spec.partition('@')
+        spec_version = spec_version or None
+
+        abbreviated = field in ABBREVIATED_FIELDS
+        packument = self.get_packument(name, abbreviated=abbreviated, timeout=timeout)
+
+        if field in ('versions', 'dist-tags', 'time', 'name') and spec_version is None:
+            value = list(packument.get('versions', {})) if field == 'versions' else packument.get(field)
+            return json.dumps(value, indent=2) if value is not None else ''
+
+        results = []
+        for version in self._select_versions(packument, spec_version):
+            data = self._manifest_view(packument, version)
+            value = data if field is None else data.get(field)
+            if value is not None:
+                results.append(value)
+
+        if not results:
+            return ''
+        return json.dumps(results[0] if len(results) == 1 else results, indent=2)
+
+    def stats(self):
+        return {'requests': self.requests, 'not_modified': self.not_modified, 'etags': len(self.etags)}
@@ -0,0 +1,205 @@
+import os
+import sqlite3
+from collections import OrderedDict
+import node_key
+from version_index import REGISTRY_FINGERPRINT
+
+
+# 캐시에 없는 경우를 나타내는 값 (None은 "만족하는 버전 없음"이라는 결과로 캐시됨)
+MISS = object()
+
+
+class ResolutionCache:
+    """
+    - Description: (패키지 이름, 버전 range, as_of) -> 해석된 버전 결과를 저장하는 2단 캐시
+                   as_of는 해석 기준 시각 (epoch 초, 지금 기준이면 0)
+                   메모리 LRU를 먼저 보고, 없으면 SQLite 파일에서 찾음 (재시작해도 유지)
+                   해석에 쓴 버전 인덱스 행(버전 목록 + publish 시각)의 지문이 바뀌면 해당 패키지의 결과는 무효화
+                   (version_index가 없으면 versions 폴더의 *_versionList.json 지문을 씀)
+                   registry에서 가져와 해석한 결과는 그 패키지가 인덱스에 없는 동안만 다시 씀
+                   버전 리스트를 어디서도 얻지 못한 결과(오프라인 모드의 miss, registry 실패)는 이번 실행의 메모리에만 두고
+                   파일에는 쓰지 않음 (다음 온라인 실행이 빈 리스트로 해석한 None을 다시 쓰지 않도록)
+    - Input: db_path - SQLite 파일 경로, versions_folder - versionList 폴더, capacity - LRU 크기,
+             version_index - 해석에 쓰는 VersionIndex (None이면 versions 폴더로 지문을 만듦),
+             batch_size - 몇 개의 결과를 모아서 한 번에 commit 할지
+    """
+
+    def __init__(self, db_path='resolution_cache.sqlite', versions_folder='./versions', capacity=100000, version_index=None,
+                 batch_size=100):
+        self.db_path = db_path
+        self.versions_folder = versions_folder
+        self.version_index = version_index
+        self.capacity = capacity
+        self.memory = OrderedDict()
+        self.conn = None
+        self.fingerprints = None
+        # 디스크 쓰기는 메모리에 모았다가 batch_size개마다 짧은 transaction 하나로 씀
+        # (병렬 빌드의 워커들이 같은 파일을 쓰므로 write lock을 오래 잡고 있지 않도록 함)
+        self.batch_size = batch_size
+        self.pending_rows = []
+        self.pending_deletes = []
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.unsaved = 0
+        self.resolved = 0
+        self.miss_seconds = 0.0
+
+    def _connect(self):
+        if self.conn is None:
+            # 병렬 빌드에서는 여러 워커가 같은 파일에 쓰므로 잠금이 풀릴 때까지 기다림
+            self.conn = sqlite3.connect(self.db_path, timeout=60)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            # as_of 열이 없던 이전 캐시 파일은 키가 달라서 그대로 쓸 수 없으므로 버리고 다시 만듦
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(resolution)")]
+            if columns and 'as_of' not in columns:
+                self.conn.execute("DROP TABLE resolution")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS resolution ("
+                " name TEXT NOT NULL,"
+                " version_range TEXT NOT NULL,"
+                " as_of INTEGER NOT NULL,"
+                " version TEXT,"
+                " fingerprint TEXT NOT NULL,"
+                " PRIMARY KEY (name, version_range, as_of))"
+            )
+        return self.conn
+
+    def _load_fingerprints(self):
+        """ versions 폴더를 한 번만 훑어서 패키지별 versionList 파일의 (mtime, size) 지문을 만듦 """
+        fingerprints = {}
+        if os.path.isdir(self.versions_folder):
+            with os.scandir(self.versions_folder) as entries:
+                for entry in entries:
+                    parsed = node_key.parse_record_filename(entry.name, '_versionList.json')
+                    if parsed is None:
+                        continue
+                    pkg_name = parsed[0]
+                    stat = entry.stat()
+                    fingerprints.setdefault(pkg_name, []).append(f"{entry.name}:{stat.st_mtime_ns}:{stat.st_size}")
+        self.fingerprints = {name: ';'.join(sorted(parts)) for name, parts in fingerprints.items()}
+
+    def fingerprint(self, name):
+        """ 패키지 버전 리스트의 지문 (버전 인덱스 행, 없으면 versionList 파일), 둘 다 없으면 빈 문자열 """
+        if self.version_index is not None:
+            return self.version_index.fingerprint(name)
+        if self.fingerprints is None:
+            self._load_fingerprints()
+        return self.fingerprints.get(name, '')
+
+    def _remember(self, key, value):
+        # 전역 문자열 표에 등록하지 않음 (표는 줄어들지 않으므로 LRU에서 밀려난 항목의 문자열도 계속 남게 됨)
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def get(self, name, version_range, as_of=None):
+        """
+        - Description: 캐시된 해석 결과 조회 (메모리 -> 디스크 순서)
+        - Input: 패키지 이름, 버전 range, 해석 기준 시각 (epoch 초, None이면 지금 기준)
+        - Output: 해석된 버전 (만족하는 버전이 없었으면 None), 캐시에 없으면 MISS
+        """
+        key = (name, version_range, as_of or 0)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+
+        row = self._connect().execute(
+            "SELECT version, fingerprint FROM resolution WHERE name = ? AND version_range = ? AND as_of = ?", key
+        ).fetchone()
+        if row is not None:
+            version, fingerprint = row
+            current = self.fingerprint(name)
+            if fingerprint == current or (fingerprint == REGISTRY_FINGERPRINT and current == ''):
+                self._remember(key, version)
+                self.hits += 1
+                self.disk_hits += 1
+                return version
+            # versionList가 바뀌었으므로 오래된 결과는 버림
+            self.stale += 1
+            self.pending_deletes.append(key)
+
+        self.misses += 1
+        return MISS
+
+    def put(self, name, version_range, version, seconds=0.0, as_of=None):
+        """
+        - Description: 해석 결과 저장 (디스크 쓰기는 batch_size개씩 모아서 짧은 transaction으로 commit)
+        - Input: 패키지 이름, 버전 range, 해석된 버전 (없으면 None), 해석에 걸린 시간(초), 해석 기준 시각
+        - Output: 없음
+        """
+        key = (name, version_range, as_of or 0)
+        self._remember(key, version)
+        self.resolved += 1
+        self.miss_seconds += seconds
+        fingerprint = self.fingerprint(name)
+        if self.version_index is not None and not fingerprint:
+            # 인덱스에도 없고 registry에서도 가져오지 못한 패키지, 빈 리스트로 해석한 결과는 저장하지 않음
+            self.unsaved += 1
+            return
+        self.pending_rows.append((*key, version, fingerprint))
+        if len(self.pending_rows) + len(self.pending_deletes) >= self.batch_size:
+            self.flush()
+
+    def invalidate(self, names):
+        """
+        - Description: 패키지들의 해석 결과를 모두 버림 (새 버전이 올라와서 range의 답이 바뀔 수 있을 때)
+        - Input: 패키지 이름들
+        - Output: 버린 메모리 항목 수
+        """
+        names = set(names)
+        stale_keys = [key for key in self.memory if key[0] in names]
+        for key in stale_keys:
+            del self.memory[key]
+        self.pending_rows = [row for row in self.pending_rows if row[0] not in names]
+        self._connect().executemany("DELETE FROM resolution WHERE name = ?", [(name,) for name in names])
+        self.conn.commit()
+        return len(stale_keys)
+
+    def flush(self):
+        """ 모아둔 쓰기를 짧은 transaction 하나로 commit (다른 프로세스가 잠그고 있어서 실패하면 다음 flush에서 다시 씀) """
+        if not self.pending_rows and not self.pending_deletes:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany("DELETE FROM resolution WHERE name = ? AND version_range = ? AND as_of = ?", self.pending_deletes)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO resolution (name, version_range, as_of, version, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                    self.pending_rows
+                )
+        except sqlite3.OperationalError as e:
+            print(f"[!] resolution cache write failed, keeping {len(self.pending_rows)} results for the next flush: {e}")
+            return
+        self.pending_rows = []
+        self.pending_deletes = []
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def stats(self):
+        """
+        - Description: hit/miss 카운터와 캐시 덕분에 아낀 시간 추정치
+        - Output: 통계 dictionary
+        """
+        lookups = self.hits + self.misses
+        average_miss = self.miss_seconds / self.resolved if self.resolved else 0.0
+        return {
+            'lookups': lookups,
+            'hits': self.hits,
+            'memory_hits': self.hits - self.disk_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'unsaved': self.unsaved,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'estimated_saved_seconds': average_miss * self.hits,
+        }
@@ -0,0 +1,380 @@
+import os
+import sys
+import json
+import struct
+import sqlite3
+import datetime
+from array import array
+from dep_graph import DepGraph
+from forest_snapshot import ForestSnapshot
+from semver_resolver import build_version_list, satisfying_indices, normalize_advisory_range
+from node_key import make_key, key_name, key_version
+
+
+MAGIC = b'RIDX1\n'
+HEADER = struct.Struct('<qqqq')  # 노드 수, 간선 수, 포레스트 파일 mtime_ns, 포레스트 파일 크기
+
+
+class ReverseIndex:
+    """
+    - Description: 포레스트의 역방향(부모) 인접 리스트를 CSR 배열로 들고 있는 reverse dependency 인덱스
+                   포레스트마다 한 번만 만들어서 파일로 저장해두고, 질의는 BFS로 결과 크기만큼만 일함
+    - Input: keys - 노드 ID -> 'name@version', offsets/sources - reverse CSR 배열
+             (노드 i를 의존하는 노드들은 sources[offsets[i]:offsets[i+1]])
+    """
+
+    def __init__(self, keys, offsets, sources, fingerprint=(0, 0)):
+        self.keys = keys
+        self.ids = {key: node_id for node_id, key in enumerate(keys)}
+        self.offsets = offsets
+        self.sources = sources
+        self.fingerprint = fingerprint
+        self._package_nodes = None
+
+    @classmethod
+    def from_graph(cls, g):
+        """ DepGraph(또는 nodes()/edges()가 있는 그래프)에서 인덱스를 만듦 """
+        if not isinstance(g, DepGraph):
+            graph = DepGraph()
+            for node in g.nodes():
+                graph.add_node(str(node))
+            for source, target in g.edges():
+                graph.add_edge(str(source), str(target))
+            g = graph
+        offsets, sources = g.reverse_csr()
+        return cls(list(g.keys), offsets, sources)
+
+    @classmethod
+    def from_forest_json(cls, forest_path):
+        """ save_graph_as_json이 저장한 {'nodes': [...], 'edges': [...]} 파일에서 인덱스를 만듦 """
+        with open(forest_path, 'r') as file:
+            forest = json.load(file)
+        g = DepGraph()
+        for node in forest.get('nodes', []):
+            g.add_node(node)
+        for source, target in forest.get('edges', []):
+            g.add_edge(source, target)
+        index = cls.from_graph(g)
+        index.fingerprint = forest_fingerprint(forest_path)
+        return index
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path):
+        """ forest_snapshot으로 저장한 바이너리 스냅샷에서 인덱스를 만듦 (역방향 CSR을 그대로 복사) """
+        with ForestSnapshot(snapshot_path) as snapshot:
+            index = cls(snapshot.nodes(), array('q', snapshot.reverse_offsets), array('i', snapshot.reverse_sources))
+        index.fingerprint = forest_fingerprint(snapshot_path)
+        return index
+
+    def save(self, index_path):
+        """ 인덱스를 바이너리 파일로 저장 (임시 파일에 쓴 뒤 교체) """
+        keys_blob = '\n'.join(self.keys).encode('utf-8')
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(HEADER.pack(len(self.keys), len(self.sources), *self.fingerprint))
+            file.write(struct.pack('<q', len(keys_blob)))
+            file.write(keys_blob)
+            array('q', self.offsets).tofile(file)
+            array('i', self.sources).tofile(file)
+        os.replace(tmp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        """ save()로 저장한 인덱스 파일을 읽음 (형식이 다르면 ValueError) """
+        with open(index_path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{index_path} is not a reverse index file")
+            node_count, edge_count, mtime_ns, size = HEADER.unpack(file.read(HEADER.size))
+            (blob_size,) = struct.unpack('<q', file.read(8))
+            blob = file.read(blob_size).decode('utf-8')
+            keys = blob.split('\n') if node_count else []
+            offsets = array('q')
+            offsets.fromfile(file, node_count + 1)
+            sources = array('i')
+            sources.fromfile(file, edge_count)
+        return cls(keys, offsets, sources, (mtime_ns, size))
+
+    def dependents(self, node_id):
+        """ 노드를 바로 의존하는 노드 ID들 """
+        return self.sources[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+    def package_nodes(self, name):
+        """ 포레스트에 있는 패키지의 모든 버전 노드 ID (처음 부를 때 패키지 인덱스를 만듦) """
+        if self._package_nodes is None:
+            package_nodes = {}
+            for node_id, key in enumerate(self.keys):
+                package_nodes.setdefault(key_name(key), []).append(node_id)
+            self._package_nodes = package_nodes
+        return self._package_nodes.get(name, [])
+
+    def range_node_ids(self, name, range_str):
+        """
+        - Description: 포레스트에 있는 패키지 버전 중 range를 만족하는 버전 노드들을 고름
+        - Input: 패키지 이름, range 문자열 (취약점 DB 표기 '>= 1.0.0, < 1.2.3'도 가능)
+        - Output: 노드 ID 리스트 (버전 오름차순)
+        """
+        node_ids = self.package_nodes(name)
+        versions = [key_version(self.keys[node_id]) for node_id in node_ids]
+        version_list = build_version_list(versions)
+        id_of_version = dict(zip(versions, node_ids))
+        range_str = normalize_advisory_range(range_str)
+        return [id_of_version[version_list.versions[index]] for index in satisfying_indices(version_list, range_str)]
+
+    def iter_dependents_of_ids(self, start_ids, max_depth=None):
+        """
+        - Description: 여러 시작 노드에서 동시에 위로 올라가는 multi-source BFS
+                       시작 노드들의 dependents 합집합을 노드마다 한 번씩 돌려줌
+                       (시작 노드끼리 의존하면 그 시작 노드도 dependents로 나옴)
+        - Input: 노드 ID들, max_depth - 몇 단계 위까지 올라갈지 (None이면 끝까지)
+        - Output: (노드 문자열, depth)를 하나씩 돌려주는 generator
+        """
+        keys = self.keys
+        offsets = self.offsets
+        sources = self.sources
+        frontier = list(dict.fromkeys(start_ids))
+        expanded = set(frontier)
+        reported = set()
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node_id in frontier:
+                for parent_id in sources[offsets[node_id]:offsets[node_id + 1]]:
+                    if parent_id in reported:
+                        continue
+                    reported.add(parent_id)
+                    yield keys[parent_id], depth
+                    if parent_id not in expanded:
+                        expanded.add(parent_id)
+                        next_frontier.append(parent_id)
+            frontier = next_frontier
+
+    def iter_dependents(self, key, max_depth=None):
+        """
+        - Description: key를 (전이적으로) 의존하는 노드들을 BFS 순서로 하나씩 돌려줌 (key 자신은 제외)
+        - Input: 'name@version', max_depth - 몇 단계 위까지 올라갈지 (None이면 끝까지)
+        - Output: (노드 문자열, depth)를 하나씩 돌려주는 generator (key가 포레스트에 없으면 아무것도 없음)
+        """
+        start_id = self.ids.get(key)
+        if start_id is None:
+            return
+        for dependent, depth in self.iter_dependents_of_ids([start_id], max_depth):
+            if dependent != key:
+                yield dependent, depth
+
+    def iter_range_dependents(self, name, range_str, max_depth=None):
+        """ 패키지의 range에 드는 모든 버전의 dependents 합집합 (버전마다 따로 돌리지 않고 한 번에 탐색) """
+        return self.iter_dependents_of_ids(self.range_node_ids(name, range_str), max_depth)
+
+    def count_dependents(self, key, max_depth=None):
+        """ key를 (전이적으로) 의존하는 노드 수만 셈 """
+        return sum(1 for _ in self.iter_dependents(key, max_depth))
+
+    def closure_of(self, start_ids, memo=None):
+        """
+        - Description: 시작 노드들을 (전이적으로) 의존하는 노드 ID 집합 (iter_dependents_of_ids와 같은 결과)
+                       memo에 closure가 이미 있는 노드를 만나면 더 올라가지 않고 그 집합을 합침
+                       (그 노드 위쪽은 이미 다 구해둔 것이라 사이클이 있어도 결과가 같음)
+        - Input: 노드 ID들, memo - {노드 ID: closure frozenset}
+        - Output: (closure set, memo에서 가져다 쓴 횟수)
+        """
+        offsets = self.offsets
+        sources = self.sources
+        frontier = list(dict.fromkeys(start_ids))
+        expanded = set(frontier)
+        closure = set()
+        memo_hits = 0
+        while frontier:
+            next_frontier = []
+            for node_id in frontier:
+                for parent_id in sources[offsets[node_id]:offsets[node_id + 1]]:
+                    closure.add(parent_id)
+                    if parent_id in expanded:
+                        continue
+                    expanded.add(parent_id)
+                    if memo is not None and parent_id in memo:
+                        closure |= memo[parent_id]
+                        expanded |= memo[parent_id]
+                        memo_hits += 1
+                    else:
+                        next_frontier.append(parent_id)
+            frontier = next_frontier
+        return closure, memo_hits
+
+    def closure_ids(self, start_id, memo=None):
+        """
+        - Description: start_id를 (전이적으로) 의존하는 노드 ID 집합 (start_id 자신은 제외), 결과는 memo에 저장
+        - Input: 노드 ID, memo - {노드 ID: closure frozenset}
+        - Output: (closure frozenset, memo에서 가져다 쓴 횟수)
+        """
+        if memo is not None and start_id in memo:
+            return memo[start_id], 1
+        closure, memo_hits = self.closure_of([start_id], memo)
+        closure.discard(start_id)
+        closure = frozenset(closure)
+        if memo is not None:
+            memo[start_id] = closure
+        return closure, memo_hits
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __str__(self):
+        return f"ReverseIndex({len(self.keys)} nodes, {len(self.sources)} edges)"
+
+
+class ClosureCache:
+    """
+    - Description: 대상 'name@version' -> reverse dependency closure 결과를 실행이 끝나도 남겨두는 캐시 (SQLite)
+                   dependent 쪽에도 인덱스가 있어서, 포레스트의 간선이 바뀌면 그 간선이 닿는 결과만 골라서 지울 수 있음
+                   결과를 구한 포레스트의 지문(forest_fingerprint)을 같이 저장하고, 다른 포레스트로 열면 결과를 모두 버림
+                   (forest_update.py는 바뀐 결과만 지운 뒤 set_fingerprint로 새 포레스트의 지문을 남김)
+    - Input: db_path - 캐시 파일 경로, forest_fingerprint - 지금 포레스트의 (mtime_ns, size) (None이면 확인하지 않음)
+    """
+
+    def __init__(self, db_path='closure_cache.sqlite', forest_fingerprint=None):
+        self.db_path = db_path
+        self.forest_fingerprint = forest_fingerprint
+        self.conn = None
+        self.dropped = 0
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS targets (target TEXT PRIMARY KEY, dependents_count INTEGER NOT NULL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS closure (target TEXT NOT NULL, dependent TEXT NOT NULL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS closure_target ON closure (target)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS closure_dependent ON closure (dependent)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS forest (mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL)")
+            if self.forest_fingerprint is not None:
+                stored = self.conn.execute("SELECT mtime_ns, size FROM forest").fetchone()
+                if stored != tuple(self.forest_fingerprint):
+                    # 다른 포레스트(처음부터 다시 만든 포레스트 포함)에서 구한 결과는 쓸 수 없음
+                    self.dropped = self.conn.execute("SELECT COUNT(*) FROM targets").fetchone()[0]
+                    self.conn.execute("DELETE FROM closure")
+                    self.conn.execute("DELETE FROM targets")
+                    self._store_fingerprint(self.forest_fingerprint)
+        return self.conn
+
+    def _store_fingerprint(self, fingerprint):
+        self.conn.execute("DELETE FROM forest")
+        self.conn.execute("INSERT INTO forest VALUES (?, ?)", tuple(fingerprint))
+        self.conn.commit()
+
+    def set_fingerprint(self, fingerprint):
+        """ 남은 결과가 이 포레스트에서도 맞다고 기록 (바뀐 간선에 닿는 결과를 invalidate로 지운 뒤에 부름) """
+        self._connect()
+        self.forest_fingerprint = fingerprint
+        self._store_fingerprint(fingerprint)
+
+    def get(self, target):
+        """ 캐시된 dependents 리스트, 없으면 None """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM targets WHERE target = ?", (target,)).fetchone() is None:
+            return None
+        return [row[0] for row in conn.execute("SELECT dependent FROM closure WHERE target = ?", (target,))]
+
+    def put(self, target, dependents):
+        conn = self._connect()
+        dependents = list(dependents)
+        conn.execute("DELETE FROM closure WHERE target = ?", (target,))
+        conn.execute("INSERT OR REPLACE INTO targets VALUES (?, ?)", (target, len(dependents)))
+        conn.executemany("INSERT INTO closure VALUES (?, ?)", [(target, dependent) for dependent in dependents])
+        conn.commit()
+
+    def invalidate(self, changed_keys):
+        """
+        - Description: 간선 (u -> v)가 생기거나 없어지면 v 자신이나 v가 closure에 들어있는 대상의 결과만 바뀜
+                       바뀐 간선들의 downstream 노드(v)를 받아서 그런 대상들의 결과만 지움
+        - Input: 바뀐 간선의 downstream 'name@version'들
+        - Output: 지운 대상 리스트
+        """
+        conn = self._connect()
+        changed_keys = list(set(changed_keys))
+        stale = set()
+        for start in range(0, len(changed_keys), 400):
+            chunk = changed_keys[start:start + 400]
+            marks = ', '.join('?' * len(chunk))
+            stale.update(row[0] for row in conn.execute(f"SELECT target FROM targets WHERE target IN ({marks})", chunk))
+            stale.update(row[0] for row in conn.execute(f"SELECT DISTINCT target FROM closure WHERE dependent IN ({marks})", chunk))
+        conn.executemany("DELETE FROM closure WHERE target = ?", [(target,) for target in stale])
+        conn.executemany("DELETE FROM targets WHERE target = ?", [(target,) for target in stale])
+        conn.commit()
+        return sorted(stale)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def forest_fingerprint(forest_path):
+    stat = os.stat(forest_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_or_build(forest_path='entire_forest.json', index_path=None):
+    """
+    - Description: 포레스트의 reverse index를 읽음. 인덱스 파일이 없거나 포레스트가 바뀌었으면 새로 만들어서 저장
+    - Input: 포레스트 JSON(또는 .snapshot) 경로, 인덱스 파일 경로 (None이면 포레스트 옆의 .ridx)
+    - Output: ReverseIndex
+    """
+    # JSON 포레스트는 <이름>.ridx, 스냅샷은 <이름>.snapshot.ridx
+    index_path = index_path or (forest_path + '.ridx' if forest_path.endswith('.snapshot') else os.path.splitext(forest_path)[0] + '.ridx')
+    if os.path.exists(index_path):
+        try:
+            index = ReverseIndex.load(index_path)
+            if index.fingerprint == forest_fingerprint(forest_path):
+                return index
+            print(f"[+] {forest_path} changed, rebuilding {index_path}")
+        except (ValueError, EOFError) as e:
+            print(f"Error occurred while loading {index_path}: {e}")
+    if forest_path.endswith('.snapshot'):
+        index = ReverseIndex.from_snapshot(forest_path)
+    else:
+        index = ReverseIndex.from_forest_json(forest_path)
+    index.save(index_path)
+    print(f"[+] {index} saved to {index_path}")
+    return index
+
+
+if __name__ == "__main__":
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    max_depth = None
+    for option in options:
+        if option.startswith('--max-depth='):
+            max_depth = int(option.split('=', 1)[1])
+
+    if len(args) == 2 and args[0] == 'build':
+        print(f"\n\n현재 시간:", datetime.datetime.now())
+        load_or_build(args[1])
+        print(f"현재 시간:", datetime.datetime.now())
+    elif len(args) == 4 and args[0] == 'range':
+        # 취약점 range에 드는 모든 버전의 dependents 합집합
+        forest_path, tree_name, version_range = args[1:]
+        index = load_or_build(forest_path)
+        matched = [index.keys[node_id] for node_id in index.range_node_ids(tree_name, version_range)]
+        print(f"[+] {tree_name} {version_range}: {len(matched)} versions in forest")
+        if '--count' in options:
+            count = sum(1 for _ in index.iter_range_dependents(tree_name, version_range, max_depth))
+            print(f"[+] {tree_name} {version_range}: {count} dependents")
+        else:
+            for key, depth in index.iter_range_dependents(tree_name, version_range, max_depth):
+                print(f"{depth}\t{key}", flush='--stream' in options)
+    elif len(args) == 4 and args[0] == 'query':
+        forest_path, tree_name, tree_version = args[1:]
+        index = load_or_build(forest_path)
+        tree_str = make_key(tree_name, tree_version)
+        if '--count' in options:
+            print(f"[+] {tree_str}: {index.count_dependents(tree_str, max_depth)} dependents")
+        else:
+            # --stream: 찾는 대로 한 줄씩 출력
+            for key, depth in index.iter_dependents(tree_str, max_depth):
+                print(f"{depth}\t{key}", flush='--stream' in options)
+    else:
+        print("Usage: python3 reverse_index.py build forest.json\n"
+              "       python3 reverse_index.py query forest.json package_name package_version [--max-depth=N] [--count] [--stream]\n"
+              "       python3 reverse_index.py range forest.json package_name 'version_range' [--max-depth=N] [--count] [--stream]")
@@ -0,0 +1,439 @@
+import re
+import bisect
+import datetime
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+
+# node-semver(strict 모드)의 정규식을 그대로 옮겨옴
+NUMERIC = r'0|[1-9]\d*'
+NONNUMERIC = r'\d*[a-zA-Z-][a-zA-Z0-9-]*'
+PRERELEASE_ID = f'(?:{NUMERIC}|{NONNUMERIC})'
+PRERELEASE = rf'(?:-({PRERELEASE_ID}(?:\.{PRERELEASE_ID})*))'
+BUILD = r'(?:\+([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))'
+MAINVERSION = rf'({NUMERIC})\.({NUMERIC})\.({NUMERIC})'
+FULLPLAIN = f'v?{MAINVERSION}{PRERELEASE}?{BUILD}?'
+LOOSEPLAIN = rf'[v=\s]*(?:\d+)\.(?:\d+)\.(?:\d+)(?:-?(?:[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?{BUILD}?'
+XRANGE_ID = rf'{NUMERIC}|x|X|\*'
+XRANGEPLAIN = (rf'[v=\s]*({XRANGE_ID})'
+               rf'(?:\.({XRANGE_ID})'
+               rf'(?:\.({XRANGE_ID})'
+               rf'(?:{PRERELEASE})?{BUILD}?)?)?')
+GTLT = r'((?:<|>)?=?)'
+
+FULL_RE = re.compile(f'^{FULLPLAIN}$')
+HYPHEN_RE = re.compile(rf'^\s*({XRANGEPLAIN})\s+-\s+({XRANGEPLAIN})\s*$')
+COMPARATOR_TRIM_RE = re.compile(rf'(\s*){GTLT}\s*({LOOSEPLAIN}|{XRANGEPLAIN})')
+TILDE_TRIM_RE = re.compile(r'(\s*)(?:~>?)\s+')
+CARET_TRIM_RE = re.compile(r'(\s*)(?:\^)\s+')
+CARET_RE = re.compile(rf'^\^{XRANGEPLAIN}$')
+TILDE_RE = re.compile(rf'^(?:~>?){XRANGEPLAIN}$')
+XRANGE_RE = re.compile(rf'^{GTLT}\s*{XRANGEPLAIN}$')
+STAR_RE = re.compile(r'(<|>)?=?\s*\*')
+GTE0_RE = re.compile(r'^\s*>=\s*0\.0\.0\s*$')
+COMPARATOR_RE = re.compile(rf'^{GTLT}\s*({FULLPLAIN})$|^$')
+
+# 정렬된 버전 키 리스트와 원래 버전 문자열 리스트, 버전별 publish 시각 (인덱스가 서로 대응)
+# times는 epoch 초 array('q') (시각을 모르는 버전은 0), publish 시각을 모르는 패키지는 None
+VersionList = namedtuple('VersionList', ['keys', 'versions', 'times'], defaults=(None,))
+
+# 어떤 버전이든 허용하는 comparator
+ANY = ('', None)
+
+
+def _is_x(identifier):
+    return not identifier or identifier.lower() == 'x' or identifier == '*'
+
+
+def _prerelease_key(prerelease):
+    """
+    - Description: prerelease 문자열을 tuple 비교가 가능한 키로 변환
+    - Input: '-' 뒤의 prerelease 문자열 (없으면 None)
+    - Output: 정식 버전은 (1,), prerelease는 (0, 식별자...) -> 정식 버전이 항상 더 큼
+    """
+    if not prerelease:
+        return (1,)
+    parts = []
+    for identifier in prerelease.split('.'):
+        if identifier.isdigit():
+            parts.append((0, int(identifier)))
+        else:
+            parts.append((1, identifier))
+    return (0, *parts)
+
+
+def parse_version(version):
+    """
+    - Description: 버전 문자열을 비교 가능한 키 (major, minor, patch, prerelease_key)로 파싱
+    - Input: '1.2.3', 'v1.2.3-beta.1+build' 같은 버전 문자열
+    - Output: 키 tuple, 유효하지 않은 버전이면 None
+    """
+    if not isinstance(version, str):
+        return None
+    m = FULL_RE.match(version.strip())
+    if not m:
+        return None
+    return (int(m.group(1)), int(m.group(2)), int(m.group(3)), _prerelease_key(m.group(4)))
+
+
+def _replace_hyphen(m):
+    groups = m.groups()
+    from_str, f_major, f_minor, f_patch = groups[0], groups[1], groups[2], groups[3]
+    to_str, t_major, t_minor, t_patch, t_pre = groups[6], groups[7], groups[8], groups[9], groups[10]
+
+    if _is_x(f_major):
+        start = ''
+    elif _is_x(f_minor):
+        start = f'>={f_major}.0.0'
+    elif _is_x(f_patch):
+        start = f'>={f_major}.{f_minor}.0'
+    else:
+        start = f'>={from_str}'
+
+    if _is_x(t_major):
+        end = ''
+    elif _is_x(t_minor):
+        end = f'<{int(t_major) + 1}.0.0-0'
+    elif _is_x(t_patch):
+        end = f'<{t_major}.{int(t_minor) + 1}.0-0'
+    elif t_pre:
+        end = f'<={t_major}.{t_minor}.{t_patch}-{t_pre}'
+    else:
+        end = f'<={to_str}'
+    return f'{start} {end}'.strip()
+
+
+def _replace_caret(comp):
+    m = CARET_RE.match(comp)
+    if not m:
+        return comp
+    major, minor, patch, pre = m.group(1), m.group(2), m.group(3), m.group(4)
+    if _is_x(major):
+        return ''
+    if _is_x(minor):
+        return f'>={major}.0.0 <{int(major) + 1}.0.0-0'
+    if _is_x(patch):
+        if major == '0':
+            return f'>={major}.{minor}.0 <{major}.{int(minor) + 1}.0-0'
+        return f'>={major}.{minor}.0 <{int(major) + 1}.0.0-0'
+    start = f'>={major}.{minor}.{patch}' + (f'-{pre}' if pre else '')
+    if major == '0':
+        if minor == '0':
+            return f'{start} <{major}.{minor}.{int(patch) + 1}-0'
+        return f'{start} <{major}.{int(minor) + 1}.0-0'
+    return f'{start} <{int(major) + 1}.0.0-0'
+
+
+def _replace_tilde(comp):
+    m = TILDE_RE.match(comp)
+    if not m:
+        return comp
+    major, minor, patch, pre = m.group(1), m.group(2), m.group(3), m.group(4)
+    if _is_x(major):
+        return ''
+    if _is_x(minor):
+        return f'>={major}.0.0 <{int(major) + 1}.0.0-0'
+    if _is_x(patch):
+        return f'>={major}.{minor}.0 <{major}.{int(minor) + 1}.0-0'
+    start = f'>={major}.{minor}.{patch}' + (f'-{pre}' if pre else '')
+    return f'{start} <{major}.{int(minor) + 1}.0-0'
+
+
+def _replace_xrange(comp):
+    m = XRANGE_RE.match(comp)
+    if not m:
+        return comp
+    gtlt, major, minor, patch = m.group(1), m.group(2), m.group(3), m.group(4)
+    x_major = _is_x(major)
+    x_minor = x_major or _is_x(minor)
+    x_patch = x_minor or _is_x(patch)
+    if gtlt == '=' and x_patch:
+        gtlt = ''
+
+    if x_major:
+        return '<0.0.0-0' if gtlt in ('>', '<') else '*'
+    if gtlt and x_patch:
+        major = int(major)
+        minor = 0 if x_minor else int(minor)
+        patch = 0
+        pre = ''
+        if gtlt == '>':
+            gtlt = '>='
+            if x_minor:
+                major, minor = major + 1, 0
+            else:
+                minor += 1
+        elif gtlt == '<=':
+            gtlt = '<'
+            if x_minor:
+                major += 1
+            else:
+                minor += 1
+        if gtlt == '<':
+            pre = '-0'
+        return f'{gtlt}{major}.{minor}.{patch}{pre}'
+    if x_minor:
+        return f'>={major}.0.0 <{int(major) + 1}.0.0-0'
+    if x_patch:
+        return f'>={major}.{minor}.0 <{major}.{int(minor) + 1}.0-0'
+    return comp
+
+
+def _parse_comparator(comp):
+    """ 'op + 완전한 버전' 형태의 comparator 하나를 (op, key)로 파싱, 잘못된 형식이면 None """
+    m = COMPARATOR_RE.match(comp)
+    if not m:
+        return None
+    if m.group(2) is None:
+        return ANY
+    op = m.group(1)
+    if op == '=':
+        op = ''
+    return (op, parse_version(m.group(2)))
+
+
+def _parse_comparator_set(range_str):
+    range_str = HYPHEN_RE.sub(_replace_hyphen, range_str)
+    range_str = COMPARATOR_TRIM_RE.sub(r'\1\2\3', range_str)
+    range_str = TILDE_TRIM_RE.sub(r'\1~', range_str)
+    range_str = CARET_TRIM_RE.sub(r'\1^', range_str)
+
+    comps = []
+    for comp in range_str.split(' '):
+        comp = ' '.join(_replace_caret(c) for c in comp.strip().split())
+        comp = ' '.join(_replace_tilde(c) for c in comp.strip().split())
+        comp = ' '.join(_replace_xrange(c) for c in comp.strip().split())
+        comps.append(STAR_RE.sub('', comp.strip()))
+
+    comparators = []
+    for comp in ' '.join(comps).split():
+        if GTE0_RE.match(comp):
+            comp = ''
+        comparator = _parse_comparator(comp)
+        if comparator is None:
+            return None
+        comparators.append(comparator)
+    if not comparators:
+        comparators.append(ANY)
+    return tuple(comparators)
+
+
+@lru_cache(maxsize=65536)
+def parse_range(range_str):
+    """
+    - Description: npm range 문자열(^, ~, x-range, hyphen, ||)을 comparator 집합들로 파싱
+                   semver.Range(strict)와 같은 규칙으로 desugar 하고, 같은 range는 한 번만 파싱
+    - Input: package.json에 있는 버전 range 문자열
+    - Output: comparator 집합들의 tuple (집합 중 하나라도 만족하면 매칭), 잘못된 range면 None
+    """
+    if not isinstance(range_str, str):
+        return None
+    raw = ' '.join(range_str.strip().split())
+    comparator_sets = []
+    for part in raw.split('||'):
+        comparator_set = _parse_comparator_set(part.strip())
+        if comparator_set is None:
+            return None
+        comparator_sets.append(comparator_set)
+    return tuple(comparator_sets)
+
+
+def _test_comparator(comparator, key):
+    op, target = comparator
+    if target is None:
+        return True
+    if op == '':
+        return key == target
+    if op == '<':
+        return key < target
+    if op == '>':
+        return key > target
+    if op == '<=':
+        return key <= target
+    return key >= target
+
+
+def _test_set(comparator_set, key):
+    for comparator in comparator_set:
+        if not _test_comparator(comparator, key):
+            return False
+    if key[3][0] == 0:
+        # prerelease 버전은 같은 [major, minor, patch]에 prerelease가 명시된 comparator가 있을 때만 허용
+        for _, target in comparator_set:
+            if target is not None and target[3][0] == 0 and target[:3] == key[:3]:
+                return True
+        return False
+    return True
+
+
+def _bounds(comparator_set, keys):
+    """ comparator 집합이 허용하는 정렬된 키 리스트의 인덱스 구간 [lo, hi)를 이진 탐색으로 계산 """
+    lo, hi = 0, len(keys)
+    for op, target in comparator_set:
+        if target is None:
+            continue
+        if op == '>':
+            lo = max(lo, bisect.bisect_right(keys, target))
+        elif op == '>=':
+            lo = max(lo, bisect.bisect_left(keys, target))
+        elif op == '<':
+            hi = min(hi, bisect.bisect_left(keys, target))
+        elif op == '<=':
+            hi = min(hi, bisect.bisect_right(keys, target))
+        else:
+            lo = max(lo, bisect.bisect_left(keys, target))
+            hi = min(hi, bisect.bisect_right(keys, target))
+    return lo, hi
+
+
+def satisfies(version, range_str):
+    """
+    - Description: 버전이 range를 만족하는지 확인 (semver.satisfies)
+    - Input: 버전 문자열, range 문자열
+    - Output: True / False
+    """
+    key = parse_version(version)
+    comparator_sets = parse_range(range_str)
+    if key is None or comparator_sets is None:
+        return False
+    return any(_test_set(comparator_set, key) for comparator_set in comparator_sets)
+
+
+def parse_publish_time(value):
+    """
+    - Description: npm view <pkg> time의 시각('2015-01-01T00:00:00.000Z')을 epoch 초로 바꿈
+    - Input: ISO 8601 문자열 또는 epoch 초 (int, float)
+    - Output: epoch 초 (int), 읽을 수 없으면 None
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    try:
+        parsed = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp())
+
+
+def build_version_list(all_versions, times=None):
+    """
+    - Description: npm에 올라온 버전 리스트를 한 번만 파싱해서 정렬된 VersionList로 만듦
+                   유효하지 않은 버전은 버리고, 키가 같은 버전은 먼저 나온 것이 뒤에 오도록 정렬
+                   times가 있으면 정렬된 순서에 맞춘 publish 시각 배열도 같이 만듦
+    - Input: 버전 문자열 리스트 (npm view versions 결과, 버전이 하나면 문자열일 수도 있음),
+             times - {버전: publish 시각} (npm view time 결과, 없으면 None)
+    - Output: VersionList(keys, versions, times)
+    """
+    if isinstance(all_versions, str):
+        all_versions = [all_versions]
+    parsed = []
+    for index, version in enumerate(all_versions or []):
+        key = parse_version(version)
+        if key is not None:
+            parsed.append((key, -index, version))
+    parsed.sort()
+    versions = [version for _, _, version in parsed]
+    version_times = None
+    if times is not None:
+        version_times = array('q', (parse_publish_time(times.get(version)) or 0 for version in versions))
+    return VersionList([key for key, _, _ in parsed], versions, version_times)
+
+
+def max_satisfying_index(version_list, range_str, as_of=None):
+    """
+    - Description: range를 만족하는 가장 높은 버전의 인덱스를 이진 탐색으로 찾음
+                   as_of가 있으면 그 시각까지 publish 된 버전 중에서 고름 (DeSTFying처럼 과거 시점 기준으로 해석)
+    - Input: build_version_list로 만든 VersionList, range 문자열,
+             as_of - epoch 초 (None이면 지금 기준, 패키지에 publish 시각이 없으면 시각은 보지 않음)
+    - Output: version_list 안의 인덱스, 없으면 None
+    """
+    comparator_sets = parse_range(range_str)
+    if comparator_sets is None:
+        return None
+    keys = version_list.keys
+    times = version_list.times if as_of is not None else None
+    best = None
+    for comparator_set in comparator_sets:
+        lo, hi = _bounds(comparator_set, keys)
+        if best is not None:
+            lo = max(lo, best + 1)
+        # 구간의 위에서부터 내려오면서 prerelease 규칙까지 만족하는 첫 버전이 이 집합의 최댓값
+        # as_of 이후에 publish 된 버전은 건너뜀 (시각을 모르는 버전은 0이라 항상 허용)
+        for index in range(hi - 1, lo - 1, -1):
+            if times is not None and times[index] > as_of:
+                continue
+            if _test_set(comparator_set, keys[index]):
+                best = index
+                break
+    return best
+
+
+def max_satisfying(versions, range_str, as_of=None):
+    """
+    - Description: semver.maxSatisfying과 같은 결과를 Node.js 프로세스 없이 계산
+    - Input: VersionList 또는 버전 문자열 리스트, range 문자열, as_of - epoch 초 (None이면 지금 기준)
+    - Output: range를 만족하는 가장 높은 버전 문자열, 없으면 None
+    """
+    if not isinstance(versions, VersionList):
+        versions = build_version_list(versions)
+    index = max_satisfying_index(versions, range_str, as_of)
+    if index is None:
+        return None
+    return versions.versions[index]
+
+
+def satisfying_indices(version_list, range_str, as_of=None):
+    """
+    - Description: range를 만족하는 모든 버전의 인덱스를 이진 탐색으로 좁힌 구간 안에서만 찾음 (오름차순)
+    - Input: build_version_list로 만든 VersionList, range 문자열,
+             as_of - epoch 초 (None이면 지금 기준, max_satisfying_index와 같이 그 뒤에 publish 된 버전은 뺌)
+    - Output: version_list 안의 인덱스 리스트 (잘못된 range면 빈 리스트)
+    """
+    comparator_sets = parse_range(range_str)
+    if comparator_sets is None:
+        return []
+    keys = version_list.keys
+    times = version_list.times if as_of is not None else None
+    matched = set()
+    for comparator_set in comparator_sets:
+        lo, hi = _bounds(comparator_set, keys)
+        for index in range(lo, hi):
+            if times is not None and times[index] > as_of:
+                continue
+            if index not in matched and _test_set(comparator_set, keys[index]):
+                matched.add(index)
+    return sorted(matched)
+
+
+def satisfying_runs(version_list, range_str, as_of=None):
+    """
+    - Description: range를 만족하는 버전 인덱스들을 연속 구간 [lo, hi)들로 묶음
+                   보통은 구간 하나지만 '||'나 prerelease 규칙 때문에 여러 구간으로 나뉠 수 있음
+                   마지막 구간의 hi - 1이 같은 as_of의 max_satisfying_index와 같음
+    - Input: build_version_list로 만든 VersionList, range 문자열, as_of - epoch 초 (None이면 지금 기준)
+    - Output: (lo, hi) tuple 리스트 (오름차순, 겹치지 않음)
+    """
+    runs = []
+    for index in satisfying_indices(version_list, range_str, as_of):
+        if runs and runs[-1][1] == index:
+            runs[-1] = (runs[-1][0], index + 1)
+        else:
+            runs.append((index, index + 1))
+    return runs
+
+
+def normalize_advisory_range(range_str):
+    """
+    - Description: 취약점 DB의 range 표기(예: '>= 4.0.0, < 4.17.21')를 npm range로 바꿈
+                   쉼표로 나뉜 조건은 모두 만족해야 하므로 공백으로 이어 붙임 ('||'는 그대로)
+    - Input: 취약점 DB의 Vulnerable Version Range 문자열
+    - Output: npm range 문자열
+    """
+    return ' || '.join(' '.join(part.replace(',', ' ').split()) for part in range_str.split('||'))
@@ -0,0 +1,97 @@
+import os
+import sys
+import itertools
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dep_graph import DepGraph
+from forest_builder import ForestBuilder
+from node_key import split_key
+
+
+# 'name@version' -> 해석된 dependencies (사이클과 여러 경로로 만나는 노드 포함)
+DEPENDENCIES = {
+    'a@1.0.0': ['b@1.0.0'],
+    'b@1.0.0': ['c@1.0.0'],
+    'c@1.0.0': ['d@1.0.0', 'x@1.0.0'],
+    'd@1.0.0': ['e@1.0.0'],
+    'e@1.0.0': ['f@1.0.0', 'c@1.0.0'],
+    'f@1.0.0': [],
+    'x@1.0.0': ['y@2.0.0'],
+    'y@2.0.0': [],
+    'r@1.0.0': ['c@1.0.0', 'z@1.0.0'],
+    'z@1.0.0': ['e@1.0.0'],
+    's@1.0.0': ['e@1.0.0'],
+}
+ROOTS = ['a@1.0.0', 'r@1.0.0', 's@1.0.0']
+
+
+class FixtureBuilder(ForestBuilder):
+    """ 파일, 캐시, registry 대신 DEPENDENCIES로 의존성을 읽는 ForestBuilder """
+
+    def __init__(self):
+        super().__init__(offline_mode=True)
+        self.reads = []
+
+    def prefetch_dependencies(self, g, frontier):
+        pass
+
+    def get_onewalk_dep(self, g, pkg_name, pkg_version, working):
+        key = f"{pkg_name}@{pkg_version}"
+        self.reads.append(key)
+        return g, working, dict(split_key(child) for child in DEPENDENCIES.get(key, []))
+
+
+def recursive_walk(roots, max_depth=None):
+    """
+    - Description: BFS로 바꾸기 전의 재귀 방식 (루트마다 따로 depth를 세면서 재귀로 펼침)을 기준으로 쓰는 구현
+    - Output: (노드 집합, 간선 집합)
+    """
+    nodes, edges = set(), set()
+
+    def walk(key, depth, best):
+        nodes.add(key)
+        if max_depth is not None and depth >= max_depth:
+            return
+        for child in DEPENDENCIES.get(key, []):
+            nodes.add(child)
+            edges.add((key, child))
+            if depth + 1 < best.get(child, float('inf')):
+                best[child] = depth + 1
+                walk(child, depth + 1, best)
+
+    for root in roots:
+        walk(root, 0, {root: 0})
+    return nodes, edges
+
+
+def build(roots, max_depth=None):
+    builder = FixtureBuilder()
+    g = DepGraph()
+    for root in roots:
+        builder.process_package(g, [root], max_depth)
+    return g, builder
+
+
+@pytest.mark.parametrize('max_depth', [None, 0, 1, 2, 3, 4, 5])
+@pytest.mark.parametrize('roots', list(itertools.permutations(ROOTS)))
+def test_bfs_matches_recursive_walk(roots, max_depth):
+    g, _ = build(roots, max_depth)
+    nodes, edges = recursive_walk(roots, max_depth)
+    assert set(g.nodes()) == nodes
+    assert set(g.edges()) == edges
+
+
+def test_shallower_root_expands_node_left_at_depth_limit():
+    # a에서는 c가 depth 2라서 펼치지 않지만, r에서는 depth 1이므로 d, x까지 펼쳐야 함
+    g, _ = build(['a@1.0.0', 'r@1.0.0'], max_depth=2)
+    assert g.has_edge('c@1.0.0', 'd@1.0.0')
+    assert g.has_edge('c@1.0.0', 'x@1.0.0')
+    assert not g.has_node('y@2.0.0')
+
+
+def test_depth_limited_walk_reads_each_node_once():
+    _, builder = build(list(ROOTS) * 2, max_depth=3)
+    assert len(builder.reads) == len(set(builder.reads))
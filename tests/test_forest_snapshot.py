@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dep_graph import DepGraph
+from forest_snapshot import ForestSnapshot, write_snapshot
+
+
+def build_graph(nodes, edges):
+    g = DepGraph()
+    for node in nodes:
+        g.add_node(node)
+    for source, target in edges:
+        g.add_edge(source, target)
+    return g
+
+
+# 'a@'(버전이 빈 노드)와 'a'(이름만 있는 노드)는 서로 다른 노드로 남아야 함
+GRAPHS = [
+    (['a@', 'a', 'b@1.0.0'], [('b@1.0.0', 'a@'), ('b@1.0.0', 'a'), ('a', 'a@')]),
+    (['a', 'a@'], [('a@', 'a')]),
+    (['@s/core@', '@s/core', '@s/core@1.0.0'], [('@s/core@1.0.0', '@s/core@'), ('@s/core', '@s/core@1.0.0')]),
+    (['p@1.0.0', 'p@2.0.0', 'q@1.0.0'], [('p@1.0.0', 'q@1.0.0'), ('p@2.0.0', 'q@1.0.0')]),
+]
+
+
+@pytest.mark.parametrize('nodes, edges', GRAPHS)
+def test_snapshot_round_trip_keeps_keys(tmp_path, nodes, edges):
+    g = build_graph(nodes, edges)
+    path = str(tmp_path / 'forest.snapshot')
+    write_snapshot(g, path)
+    with ForestSnapshot(path) as snapshot:
+        assert snapshot.nodes() == g.nodes()
+        for node_id, key in enumerate(g.nodes()):
+            assert snapshot.key(node_id) == key
+            assert snapshot.node_id(key) == node_id
+        assert sorted(snapshot.edges()) == sorted(g.edges())
+
+        restored = snapshot.to_depgraph()
+    assert restored.nodes() == g.nodes()
+    assert sorted(restored.edges()) == sorted(g.edges())
+
+
+def test_snapshot_missing_empty_version_node(tmp_path):
+    g = build_graph(['a@', 'b@1.0.0'], [('b@1.0.0', 'a@')])
+    path = str(tmp_path / 'forest.snapshot')
+    write_snapshot(g, path)
+    with ForestSnapshot(path) as snapshot:
+        assert snapshot.node_id('a@') == 0
+        assert snapshot.node_id('a') is None
+        assert not snapshot.has_node('a')
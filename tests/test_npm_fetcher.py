@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import npm_fetcher
+from npm_fetcher import NpmFetcher, RateLimiter
+
+
+class StubRegistry:
+    """
+    - Description: fetch_function 대신 쓰는 stub
+                   'ok-*'는 바로 성공, 'flaky-*'는 처음 failures번 timeout 후 성공,
+                   'dead-*'는 계속 실패, 'missing-*'는 E404 (재시도 안 함)
+    """
+
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, args, timeout):
+        name = args[0]
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            attempt = self.calls[name]
+        if name.startswith('flaky') and attempt <= self.failures:
+            raise subprocess.TimeoutExpired(['npm', 'view', *args], timeout)
+        if name.startswith('dead'):
+            raise subprocess.CalledProcessError(1, ['npm', 'view', *args], stderr='npm ERR! code ETIMEDOUT')
+        if name.startswith('missing'):
+            raise subprocess.CalledProcessError(1, ['npm', 'view', *args], stderr='npm ERR! code E404')
+        return f'"{name}"'
+
+
+class FakeClock:
+    """ time.monotonic / time.sleep 대신 쓰는 가짜 시계 (sleep하면 시간만 앞으로 감) """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # npm_fetcher 모듈이 보는 time만 바꿈 (다른 스레드와 pytest는 진짜 시계를 씀)
+    fake = FakeClock()
+    monkeypatch.setattr(npm_fetcher, 'time', fake)
+    return fake
+
+
+def test_rate_limiter_spaces_requests(clock):
+    limiter = RateLimiter(rate=10, burst=2)
+    times = []
+    for _ in range(6):
+        limiter.acquire()
+        times.append(clock.now)
+    # burst만큼은 바로 나가고, 그 다음부터는 0.1초 간격
+    assert times[:2] == [0.0, 0.0]
+    assert times[-1] == pytest.approx(0.4)
+    assert all(later - earlier == pytest.approx(0.1) for earlier, later in zip(times[1:], times[2:]))
+
+
+def test_rate_limiter_without_rate_never_waits(clock):
+    limiter = RateLimiter(rate=None)
+    for _ in range(100):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+
+def test_view_success():
+    stub = StubRegistry()
+    fetcher = NpmFetcher(concurrency=1, retries=3, backoff=0, fetch_function=stub)
+    assert fetcher.view(['ok-a', '--json']) == '"ok-a"'
+    assert fetcher.stats() == {'requests': 1, 'retried': 0, 'failed': 0}
+
+
+def test_view_retries_timeout_with_exponential_backoff(clock):
+    stub = StubRegistry(failures=3)
+    fetcher = NpmFetcher(concurrency=1, retries=3, backoff=1.0, fetch_function=stub)
+    assert fetcher.view(['flaky-a']) == '"flaky-a"'
+    assert stub.calls['flaky-a'] == 4
+    assert fetcher.stats() == {'requests': 4, 'retried': 3, 'failed': 0}
+    # 1초, 2초, 4초 (+ 최대 10% jitter)
+    assert len(clock.sleeps) == 3
+    for delay, expected in zip(clock.sleeps, [1.0, 2.0, 4.0]):
+        assert expected <= delay <= expected * 1.1
+
+
+def test_view_persistent_failure_raises_last_error(clock):
+    stub = StubRegistry()
+    fetcher = NpmFetcher(concurrency=1, retries=2, backoff=0.5, fetch_function=stub)
+    with pytest.raises(subprocess.CalledProcessError):
+        fetcher.view(['dead-a'])
+    assert stub.calls['dead-a'] == 3
+    assert fetcher.stats() == {'requests': 3, 'retried': 2, 'failed': 1}
+
+
+def test_view_does_not_retry_404(clock):
+    stub = StubRegistry()
+    fetcher = NpmFetcher(concurrency=1, retries=3, backoff=1.0, fetch_function=stub)
+    with pytest.raises(subprocess.CalledProcessError):
+        fetcher.view(['missing-a'])
+    assert stub.calls['missing-a'] == 1
+    assert clock.sleeps == []
+
+
+def test_map_returns_results_and_errors():
+    stub = StubRegistry(failures=1)
+    fetcher = NpmFetcher(concurrency=4, retries=2, backoff=0, fetch_function=stub)
+    names = ['ok-a', 'flaky-b', 'dead-c', 'missing-d', 'ok-e']
+    results = {key: (stdout, error) for key, stdout, error in fetcher.map((name, [name]) for name in names)}
+
+    assert set(results) == set(names)
+    assert results['ok-a'] == ('"ok-a"', None)
+    assert results['flaky-b'] == ('"flaky-b"', None)
+    assert results['ok-e'] == ('"ok-e"', None)
+    for name in ['dead-c', 'missing-d']:
+        stdout, error = results[name]
+        assert stdout is None
+        assert isinstance(error, subprocess.CalledProcessError)
+    assert fetcher.stats()['failed'] == 2
+
+
+def test_map_propagates_os_error():
+    def refuse(args, timeout):
+        raise ConnectionRefusedError(f"connection refused for {args[0]}")
+
+    fetcher = NpmFetcher(concurrency=2, retries=0, fetch_function=refuse)
+    results = list(fetcher.map([('a', ['a']), ('b', ['b'])]))
+    assert sorted(key for key, _, _ in results) == ['a', 'b']
+    assert all(stdout is None and isinstance(error, ConnectionRefusedError) for _, stdout, error in results)
+
+
+def test_map_keeps_bounded_window():
+    concurrency = 2
+    window = concurrency * 4
+    lock = threading.Lock()
+    counts = {'pulled': 0, 'finished': 0, 'max_outstanding': 0}
+
+    def jobs():
+        for index in range(100):
+            with lock:
+                counts['pulled'] += 1
+            yield index, [f'ok-{index}']
+
+    def fetch(args, timeout):
+        with lock:
+            counts['max_outstanding'] = max(counts['max_outstanding'], counts['pulled'] - counts['finished'])
+        with lock:
+            counts['finished'] += 1
+        return args[0]
+
+    fetcher = NpmFetcher(concurrency=concurrency, fetch_function=fetch)
+    results = list(fetcher.map(jobs()))
+
+    assert sorted(key for key, _, _ in results) == list(range(100))
+    assert all(error is None for _, _, error in results)
+    # 작업 목록 전체를 한 번에 꺼내지 않고 window 안에서만 제출
+    assert counts['max_outstanding'] <= window
@@ -0,0 +1,120 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest_builder import ForestBuilder
+from range_graph import RangeGraph
+from semver_resolver import build_version_list, max_satisfying, parse_publish_time
+
+
+# 패키지 -> {버전: publish 시각}
+VERSIONS = {
+    'app': {'1.0.0': '2020-01-01T00:00:00Z', '1.1.0': '2021-01-01T00:00:00Z'},
+    'lib': {'1.0.0': '2020-01-01T00:00:00Z', '1.1.0': '2020-06-01T00:00:00Z', '1.2.0': '2021-06-01T00:00:00Z',
+            '2.0.0': '2021-07-01T00:00:00Z'},
+    'util': {'1.0.0': '2020-01-01T00:00:00Z', '1.0.1': '2021-08-01T00:00:00Z'},
+    'bad': {'0.1.0': '2020-01-01T00:00:00Z', '0.2.0': '2021-09-01T00:00:00Z'},
+}
+# 'name@version' -> package.json의 dependencies (range)
+DEPENDENCIES = {
+    'app@1.0.0': {'lib': '^1.0.0'},
+    'app@1.1.0': {'lib': '^1.1.0', 'util': '~1.0.0'},
+    'lib@1.0.0': {},
+    'lib@1.1.0': {'util': '^1.0.0'},
+    'lib@1.2.0': {'util': '^1.0.0'},
+    'lib@2.0.0': {'bad': '*'},
+    'util@1.0.0': {},
+    'util@1.0.1': {'bad': '>=0.2.0'},
+}
+
+
+class FixtureBuilder(ForestBuilder):
+    """ 버전 인덱스, dependency store 대신 VERSIONS와 DEPENDENCIES를 읽는 ForestBuilder """
+
+    def __init__(self, resolve_as_of=None):
+        super().__init__(offline_mode=True, resolve_as_of=resolve_as_of)
+
+    def get_version_list(self, name):
+        times = VERSIONS.get(name, {})
+        return build_version_list(list(times), times)
+
+    def read_dependencies(self, pkg_name, pkg_version):
+        return dict(DEPENDENCIES.get(f"{pkg_name}@{pkg_version}", {}))
+
+    def prefetch_dependencies(self, g, frontier):
+        pass
+
+
+def keys(graph, node_ids):
+    return [graph.key(node_id) for node_id in node_ids]
+
+
+def test_range_nodes_follow_every_satisfying_version():
+    graph = RangeGraph(FixtureBuilder())
+    assert keys(graph, graph.range_node_ids('lib', '^1.0.0')) == ['lib@1.0.0', 'lib@1.1.0', 'lib@1.2.0']
+    assert keys(graph, graph.range_node_ids('lib', '>=3.0.0')) == []
+    assert graph.unresolved == 1
+
+
+@pytest.mark.parametrize('as_of', [None, '2020-07-01', '2021-06-15', '2021-12-31'])
+@pytest.mark.parametrize('name, version_range', [('lib', '^1.0.0'), ('lib', '*'), ('util', '~1.0.0'), ('bad', '>=0.2.0')])
+def test_max_only_matches_forest_resolution(name, version_range, as_of):
+    as_of = parse_publish_time(as_of) if as_of else None
+    graph = RangeGraph(FixtureBuilder(resolve_as_of=as_of))
+    range_id = graph.range_edge(name, version_range)
+    expected = max_satisfying(graph.builder.get_version_list(name), version_range, as_of)
+    assert keys(graph, graph.range_nodes(range_id, max_only=True)) == ([f"{name}@{expected}"] if expected else [])
+
+
+def test_as_of_drops_later_versions():
+    graph = RangeGraph(FixtureBuilder(resolve_as_of=parse_publish_time('2020-07-01')))
+    assert keys(graph, graph.range_node_ids('lib', '^1.0.0')) == ['lib@1.0.0', 'lib@1.1.0']
+    assert keys(graph, graph.range_node_ids('bad', '>=0.2.0')) == []
+
+
+def test_find_path_returns_shortest_path():
+    graph = RangeGraph(FixtureBuilder())
+    start_ids = graph.range_node_ids('app', '*')
+    target_ids = graph.range_node_ids('bad', '*')
+    # app@1.1.0의 util ~1.0.0이 util@1.0.1을 허용하므로 lib을 거치는 길보다 짧음
+    assert keys(graph, graph.find_path(start_ids, target_ids)) == ['app@1.1.0', 'util@1.0.1', 'bad@0.2.0']
+    assert graph.find_path(start_ids, target_ids, max_depth=1) is None
+    assert keys(graph, graph.find_path(graph.range_node_ids('app', '1.0.0'), target_ids)) == [
+        'app@1.0.0', 'lib@1.1.0', 'util@1.0.1', 'bad@0.2.0']
+
+
+def test_find_path_respects_as_of():
+    # 2021-06-15 기준으로는 util@1.0.1과 lib@2.0.0이 아직 없으므로 bad에 닿지 않음
+    graph = RangeGraph(FixtureBuilder(resolve_as_of=parse_publish_time('2021-06-15')))
+    assert graph.find_path(graph.range_node_ids('app', '*'), graph.range_node_ids('bad', '*')) is None
+    assert keys(graph, graph.find_path(graph.range_node_ids('app', '*'), graph.range_node_ids('util', '*'))) == [
+        'app@1.1.0', 'util@1.0.0']
+
+
+def test_save_load_round_trip(tmp_path):
+    as_of = parse_publish_time('2021-06-15')
+    graph = RangeGraph(FixtureBuilder(resolve_as_of=as_of))
+    start_ids = graph.range_node_ids('app', '*')
+    reached = list(graph.iter_reachable(start_ids))
+    path = str(tmp_path / 'range_graph.json')
+    graph.save(path)
+
+    loaded = RangeGraph.load(path, FixtureBuilder(resolve_as_of=as_of))
+    assert str(loaded) == str(graph)
+    assert loaded.stats() == graph.stats()
+    assert keys(loaded, range(loaded.node_count)) == keys(graph, range(graph.node_count))
+    assert list(loaded.iter_reachable(start_ids)) == reached
+    # 읽은 뒤에 새로 만드는 range edge도 publish 시각을 보고 as_of를 적용함
+    assert keys(loaded, loaded.range_node_ids('lib', '*')) == ['lib@1.0.0', 'lib@1.1.0', 'lib@1.2.0']
+
+
+def test_load_rejects_other_as_of(tmp_path):
+    graph = RangeGraph(FixtureBuilder())
+    graph.range_node_ids('app', '*')
+    path = str(tmp_path / 'range_graph.json')
+    graph.save(path)
+    with pytest.raises(ValueError):
+        RangeGraph.load(path, FixtureBuilder(resolve_as_of=parse_publish_time('2021-06-15')))
@@ -0,0 +1,131 @@
+import os
+import sys
+import gzip
+import json
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from npm_fetcher import NpmFetcher
+from registry_client import PackumentDecodeError, RegistryClient
+
+
+PACKUMENT = {
+    'name': 'left-pad',
+    'dist-tags': {'latest': '1.1.0'},
+    'versions': {
+        '1.0.0': {'name': 'left-pad', 'version': '1.0.0', 'dependencies': {}},
+        '1.1.0': {'name': 'left-pad', 'version': '1.1.0', 'dependencies': {'a': '^1.0.0'}},
+    },
+}
+ETAG = '"left-pad-v1"'
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+    """
+    - Description: 테스트용 로컬 registry
+                   /left-pad - gzip + ETag (If-None-Match가 맞으면 304), /plain - gzip 없는 JSON,
+                   /truncated - 잘린 gzip, /garbled - JSON이 아닌 본문, 그 외는 404
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        body = json.dumps(PACKUMENT).encode('utf-8')
+        if self.path == '/left-pad':
+            if self.headers.get('If-None-Match') == ETAG:
+                self._send(304, headers={'ETag': ETAG})
+            else:
+                self._send(200, gzip.compress(body), {'ETag': ETAG, 'Content-Encoding': 'gzip'})
+        elif self.path == '/plain':
+            self._send(200, body)
+        elif self.path == '/truncated':
+            self._send(200, gzip.compress(body)[:20], {'ETag': '"t"', 'Content-Encoding': 'gzip'})
+        elif self.path == '/garbled':
+            self._send(200, b'{"name": "garbled", "versions": ', {'ETag': '"g"'})
+        else:
+            self._send(404, b'{"error":"Not found"}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def registry():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RegistryHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server):
+    host, port = server.server_address
+    return RegistryClient(f'http://{host}:{port}', timeout=5)
+
+
+def test_gzip_packument_and_etag_revalidation(registry):
+    client = make_client(registry)
+    assert client.get_packument('left-pad') == PACKUMENT
+    # 두 번째 요청은 If-None-Match를 보내고 304로 받아서 기억해둔 본문을 씀
+    assert client.get_packument('left-pad') == PACKUMENT
+    assert registry.requests == [('/left-pad', None), ('/left-pad', ETAG)]
+    assert client.stats() == {'requests': 2, 'not_modified': 1, 'etags': 1}
+
+
+def test_plain_json_packument(registry):
+    client = make_client(registry)
+    assert client.get_packument('plain') == PACKUMENT
+    assert client.stats()['etags'] == 0
+
+
+def test_view_matches_npm_view_output(registry):
+    client = make_client(registry)
+    assert json.loads(client.view(['left-pad', 'versions', '--json'])) == ['1.0.0', '1.1.0']
+    assert json.loads(client.view(['left-pad@^1.1.0', 'dependencies', '--json'])) == {'a': '^1.0.0'}
+
+
+def test_missing_package_is_e404(registry):
+    client = make_client(registry)
+    with pytest.raises(subprocess.CalledProcessError) as info:
+        client.get_packument('missing')
+    assert 'E404' in info.value.stderr
+
+
+@pytest.mark.parametrize('name', ['truncated', 'garbled'])
+def test_malformed_body_is_os_error(registry, name):
+    client = make_client(registry)
+    with pytest.raises(PackumentDecodeError):
+        client.get_packument(name)
+    # 깨진 본문의 ETag는 기억하지 않음 (다음 요청은 전체 본문을 다시 받음)
+    assert client.stats()['etags'] == 0
+    # 같은 client로 다른 요청은 계속 할 수 있음
+    assert client.get_packument('left-pad') == PACKUMENT
+
+
+def test_fetcher_reports_malformed_body_without_stopping(registry):
+    client = make_client(registry)
+    fetcher = NpmFetcher(concurrency=2, retries=1, backoff=0, fetch_function=client.view)
+    jobs = [(name, [name, 'versions', '--json']) for name in ['left-pad', 'truncated', 'garbled', 'plain']]
+    results = {key: (stdout, error) for key, stdout, error in fetcher.map(jobs)}
+
+    assert json.loads(results['left-pad'][0]) == ['1.0.0', '1.1.0']
+    assert json.loads(results['plain'][0]) == ['1.0.0', '1.1.0']
+    for name in ['truncated', 'garbled']:
+        assert results[name][0] is None
+        assert isinstance(results[name][1], PackumentDecodeError)
@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import datetime
+from array import array
+from semver_resolver import VersionList, build_version_list, parse_version
+from node_key import key_name, parse_record_filename
+
+
+def load_publish_times(time_folders=('./metadata', './packuments')):
+    """
+    - Description: npm view <pkg> --json으로 저장한 metadata와 packument 파일들의 'time' 필드를 모음
+                   파일 이름 대신 파일 안의 name을 쓰므로 scoped 패키지가 하위 폴더에 저장돼 있어도 읽힘
+    - Input: metadata / packument JSON이 있는 폴더들
+    - Output: {패키지 이름: {버전: publish 시각}}
+    """
+    publish_times = {}
+    for folder in time_folders:
+        if not os.path.isdir(folder):
+            continue
+        for root, _, filenames in os.walk(folder):
+            for filename in filenames:
+                if not filename.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(root, filename), 'r') as file:
+                        data = json.load(file)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    print(f"JSON decode error in {filename}: {e}")
+                    continue
+                if not isinstance(data, dict) or not isinstance(data.get('time'), dict):
+                    continue
+                pkg_name = data.get('name')
+                if not pkg_name:
+                    # metadata의 _id는 'name@version', packument의 _id는 이름만 있음 ('@babel/core')
+                    pkg_id = data.get('_id', '')
+                    try:
+                        pkg_name = key_name(pkg_id)
+                    except ValueError:
+                        pkg_name = pkg_id
+                if pkg_name:
+                    publish_times.setdefault(pkg_name, {}).update(data['time'])
+    return publish_times
+
+
+# registry에서 직접 가져온(인덱스에 없는) 버전 리스트의 지문
+REGISTRY_FINGERPRINT = 'registry'
+
+
+def _row_fingerprint(versions_text, times_blob):
+    # 인덱스 한 행(버전 목록 + publish 시각)의 내용 지문, 다시 만들거나 바꿔도 내용이 같으면 같은 값
+    digest = hashlib.blake2b(versions_text.encode('utf-8'), digest_size=8)
+    if times_blob is not None:
+        digest.update(b'\0')
+        digest.update(bytes(times_blob))
+    return digest.hexdigest()
+
+
+def _times_blob(version_list):
+    # 정렬된 버전 순서 그대로의 epoch 초 배열 (publish 시각이 없는 패키지는 NULL)
+    return version_list.times.tobytes() if version_list.times is not None else None
+
+
+def build_version_index(versions_folder='./versions', index_path='version_index.sqlite', time_folders=('./metadata', './packuments')):
+    """
+    - Description: versions 폴더의 *_versionList.json들을 한 번 읽어서 패키지 이름 -> 정렬된 버전 리스트
+                   SQLite 인덱스를 만듦. 같은 패키지의 파일이 여러 개면 합침
+                   metadata / packument 파일에 publish 시각이 있으면 버전 리스트와 같은 순서의 시각 배열도 같이 저장
+    - Input: versionList 폴더 경로, 만들 인덱스 파일 경로, publish 시각을 읽을 폴더들
+    - Output: 인덱스에 들어간 패키지 수
+    """
+    merged = {}
+    with os.scandir(versions_folder) as entries:
+        for entry in entries:
+            parsed = parse_record_filename(entry.name, '_versionList.json')
+            if parsed is None:
+                continue
+            pkg_name = parsed[0]
+            try:
+                with open(entry.path, 'r') as file:
+                    versions = json.load(file)
+            except json.JSONDecodeError as e:
+                print(f"JSON decode error in {entry.name}: {e}")
+                continue
+            if isinstance(versions, str):
+                versions = [versions]
+            if isinstance(versions, list):
+                merged.setdefault(pkg_name, set()).update(v for v in versions if isinstance(v, str))
+    publish_times = load_publish_times(time_folders)
+
+    tmp_path = index_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE versions (name TEXT PRIMARY KEY, versions TEXT NOT NULL, times BLOB) WITHOUT ROWID")
+    rows = []
+    for pkg_name, versions in merged.items():
+        # semver 순서로 정렬해서 '\n'으로 이어 붙여 저장, publish 시각은 같은 순서의 int64 배열로 저장
+        version_list = build_version_list(sorted(versions), publish_times.get(pkg_name))
+        rows.append((pkg_name, '\n'.join(version_list.versions), _times_blob(version_list)))
+        if len(rows) >= 10000:
+            conn.executemany("INSERT INTO versions VALUES (?, ?, ?)", rows)
+            rows = []
+    conn.executemany("INSERT INTO versions VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    # 다 만든 뒤에 교체해서 읽는 쪽이 반쯤 만들어진 인덱스를 보지 않도록 함
+    os.replace(tmp_path, index_path)
+    return len(merged)
+
+
+def update_version_index(index_path, version_lists):
+    """
+    - Description: 인덱스 파일에서 패키지들의 버전 리스트(와 publish 시각)만 바꿈 (새 버전이 올라왔을 때, 전체를 다시 만들지 않음)
+    - Input: 인덱스 파일 경로, {패키지 이름: VersionList}
+    - Output: 바꾼 패키지 수
+    """
+    conn = sqlite3.connect(index_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, versions TEXT NOT NULL, times BLOB) WITHOUT ROWID")
+    if 'times' not in [row[1] for row in conn.execute("PRAGMA table_info(versions)")]:
+        conn.execute("ALTER TABLE versions ADD COLUMN times BLOB")
+    conn.executemany("INSERT OR REPLACE INTO versions (name, versions, times) VALUES (?, ?, ?)",
+                     [(name, '\n'.join(version_list.versions), _times_blob(version_list))
+                      for name, version_list in version_lists.items()])
+    conn.commit()
+    conn.close()
+    return len(version_lists)
+
+
+class VersionIndex:
+    """
+    - Description: build_version_index로 만든 인덱스를 읽어서 패키지 이름으로 VersionList를 조회
+                   한 번 읽은 패키지는 메모리에 두고 바로 돌려줌
+                   publish 시각 배열이 있으면 VersionList.times로 같이 돌려줌 (as-of 해석은 메타데이터를 다시 읽지 않음)
+                   인덱스에 없는 패키지 때문에 npm view로 넘어간 횟수도 셈
+                   패키지마다 버전 목록과 publish 시각의 내용 지문을 같이 돌려줘서, resolution cache가 인덱스를
+                   다시 만들거나 바꾼 뒤의 오래된 해석 결과를 버릴 수 있게 함
+    - Input: index_path - 인덱스 파일 경로
+    """
+
+    def __init__(self, index_path='version_index.sqlite'):
+        self.index_path = index_path
+        self.conn = None
+        self.has_times = False
+        self.loaded = {}
+        self.fingerprints = {}
+        self.fallbacks = 0
+        self.missing = set()
+
+    def available(self):
+        return os.path.exists(self.index_path)
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+            # 여러 워커 프로세스가 같은 인덱스를 읽을 때 복사본 대신 OS page cache를 같이 쓰도록 mmap으로 읽음
+            self.conn.execute("PRAGMA mmap_size=1073741824")
+            # publish 시각 열이 없는 이전 인덱스도 그대로 읽음
+            self.has_times = 'times' in [row[1] for row in self.conn.execute("PRAGMA table_info(versions)")]
+        return self.conn
+
+    def get(self, name):
+        """
+        - Description: 패키지의 정렬된 버전 리스트 조회
+        - Input: 패키지 이름
+        - Output: VersionList, 인덱스에 없으면 None
+        """
+        version_list = self.loaded.get(name)
+        if version_list is not None or name in self.missing:
+            return version_list
+        row = None
+        if self.available():
+            conn = self._connect()
+            columns = "versions, times" if self.has_times else "versions, NULL"
+            row = conn.execute(f"SELECT {columns} FROM versions WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            self.missing.add(name)
+            return None
+        # 이미 semver 순서로 저장돼 있으므로 다시 정렬하지 않음 (시각 배열과 순서가 맞아야 함)
+        versions = row[0].split('\n') if row[0] else []
+        times = array('q', row[1]) if row[1] is not None else None
+        version_list = VersionList([parse_version(version) for version in versions], versions, times)
+        self.loaded[name] = version_list
+        self.fingerprints[name] = _row_fingerprint(row[0], row[1])
+        return version_list
+
+    def add(self, name, version_list, fetched=True):
+        """
+        - Description: 버전 리스트를 이번 실행 동안 메모리에 기억
+        - Input: 패키지 이름, VersionList,
+                 fetched - registry에서 가져온 것이면 True, 인덱스 파일에도 같이 쓴 것이면(update_version_index) False
+        """
+        self.missing.discard(name)
+        self.loaded[name] = version_list
+        if fetched:
+            self.fingerprints[name] = REGISTRY_FINGERPRINT
+        else:
+            self.fingerprints[name] = _row_fingerprint('\n'.join(version_list.versions), _times_blob(version_list))
+
+    def fingerprint(self, name):
+        """ 패키지 버전 리스트의 지문 (인덱스 행의 내용 지문, registry에서 가져왔으면 'registry', 없으면 빈 문자열) """
+        self.get(name)
+        return self.fingerprints.get(name, '')
+
+    def record_fallback(self, name):
+        self.fallbacks += 1
+        print(f"[!] {name} is not in the version index. Falling back to npm view ({self.fallbacks} so far)")
+
+    def stats(self):
+        return {
+            'loaded_packages': len(self.loaded),
+            'missing_packages': len(self.missing),
+            'npm_view_fallbacks': self.fallbacks,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+if __name__ == "__main__":
+    versions_folder = sys.argv[1] if len(sys.argv) > 1 else './versions'
+    index_path = sys.argv[2] if len(sys.argv) > 2 else 'version_index.sqlite'
+
+    print(f"\n\n현재 시간:", datetime.datetime.now())
+    count = build_version_index(versions_folder, index_path)
+    print(f"[+] {count} packages indexed into {index_path}")
+    print(f"현재 시간:", datetime.datetime.now())